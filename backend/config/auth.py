@@ -0,0 +1,201 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import urllib.request
+
+import jwt
+
+from config.cache import LRUCache
+from config.db import SUPABASE_URL
+
+logger = logging.getLogger(__name__)
+
+# "remote" asks Supabase about every token, "local" verifies signatures here
+AUTH_VERIFY_MODE = os.environ.get("AUTH_VERIFY_MODE", "remote").lower()
+
+SUPABASE_JWKS_URL = os.environ.get(
+    "SUPABASE_JWKS_URL", f"{SUPABASE_URL}/auth/v1/.well-known/jwks.json"
+)
+SUPABASE_JWT_ISSUER = os.environ.get("SUPABASE_JWT_ISSUER", f"{SUPABASE_URL}/auth/v1")
+SUPABASE_JWT_AUDIENCE = os.environ.get("SUPABASE_JWT_AUDIENCE", "authenticated")
+# Only needed for projects still signing with the legacy shared HS256 secret
+SUPABASE_JWT_SECRET = os.environ.get("SUPABASE_JWT_SECRET")
+
+JWKS_REFRESH_SECONDS = int(os.environ.get("JWKS_REFRESH_SECONDS", "600"))
+# Lower bound between forced refreshes triggered by unknown key ids
+JWKS_MIN_REFRESH_SECONDS = int(os.environ.get("JWKS_MIN_REFRESH_SECONDS", "30"))
+JWT_LEEWAY_SECONDS = int(os.environ.get("JWT_LEEWAY_SECONDS", "10"))
+
+# Verified identities are reused until the token expires or this ttl passes.
+# Revocation is per worker: a logout is refused at once by the worker that
+# handled it, but other workers keep accepting the token until their cached
+# identity expires (remote mode) or the token itself does (local mode), and
+# a password change made through Supabase revokes nothing here.
+AUTH_CACHE_SIZE = int(os.environ.get("AUTH_CACHE_SIZE", "10000"))
+AUTH_CACHE_TTL_SECONDS = int(os.environ.get("AUTH_CACHE_TTL_SECONDS", "300"))
+
+ASYMMETRIC_ALGORITHMS = ["RS256", "ES256", "EdDSA"]
+
+
+class UnknownSigningKey(Exception):
+    """The token was signed with a key we do not have locally."""
+
+
+class JWKSCache:
+    """Signing keys published by Supabase, refreshed by a daemon thread."""
+
+    def __init__(self, url: str, refresh_seconds: int, min_refresh_seconds: int):
+        self.url = url
+        self.refresh_seconds = refresh_seconds
+        self.min_refresh_seconds = min_refresh_seconds
+        self._keys = {}
+        self._lock = threading.Lock()
+        # Held for the whole fetch, so the daemon thread and requests never fetch at once
+        self._refresh_lock = threading.Lock()
+        self._last_attempt = None
+        self._thread = None
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="jwks-refresh", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self.refresh()
+            time.sleep(self.refresh_seconds)
+
+    def refresh(self):
+        """Fetch the key set, unless a fetch was attempted less than min_refresh_seconds ago.
+
+        The attempt counts whether or not it succeeds, so an unreachable JWKS
+        endpoint is not hit again by every token with an unknown key id.
+        Callers arriving during a fetch wait for it instead of starting another.
+        """
+        with self._refresh_lock:
+            now = time.monotonic()
+            if self._last_attempt is not None and now - self._last_attempt < self.min_refresh_seconds:
+                return False
+            self._last_attempt = now
+            return self._fetch()
+
+    def _fetch(self):
+        try:
+            with urllib.request.urlopen(self.url, timeout=5) as response:
+                document = json.loads(response.read())
+        except Exception as e:
+            logger.warning(f"JWKS refresh from {self.url} failed: {str(e)}")
+            return False
+
+        keys = {}
+        for jwk in document.get("keys", []):
+            kid = jwk.get("kid")
+            if not kid:
+                continue
+            try:
+                keys[kid] = jwt.PyJWK(jwk)
+            except Exception as e:
+                logger.warning(f"Skipping unusable JWK {kid}: {str(e)}")
+
+        self._keys = keys
+        logger.info(f"Loaded {len(keys)} signing keys from JWKS")
+        return True
+
+    def get(self, kid: str):
+        self.start()
+        key = self._keys.get(kid)
+        if key is not None:
+            return key
+
+        # A key rotation may have happened since the last refresh; refresh()
+        # also waits out the startup fetch, so the key may be there after it
+        self.refresh()
+        return self._keys.get(kid)
+
+
+jwks_cache = JWKSCache(SUPABASE_JWKS_URL, JWKS_REFRESH_SECONDS, JWKS_MIN_REFRESH_SECONDS)
+
+if AUTH_VERIFY_MODE == "local" and not SUPABASE_JWT_SECRET:
+    # Reported once here; each such token is then simply rejected with a 401
+    logger.warning("SUPABASE_JWT_SECRET is not set: legacy HS256 tokens will be rejected")
+
+
+def decode_supabase_token(token: str) -> dict:
+    """Verify signature, expiry, audience and issuer and return the claims.
+
+    Raises UnknownSigningKey only for a key id missing from the JWKS (it may
+    be newer than our copy), and jwt.InvalidTokenError for everything else
+    that cannot be verified here, missing configuration included.
+    """
+    header = jwt.get_unverified_header(token)
+    algorithm = header.get("alg")
+    kid = header.get("kid")
+
+    if algorithm == "HS256":
+        if not SUPABASE_JWT_SECRET:
+            raise jwt.InvalidTokenError("HS256 token but SUPABASE_JWT_SECRET is not set")
+        key = SUPABASE_JWT_SECRET
+        algorithms = ["HS256"]
+    elif algorithm in ASYMMETRIC_ALGORITHMS:
+        if not kid:
+            raise jwt.InvalidTokenError("Token header has no key id")
+        jwk = jwks_cache.get(kid)
+        if jwk is None:
+            raise UnknownSigningKey(f"Unknown key id {kid}")
+        key = jwk.key
+        algorithms = [algorithm]
+    else:
+        raise jwt.InvalidAlgorithmError(f"Unsupported token algorithm {algorithm}")
+
+    return jwt.decode(
+        token,
+        key,
+        algorithms=algorithms,
+        audience=SUPABASE_JWT_AUDIENCE,
+        issuer=SUPABASE_JWT_ISSUER,
+        leeway=JWT_LEEWAY_SECONDS,
+        options={"require": ["exp", "sub"]},
+    )
+
+
+token_cache = LRUCache(maxsize=AUTH_CACHE_SIZE, ttl=AUTH_CACHE_TTL_SECONDS)
+# Logged-out tokens stay rejected here until they would have expired anyway
+revoked_tokens = LRUCache(maxsize=AUTH_CACHE_SIZE, ttl=24 * 3600)
+
+
+def token_cache_key(token: str) -> str:
+    # Never keep raw bearer tokens in memory longer than the request
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def seconds_until_expiry(token: str) -> float:
+    """Remaining lifetime from the token's own exp claim, 0 if unknown."""
+    try:
+        claims = jwt.decode(token, options={"verify_signature": False})
+        return float(claims["exp"]) - time.time()
+    except Exception:
+        return 0
+
+
+def get_cached_identity(token: str):
+    return token_cache.get(token_cache_key(token))
+
+
+def cache_identity(token: str, user):
+    token_cache.set(token_cache_key(token), user, ttl=seconds_until_expiry(token))
+
+
+def is_revoked(token: str) -> bool:
+    return revoked_tokens.get(token_cache_key(token), False)
+
+
+def revoke_token(token: str):
+    """Forget a token and refuse it for the rest of its lifetime."""
+    key = token_cache_key(token)
+    revoked_tokens.set(key, True, ttl=seconds_until_expiry(token) + JWT_LEEWAY_SECONDS)
+    return token_cache.delete(key)
@@ -1,9 +1,20 @@
-from sqlalchemy import create_engine
+from fastapi import Request
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from starlette.concurrency import run_in_threadpool
+from contextlib import asynccontextmanager
+from typing import Union
+from urllib.parse import urlparse
+import functools
+import hashlib
 import os
+import uuid
 from dotenv import load_dotenv
 from supabase import create_client
+from config.cache import LRUCache
+from config.pool import InstrumentedAsyncQueuePool, InstrumentedQueuePool, attach_histogram
 
 load_dotenv()
 
@@ -11,15 +22,221 @@ DATABASE_URL = os.environ.get("DB_URL")
 SUPABASE_URL = os.environ.get("SUPABASE_URL")
 SUPABASE_KEY = os.environ.get("SUPABASE_ANON_KEY")
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# "sync" runs services in the threadpool, "async" runs them on an asyncpg connection
+DB_MODE = os.environ.get("DB_MODE", "sync").lower()
+
+def to_async_url(url: str) -> str:
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    return url
+
+ASYNC_DATABASE_URL = os.environ.get("ASYNC_DB_URL") or (to_async_url(DATABASE_URL) if DATABASE_URL else None)
+
+# Optional hot standby for read-heavy GET routes
+REPLICA_DATABASE_URL = os.environ.get("REPLICA_DB_URL")
+ASYNC_REPLICA_DATABASE_URL = os.environ.get("ASYNC_REPLICA_DB_URL") or (
+    to_async_url(REPLICA_DATABASE_URL) if REPLICA_DATABASE_URL else None
+)
+# How long a client reads from the primary after it wrote something
+REPLICA_PIN_SECONDS = float(os.environ.get("REPLICA_PIN_SECONDS", "5"))
+
+def env_flag(name: str, default: str) -> bool:
+    return os.environ.get(name, default).lower() in ("1", "true", "yes", "on")
+
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = env_flag("DB_POOL_PRE_PING", "true")
+
+# Supabase's transaction pooler (port 6543) hands each transaction to a
+# different backend, so server-side prepared statements must be disabled
+SUPABASE_POOLER_PORT = 6543
+DB_PGBOUNCER = os.environ.get("DB_PGBOUNCER", "auto").lower()
+
+def uses_transaction_pooler(url: str) -> bool:
+    if DB_PGBOUNCER != "auto":
+        return DB_PGBOUNCER in ("1", "true", "yes", "on")
+    try:
+        return urlparse(url).port == SUPABASE_POOLER_PORT
+    except (TypeError, ValueError):
+        return False
+
+def engine_options(url: str, is_async: bool = False) -> dict:
+    options = {
+        "poolclass": InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+    if is_async and uses_transaction_pooler(url):
+        # psycopg2 never prepares server-side; asyncpg does unless told not to
+        options["connect_args"] = {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+        }
+    return options
+
+engine = attach_histogram(create_engine(DATABASE_URL, **engine_options(DATABASE_URL)))
+# Services refresh what they return, so nothing needs reloading after commit
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
 Base = declarative_base()
 
+async_engine = None
+AsyncSessionLocal = None
+if DB_MODE == "async":
+    async_engine = create_async_engine(ASYNC_DATABASE_URL, **engine_options(ASYNC_DATABASE_URL, is_async=True))
+    attach_histogram(async_engine.sync_engine)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+class ReadOnlySession(Session):
+    """Session bound to the replica; any attempt to flush writes fails loudly."""
+
+@event.listens_for(ReadOnlySession, "before_flush")
+def reject_replica_writes(session, flush_context, instances):
+    raise Exception("Read-only session cannot write; use get_db for this route")
+
+replica_engine = None
+async_replica_engine = None
+ReadSessionLocal = SessionLocal
+AsyncReadSessionLocal = AsyncSessionLocal
+if REPLICA_DATABASE_URL:
+    replica_engine = attach_histogram(create_engine(REPLICA_DATABASE_URL, **engine_options(REPLICA_DATABASE_URL)))
+    ReadSessionLocal = sessionmaker(
+        class_=ReadOnlySession, autocommit=False, autoflush=False, expire_on_commit=False, bind=replica_engine
+    )
+    if DB_MODE == "async":
+        async_replica_engine = create_async_engine(
+            ASYNC_REPLICA_DATABASE_URL, **engine_options(ASYNC_REPLICA_DATABASE_URL, is_async=True)
+        )
+        attach_histogram(async_replica_engine.sync_engine)
+        AsyncReadSessionLocal = async_sessionmaker(
+            async_replica_engine, sync_session_class=ReadOnlySession, autoflush=False, expire_on_commit=False
+        )
+
+# Clients that wrote recently, keyed by a hash of their Authorization header
+primary_pins = LRUCache(maxsize=100000, ttl=REPLICA_PIN_SECONDS)
+
+def client_key(request: Request):
+    authorization = request.headers.get("authorization")
+    if not authorization:
+        return None
+    return hashlib.sha256(authorization.encode()).hexdigest()
+
+def pin_to_primary(request: Request):
+    key = client_key(request)
+    if key and REPLICA_DATABASE_URL:
+        primary_pins.set(key, True)
+
+def skip_primary_pin(request: Request):
+    """For POSTs that write nothing a later read depends on (heartbeats)"""
+    request.state.skip_primary_pin = True
+
+def reads_from_primary(request: Request) -> bool:
+    if not REPLICA_DATABASE_URL:
+        return True
+    key = client_key(request)
+    return bool(key and primary_pins.get(key, False))
+
 supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
 
-def get_db():
+# Either kind of session can be handed to the service layer
+DbSession = Union[Session, AsyncSession]
+
+def get_sync_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+get_db = get_async_db if DB_MODE == "async" else get_sync_db
+
+@asynccontextmanager
+async def db_session():
+    """Short-lived session for code outside a request dependency.
+
+    Long-lived handlers (websockets, long-polls) open one only around the
+    queries they run, so no pooled connection is held while they wait.
+    """
+    if DB_MODE == "async":
+        async with AsyncSessionLocal() as db:
+            yield db
+    else:
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            # close() rolls back on the wire; keep that off the event loop
+            await run_in_threadpool(db.close)
+
+def get_sync_read_db(request: Request):
+    factory = SessionLocal if reads_from_primary(request) else ReadSessionLocal
+    db = factory()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_read_db(request: Request):
+    factory = AsyncSessionLocal if reads_from_primary(request) else AsyncReadSessionLocal
+    async with factory() as db:
+        yield db
+
+# For GET routes that tolerate replica lag; clients that just wrote stay on the primary
+get_read_db = get_async_read_db if DB_MODE == "async" else get_sync_read_db
+
+@asynccontextmanager
+async def read_db_session(request: Request):
+    """db_session() counterpart of get_read_db"""
+    if reads_from_primary(request):
+        async with db_session() as db:
+            yield db
+    elif DB_MODE == "async":
+        async with AsyncReadSessionLocal() as db:
+            yield db
+    else:
+        db = ReadSessionLocal()
+        try:
+            yield db
+        finally:
+            await run_in_threadpool(db.close)
+
+async def run_db(db, fn, *args, **kwargs):
+    """Run a sync service function without blocking the event loop.
+
+    AsyncSession.run_sync hands fn a regular Session whose I/O goes through
+    the async driver; a plain Session is used from the threadpool instead.
+    """
+    if isinstance(db, Session):
+        return await run_in_threadpool(fn, db, *args, **kwargs)
+    return await db.run_sync(fn, *args, **kwargs)
+
+def async_service(service_cls):
+    """Build an awaitable twin of a service class.
+
+    Every staticmethod `m(db, ...)` becomes `async m(db, ...)` that accepts
+    either a Session or an AsyncSession, so routers are written once and
+    DB_MODE decides how the query is executed.
+    """
+    methods = {}
+    for name, attr in vars(service_cls).items():
+        if not isinstance(attr, staticmethod) or name.startswith("__"):
+            continue
+
+        def make(fn):
+            @functools.wraps(fn)
+            async def method(db, *args, **kwargs):
+                return await run_db(db, fn, *args, **kwargs)
+            return staticmethod(method)
+
+        methods[name] = make(attr.__func__)
+    return type(f"Async{service_cls.__name__}", (), methods)
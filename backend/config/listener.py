@@ -0,0 +1,136 @@
+import logging
+import os
+import select
+import threading
+import time
+
+import psycopg2
+from sqlalchemy.engine import make_url
+
+from config.db import DATABASE_URL
+
+logger = logging.getLogger(__name__)
+
+# LISTEN needs a session that stays put: use a direct or session-mode URL,
+# not Supabase's transaction pooler on port 6543
+LISTEN_DATABASE_URL = os.environ.get("LISTEN_DB_URL") or DATABASE_URL
+# How long to keep gathering notifications into one batch
+NOTIFY_BATCH_MS = float(os.environ.get("NOTIFY_BATCH_MS", "20"))
+
+
+def libpq_url(url: str) -> str:
+    """SQLAlchemy URL -> plain postgresql:// URL psycopg2 can connect with."""
+    return make_url(url).set(drivername="postgresql").render_as_string(hide_password=False)
+
+
+class PgListener:
+    """One LISTEN connection per worker, relaying NOTIFY payloads to handlers.
+
+    Runs on a daemon thread with its own psycopg2 connection (never a pooled
+    one, and never through a transaction pooler, which drops LISTEN state).
+    Notifications arriving within `batch_window` seconds of each other are
+    handed over together as handler(payloads), one call per channel, so a
+    burst costs one dispatch instead of one per message.
+    """
+
+    def __init__(self, url: str, batch_window: float = 0.02, max_backoff: float = 30.0):
+        self.url = libpq_url(url) if url else None
+        self.batch_window = batch_window
+        self.max_backoff = max_backoff
+        self.handlers = {}
+        self._stop = threading.Event()
+        self._thread = None
+        self.connected = False
+        self.received = 0
+        self.batches = 0
+        self.reconnects = 0
+        self.last_error = None
+
+    def on(self, channel: str, handler):
+        self.handlers[channel] = handler
+
+    def start(self):
+        if self._thread is not None or not self.handlers:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="pg-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        backoff = 0.5
+        while not self._stop.is_set():
+            connection = None
+            try:
+                # TCP keepalives turn a silently dropped connection into an error we can retry
+                connection = psycopg2.connect(
+                    self.url, keepalives=1, keepalives_idle=30, keepalives_interval=10, keepalives_count=3
+                )
+                connection.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                with connection.cursor() as cursor:
+                    for channel in self.handlers:
+                        cursor.execute(f'LISTEN "{channel}"')
+                self.connected = True
+                backoff = 0.5
+                logger.info(f"Listening on {', '.join(self.handlers)}")
+                self._listen(connection)
+            except Exception as e:
+                self.last_error = str(e)
+                logger.error(f"LISTEN connection failed, retrying in {backoff}s: {str(e)}")
+            finally:
+                self.connected = False
+                if connection is not None:
+                    connection.close()
+            if self._stop.wait(backoff):
+                break
+            self.reconnects += 1
+            backoff = min(backoff * 2, self.max_backoff)
+
+    def _listen(self, connection):
+        while not self._stop.is_set():
+            # Wake up every second to notice stop() and dead connections
+            if not select.select([connection], [], [], 1.0)[0]:
+                continue
+            connection.poll()
+            if not connection.notifies:
+                continue
+
+            # Keep collecting for a short window so a burst becomes one batch
+            deadline = time.monotonic() + self.batch_window
+            while (remaining := deadline - time.monotonic()) > 0:
+                if select.select([connection], [], [], remaining)[0]:
+                    connection.poll()
+
+            pending = {}
+            for notify in connection.notifies:
+                pending.setdefault(notify.channel, []).append(notify.payload)
+            self.received += len(connection.notifies)
+            connection.notifies.clear()
+            self.batches += 1
+            self._dispatch(pending)
+
+    def _dispatch(self, pending):
+        for channel, payloads in pending.items():
+            try:
+                self.handlers[channel](payloads)
+            except Exception as e:
+                logger.error(f"Handler for channel {channel} failed: {str(e)}")
+
+    def stats(self):
+        return {
+            "channels": list(self.handlers),
+            "connected": self.connected,
+            "received": self.received,
+            "batches": self.batches,
+            "reconnects": self.reconnects,
+            "last_error": self.last_error,
+        }
+
+
+# Features register their channel with pg_listener.on(); main.py starts it when any did
+pg_listener = PgListener(LISTEN_DATABASE_URL, batch_window=NOTIFY_BATCH_MS / 1000)
@@ -0,0 +1,108 @@
+import threading
+import time
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Upper bounds, in milliseconds, of the checkout wait buckets
+WAIT_BUCKETS_MS = [1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+
+class PoolWaitHistogram:
+    """Distribution of how long callers waited to check out a connection."""
+
+    def __init__(self, buckets_ms=WAIT_BUCKETS_MS):
+        self.buckets_ms = list(buckets_ms)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counts = [0] * (len(self.buckets_ms) + 1)
+            self.total = 0
+            self.total_ms = 0.0
+            self.max_ms = 0.0
+            self.timeouts = 0
+
+    def observe(self, waited_ms: float, timed_out: bool = False):
+        index = len(self.buckets_ms)
+        for i, bound in enumerate(self.buckets_ms):
+            if waited_ms <= bound:
+                index = i
+                break
+        with self._lock:
+            self.counts[index] += 1
+            self.total += 1
+            self.total_ms += waited_ms
+            self.max_ms = max(self.max_ms, waited_ms)
+            if timed_out:
+                self.timeouts += 1
+
+    def snapshot(self):
+        with self._lock:
+            labels = [f"<={bound}ms" for bound in self.buckets_ms] + [f">{self.buckets_ms[-1]}ms"]
+            return {
+                "checkouts": self.total,
+                "timeouts": self.timeouts,
+                "avg_ms": round(self.total_ms / self.total, 3) if self.total else 0.0,
+                "max_ms": round(self.max_ms, 3),
+                "buckets": dict(zip(labels, self.counts)),
+            }
+
+
+class InstrumentedPoolMixin:
+    """Times every checkout, including the wait for a free connection."""
+
+    wait_histogram = None
+
+    def _do_get(self):
+        started = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            timed_out = True
+            raise
+        finally:
+            if self.wait_histogram is not None:
+                self.wait_histogram.observe((time.perf_counter() - started) * 1000, timed_out)
+
+    def recreate(self):
+        # Pool.recreate() builds a fresh instance on dispose(); keep the same histogram
+        pool = super().recreate()
+        pool.wait_histogram = self.wait_histogram
+        return pool
+
+
+class InstrumentedQueuePool(InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def attach_histogram(engine):
+    engine.pool.wait_histogram = PoolWaitHistogram()
+    return engine
+
+
+def pool_status(engine):
+    """Live checkout numbers for an engine built on an instrumented pool."""
+    if engine is None:
+        return None
+    pool = engine.pool
+    status = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update({
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "idle": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": pool._max_overflow,
+            "timeout_seconds": pool.timeout(),
+        })
+    histogram = getattr(pool, "wait_histogram", None)
+    if histogram is not None:
+        status["wait"] = histogram.snapshot()
+    return status
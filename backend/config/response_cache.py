@@ -0,0 +1,223 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+
+from fastapi import Request, Response
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from config.cache import LRUCache
+from config.db import REPLICA_DATABASE_URL, reads_from_primary
+from config.listener import pg_listener
+from config.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Encoded GET responses kept per worker; 0 turns the cache off (ETags still apply)
+RESPONSE_CACHE_SIZE = int(os.environ.get("RESPONSE_CACHE_SIZE", "5000"))
+# Upper bound on staleness when an invalidation never arrives (manual SQL, lost NOTIFY)
+RESPONSE_CACHE_TTL_SECONDS = float(os.environ.get("RESPONSE_CACHE_TTL_SECONDS", "60"))
+# A replica may not have a write yet right after the bump; don't cache what it returns meanwhile
+RESPONSE_CACHE_REPLICA_SETTLE_SECONDS = float(os.environ.get("RESPONSE_CACHE_REPLICA_SETTLE_SECONDS", "2"))
+# "local" bumps versions on the worker that wrote; "postgres" tells every worker through NOTIFY
+RESPONSE_CACHE_BROADCAST = os.environ.get("RESPONSE_CACHE_BROADCAST", "local").lower()
+RESPONSE_CACHE_CHANNEL = "response_cache"
+
+# The community index (GET /communities/)
+COMMUNITIES_SCOPE = "communities"
+
+_PENDING = "response_cache_scopes"
+
+
+def community_scope(community_id: int) -> str:
+    return f"community:{community_id}"
+
+
+def make_etag(body: bytes) -> str:
+    # Derived from the exact bytes, so it is a strong validator on every worker
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison: W/"x" matches "x"
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+class CachedResponse:
+    __slots__ = ("body", "etag", "payload", "authors")
+
+    def __init__(self, payload, items: str = None):
+        self.payload = payload
+        self.body = payload.model_dump_json().encode()
+        self.etag = make_etag(self.body)
+        self.authors = {str(item.author_id) for item in getattr(payload, items)} if items else set()
+
+
+def as_anonymous(payload, items: str):
+    """The payload as seen by someone who wrote none of it: is_author false everywhere"""
+    return payload.model_copy(update={
+        items: [item.model_copy(update={"is_author": False}) for item in getattr(payload, items)]
+    })
+
+
+def as_viewer(payload, items: str, viewer_id):
+    viewer_id = str(viewer_id)
+    return payload.model_copy(update={
+        items: [
+            item.model_copy(update={"is_author": True}) if str(item.author_id) == viewer_id else item
+            for item in getattr(payload, items)
+        ]
+    })
+
+
+class ResponseCache:
+    """Encoded GET responses keyed by the versions of what they were built from.
+
+    Every entry's key carries the current version of each scope it depends
+    on (a community, the community index). A write bumps its scopes when its
+    transaction commits, so later lookups use new keys and the old entries
+    are simply never hit again; no entry is ever patched. A new display name
+    bumps the communities its owner posted or commented in.
+    Versions live in this worker's memory: with several workers, set
+    RESPONSE_CACHE_BROADCAST=postgres so commits reach them through NOTIFY.
+
+    Entries are shared by every viewer. What differs per viewer stays out of
+    them: authorization is checked before every lookup, viewer-dependent
+    flags are part of the key (community details) or stored cleared
+    (is_author on posts and comments, set again for the viewer's own items).
+
+    Because an entry is the same for everyone, concurrent misses on one key
+    (a popular feed right after a bump) share a single render through
+    SingleFlight instead of each running the same queries.
+    """
+
+    def __init__(self, maxsize: int = RESPONSE_CACHE_SIZE, ttl: float = RESPONSE_CACHE_TTL_SECONDS,
+                 replica_settle: float = RESPONSE_CACHE_REPLICA_SETTLE_SECONDS):
+        self.enabled = maxsize > 0
+        self.entries = LRUCache(maxsize=max(maxsize, 1), ttl=ttl)
+        self.replica_settle = replica_settle
+        self._versions = {}
+        self._lock = threading.Lock()
+        self.flights = SingleFlight()
+        self.bumps = 0
+        self.not_modified = 0
+        self.bypassed = 0
+        self.skipped_fills = 0
+
+    def versions(self, scopes):
+        with self._lock:
+            return tuple(self._versions.get(scope, (0, 0.0))[0] for scope in scopes)
+
+    def settled(self, scopes, now: float = None) -> bool:
+        """True once every scope's last bump is older than the replica settle time"""
+        now = now or time.monotonic()
+        with self._lock:
+            return all(now - self._versions.get(scope, (0, 0.0))[1] >= self.replica_settle for scope in scopes)
+
+    def bump(self, scopes):
+        now = time.monotonic()
+        with self._lock:
+            for scope in scopes:
+                version, _ = self._versions.get(scope, (0, 0.0))
+                self._versions[scope] = (version + 1, now)
+                self.bumps += 1
+
+    async def respond(self, request: Request, key, scopes, render, items: str = None, viewer_id=None) -> Response:
+        """JSON response for `key`, from the cache when its scopes have not changed.
+
+        `render` is awaited on a miss and returns the response model; it is
+        shared by concurrent identical requests, so it must open its own
+        session (read_db_session) and not depend on the viewer. With `items`,
+        that model's list field of that name holds rows with
+        author_id/is_author, and is_author is filled in for `viewer_id`.
+        A matching If-None-Match gets a 304 with no body.
+        """
+        # Someone who just wrote reads the primary; skip the cache and shared
+        # renders too, so a NOTIFY still in flight can't hide their own write
+        pinned = bool(REPLICA_DATABASE_URL and reads_from_primary(request))
+        bypass = pinned or not self.enabled
+        cache_key = (key, self.versions(scopes))
+        entry = None if bypass else self.entries.get(cache_key)
+        if entry is None:
+            async def build():
+                payload = await render()
+                return CachedResponse(as_anonymous(payload, items) if items else payload, items)
+
+            entry = await (build() if pinned else self.flights.do(cache_key, build))
+            if bypass:
+                self.bypassed += 1
+            elif reads_from_primary(request) or self.settled(scopes):
+                self.entries.set(cache_key, entry)
+            else:
+                self.skipped_fills += 1
+
+        body, etag = entry.body, entry.etag
+        if items and viewer_id is not None and str(viewer_id) in entry.authors:
+            body = as_viewer(entry.payload, items, viewer_id).model_dump_json().encode()
+            etag = make_etag(body)
+
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if etag_matches(request, etag):
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    def stats(self):
+        with self._lock:
+            scopes = len(self._versions)
+        return {
+            **self.entries.stats(),
+            "enabled": self.enabled,
+            "broadcast": RESPONSE_CACHE_BROADCAST,
+            "scopes": scopes,
+            "bumps": self.bumps,
+            "not_modified": self.not_modified,
+            "bypassed": self.bypassed,
+            "skipped_fills": self.skipped_fills,
+            "single_flight": self.flights.stats(),
+        }
+
+
+response_cache = ResponseCache()
+
+
+def invalidate(db: Session, *scopes):
+    """Mark cached responses of these scopes stale once db's transaction commits.
+
+    Call it anywhere before the commit; nothing happens if it rolls back.
+    """
+    db.info.setdefault(_PENDING, set()).update(scopes)
+    if RESPONSE_CACHE_BROADCAST == "postgres":
+        # Delivered by Postgres only if the transaction commits
+        db.execute(
+            text("SELECT pg_notify(:channel, scope) FROM unnest(CAST(:scopes AS text[])) AS scope"),
+            {"channel": RESPONSE_CACHE_CHANNEL, "scopes": list(scopes)}
+        )
+
+
+@event.listens_for(Session, "after_commit")
+def bump_committed_scopes(session):
+    scopes = session.info.pop(_PENDING, None)
+    if scopes:
+        response_cache.bump(scopes)
+
+
+@event.listens_for(Session, "after_rollback")
+def forget_rolled_back_scopes(session):
+    session.info.pop(_PENDING, None)
+
+
+def relay_invalidations(payloads):
+    """Listener-thread handler: bump what other workers committed (our own NOTIFYs included)"""
+    response_cache.bump(set(payloads))
+
+
+if RESPONSE_CACHE_BROADCAST == "postgres":
+    pg_listener.on(RESPONSE_CACHE_CHANNEL, relay_invalidations)
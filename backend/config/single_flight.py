@@ -0,0 +1,66 @@
+import asyncio
+import os
+
+# How long a request waits for an identical query another request started
+SINGLE_FLIGHT_TIMEOUT_SECONDS = float(os.environ.get("SINGLE_FLIGHT_TIMEOUT_SECONDS", "10"))
+
+
+class SingleFlightTimeout(Exception):
+    """A waiter gave up on a shared execution; the database is slow, not the request wrong."""
+
+
+class SingleFlight:
+    """Concurrent calls with the same key share one execution and its result.
+
+    The first caller for a key starts `fn()` as a task; callers arriving
+    while it runs await that same task instead of starting their own. The
+    task is shielded, so a caller that goes away (client disconnect) never
+    cancels the work the others are waiting for. `fn` must therefore not
+    depend on the first caller's request: it opens its own session.
+
+    A failure reaches every waiter as the same exception. A waiter gives up
+    after `timeout` seconds and raises SingleFlightTimeout, without starting another execution.
+    Only used from the event loop, so it needs no locking.
+    """
+
+    def __init__(self, timeout: float = SINGLE_FLIGHT_TIMEOUT_SECONDS):
+        self.timeout = timeout
+        self._flights = {}
+        self.executions = 0
+        self.coalesced = 0
+        self.timeouts = 0
+        self.errors = 0
+
+    async def do(self, key, fn):
+        loop = asyncio.get_running_loop()
+        task = self._flights.get(key)
+        if task is None or task.get_loop() is not loop:
+            task = self._flights[key] = loop.create_task(fn())
+            task.add_done_callback(lambda done: self._finish(key, done))
+            self.executions += 1
+        else:
+            self.coalesced += 1
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise SingleFlightTimeout(f"Timed out after {self.timeout}s waiting for the query")
+
+    def _finish(self, key, task):
+        if self._flights.get(key) is task:
+            del self._flights[key]
+        # Reading the exception also keeps asyncio from logging it as never retrieved
+        if not task.cancelled() and task.exception() is not None:
+            self.errors += 1
+
+    def stats(self):
+        calls = self.executions + self.coalesced
+        return {
+            "timeout_seconds": self.timeout,
+            "in_flight": len(self._flights),
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "saved_ratio": round(self.coalesced / calls, 4) if calls else 0.0,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+        }
@@ -1,20 +1,74 @@
-from fastapi import Depends, HTTPException
+from fastapi import Depends, Header, HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from config.db import supabase
+from config.auth import (
+    AUTH_VERIFY_MODE,
+    UnknownSigningKey,
+    cache_identity,
+    decode_supabase_token,
+    get_cached_identity,
+    is_revoked
+)
+from schemas.auth.auth_schema import AuthenticatedUser
+import hmac
+import jwt
 import logging
+import os
 
 logger = logging.getLogger(__name__)
 
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
+
+# /internal endpoints answer 404 unless this is set and sent as X-Internal-Token
+INTERNAL_API_TOKEN = os.environ.get("INTERNAL_API_TOKEN")
+
+def verify_token_remote(token: str):
+    user_response = supabase.auth.get_user(token)
+    if not user_response or not user_response.user:
+        raise HTTPException(status_code=401, detail="Invalid authentication credentials")
+
+    return user_response.user
+
+def verify_token_local(token: str):
+    try:
+        claims = decode_supabase_token(token)
+    except UnknownSigningKey as e:
+        logger.info(f"Falling back to remote token verification: {str(e)}")
+        return verify_token_remote(token)
+    except jwt.InvalidTokenError as e:
+        raise HTTPException(status_code=401, detail=str(e))
+
+    return AuthenticatedUser.from_claims(claims)
 
 def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    token = credentials.credentials
+    return authenticate_token(credentials.credentials)
+
+def authenticate_token(token: str):
+    """Identity behind a bearer token, for callers outside a request dependency (websockets)"""
+    if is_revoked(token):
+        raise HTTPException(status_code=401, detail="Token has been revoked")
+
+    user = get_cached_identity(token)
+    if user is not None:
+        return user
+
     try:
-        user_response = supabase.auth.get_user(token)
-        if not user_response or not user_response.user:
-            raise HTTPException(status_code=401, detail="Invalid authentication credentials")
-        
-        return user_response.user
+        if AUTH_VERIFY_MODE == "local":
+            user = verify_token_local(token)
+        else:
+            user = verify_token_remote(token)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=401, detail=str(e))
 
+    cache_identity(token, user)
+    return user
+
+def require_internal_access(x_internal_token: str = Header(None)):
+    """Guard for /internal endpoints; closed (404) while INTERNAL_API_TOKEN is unset"""
+    if not INTERNAL_API_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_internal_token or not hmac.compare_digest(x_internal_token.encode(), INTERNAL_API_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Forbidden")
@@ -1,7 +1,12 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from config.db import engine
-import models
+from config.db import pin_to_primary
+from config.listener import pg_listener
+from services.chat.message_writer import message_writer
+from services.chat.presence import presence
+from services.chat.read_cursors import read_cursors
+from services.communities.community_deleter import community_deleter
 import os
 from routers.auth import auth_router
 from routers.communities import community_router
@@ -11,10 +16,24 @@ from routers.comments import comment_router
 from routers.likes import like_router
 from routers.chat import chat_router
 from routers.users import user_router
+from routers.timeline import timeline_router
+from routers.search import search_router
+from routers.internal import internal_router
 
-models.Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # LISTEN connection for cross-worker events; a no-op unless a feature registered a channel
+    pg_listener.start()
+    yield
+    # Commit chat messages and read positions still waiting in their buffers
+    await message_writer.close()
+    await read_cursors.close()
+    await presence.close()
+    await community_deleter.close()
+    pg_listener.stop()
 
-app = FastAPI()
+# The schema is managed by Alembic: run `alembic upgrade head` before starting
+app = FastAPI(lifespan=lifespan)
 
 # CORS configuration - allows both localhost and production frontend
 frontend_url = os.environ.get("FRONTEND_URL", "")
@@ -30,6 +49,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def pin_writers_to_primary(request: Request, call_next):
+    response = await call_next(request)
+    # Keep a client that just wrote on the primary so it reads its own writes
+    if (request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400
+            and not getattr(request.state, "skip_primary_pin", False)):
+        pin_to_primary(request)
+    return response
+
 app.include_router(auth_router.router)
 app.include_router(community_router.router)
 app.include_router(membership_router.router)
@@ -38,6 +66,9 @@ app.include_router(comment_router.router)
 app.include_router(like_router.router)
 app.include_router(chat_router.router)
 app.include_router(user_router.router)
+app.include_router(timeline_router.router)
+app.include_router(search_router.router)
+app.include_router(internal_router.router)
 
 @app.get("/")
 def read_root():
@@ -0,0 +1,41 @@
+"""Helpers for migrations that must not block a live database."""
+from alembic import op
+import sqlalchemy as sa
+
+
+def index_is_valid(name: str):
+    """True/False for an existing index, None when it does not exist."""
+    row = op.get_bind().execute(
+        sa.text(
+            "SELECT i.indisvalid FROM pg_index i "
+            "JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE c.relname = :name"
+        ),
+        {"name": name},
+    ).first()
+    return None if row is None else row[0]
+
+
+def create_index_concurrently(name: str, table: str, definition: str, unique: bool = False, where: str = None,
+                              using: str = None):
+    """CREATE INDEX CONCURRENTLY outside the migration transaction.
+
+    A previous failed concurrent build leaves an INVALID index behind that
+    IF NOT EXISTS would silently keep, so such leftovers are dropped first.
+    """
+    with op.get_context().autocommit_block():
+        if not context_is_offline() and index_is_valid(name) is False:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+        op.execute(
+            f"CREATE {'UNIQUE ' if unique else ''}INDEX CONCURRENTLY IF NOT EXISTS {name} "
+            f"ON {table} {f'USING {using} ' if using else ''}({definition})" + (f" WHERE {where}" if where else "")
+        )
+
+
+def drop_index_concurrently(name: str):
+    with op.get_context().autocommit_block():
+        op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+
+def context_is_offline():
+    return op.get_context().as_sql
@@ -0,0 +1,102 @@
+"""Baseline schema as created by models.py before migrations existed
+
+Uses IF NOT EXISTS so databases built by the old import-time create_all
+or the SQL in DEPLOYMENT.md can simply be upgraded.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "users",
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("username", sa.String(), unique=True, nullable=True),
+        sa.Column("email", sa.String(), nullable=True),
+        sa.Column("password_hash", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("bio", sa.Text(), nullable=True),
+        sa.Column("display_name", sa.String(), nullable=True),
+        if_not_exists=True,
+    )
+    op.create_table(
+        "communities",
+        sa.Column("community_id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(100), unique=True, nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("created_by", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.user_id"), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        if_not_exists=True,
+    )
+    op.create_table(
+        "memberships",
+        sa.Column("membership_id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.user_id", ondelete="CASCADE"), nullable=True),
+        sa.Column("community_id", sa.Integer(), sa.ForeignKey("communities.community_id", ondelete="CASCADE"), nullable=True),
+        sa.Column("role", sa.String(50), nullable=True),
+        sa.Column("joined_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        if_not_exists=True,
+    )
+    op.create_table(
+        "posts",
+        sa.Column("post_id", sa.Integer(), primary_key=True),
+        sa.Column("community_id", sa.Integer(), sa.ForeignKey("communities.community_id", ondelete="CASCADE"), nullable=True),
+        sa.Column("author_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.user_id", ondelete="CASCADE"), nullable=True),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column("media_url", sa.String(500), nullable=True),
+        sa.Column("media_type", sa.String(50), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        if_not_exists=True,
+    )
+    op.create_table(
+        "comments",
+        sa.Column("comment_id", sa.Integer(), primary_key=True),
+        sa.Column("post_id", sa.Integer(), sa.ForeignKey("posts.post_id", ondelete="CASCADE"), nullable=True),
+        sa.Column("author_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.user_id", ondelete="CASCADE"), nullable=True),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        if_not_exists=True,
+    )
+    op.create_table(
+        "likes",
+        sa.Column("like_id", sa.Integer(), primary_key=True),
+        sa.Column("post_id", sa.Integer(), sa.ForeignKey("posts.post_id", ondelete="CASCADE"), nullable=True),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.user_id", ondelete="CASCADE"), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        if_not_exists=True,
+    )
+    op.create_table(
+        "chat_rooms",
+        sa.Column("chat_id", sa.Integer(), primary_key=True),
+        sa.Column("community_id", sa.Integer(), sa.ForeignKey("communities.community_id", ondelete="CASCADE"), nullable=True),
+        sa.Column("title", sa.String(100), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        if_not_exists=True,
+    )
+    op.create_table(
+        "messages",
+        sa.Column("msg_id", sa.Integer(), primary_key=True),
+        sa.Column("chat_id", sa.Integer(), sa.ForeignKey("chat_rooms.chat_id", ondelete="CASCADE"), nullable=True),
+        sa.Column("sender_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.user_id", ondelete="SET NULL"), nullable=True),
+        sa.Column("type", sa.String(50), nullable=True),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column("sent_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        if_not_exists=True,
+    )
+
+
+def downgrade():
+    # Tables that predate migrations are never dropped by them
+    pass
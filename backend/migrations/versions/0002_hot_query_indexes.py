@@ -0,0 +1,71 @@
+"""Composite and unique indexes for the hot request paths
+
+Every index is built CONCURRENTLY so the tables stay writable. Duplicate
+memberships and likes are removed first, otherwise the unique builds fail.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+from migrations.helpers import create_index_concurrently, drop_index_concurrently
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+# Single-column indexes from DEPLOYMENT.md made redundant by the ones below
+SUPERSEDED_INDEXES = {
+    "idx_memberships_user": ("memberships", "user_id"),
+    "idx_posts_community": ("posts", "community_id"),
+    "idx_comments_post": ("comments", "post_id"),
+    "idx_likes_post": ("likes", "post_id"),
+    "idx_messages_chat": ("messages", "chat_id"),
+}
+
+
+def upgrade():
+    op.execute(
+        "DELETE FROM memberships m USING memberships d "
+        "WHERE m.user_id = d.user_id AND m.community_id = d.community_id "
+        "AND m.membership_id > d.membership_id"
+    )
+    op.execute(
+        "DELETE FROM likes l USING likes d "
+        "WHERE l.post_id = d.post_id AND l.user_id = d.user_id "
+        "AND l.like_id > d.like_id"
+    )
+
+    # Membership check on nearly every request, and "my communities"
+    create_index_concurrently("uq_memberships_user_community", "memberships", "user_id, community_id", unique=True)
+    # Member listings
+    create_index_concurrently("ix_memberships_community_joined", "memberships", "community_id, joined_at, membership_id")
+    # Community feed, newest first
+    create_index_concurrently("ix_posts_community_created", "posts", "community_id, created_at, post_id")
+    # Comments under a post
+    create_index_concurrently("ix_comments_post_created", "comments", "post_id, created_at, comment_id")
+    # Chat history, newest first
+    create_index_concurrently("ix_messages_chat_sent", "messages", "chat_id, sent_at, msg_id")
+    # Like toggle / like status, and one like per user per post
+    create_index_concurrently("uq_likes_post_user", "likes", "post_id, user_id", unique=True)
+
+    for name in SUPERSEDED_INDEXES:
+        drop_index_concurrently(name)
+
+
+def downgrade():
+    for name in (
+        "uq_likes_post_user",
+        "ix_messages_chat_sent",
+        "ix_comments_post_created",
+        "ix_posts_community_created",
+        "ix_memberships_community_joined",
+        "uq_memberships_user_community",
+    ):
+        drop_index_concurrently(name)
+
+    for name, (table, column) in SUPERSEDED_INDEXES.items():
+        create_index_concurrently(name, table, column)
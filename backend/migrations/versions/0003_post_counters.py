@@ -0,0 +1,49 @@
+"""Denormalized like_count and comment_count on posts
+
+Adding a NOT NULL column with a constant default is a catalog-only change
+on PostgreSQL 11+. The backfill then runs in small committed batches so no
+long transaction holds locks on posts.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.helpers import context_is_offline
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH_SIZE = 5000
+
+BACKFILL_SQL = """
+UPDATE posts p
+SET like_count = (SELECT count(*) FROM likes l WHERE l.post_id = p.post_id),
+    comment_count = (SELECT count(*) FROM comments c WHERE c.post_id = p.post_id)
+WHERE p.post_id > :after AND p.post_id <= :upto
+"""
+
+
+def upgrade():
+    op.add_column("posts", sa.Column("like_count", sa.Integer(), nullable=False, server_default="0"))
+    op.add_column("posts", sa.Column("comment_count", sa.Integer(), nullable=False, server_default="0"))
+
+    if context_is_offline():
+        op.execute(BACKFILL_SQL.replace(":after", "0").replace(":upto", "2147483647"))
+        return
+
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        last_id = bind.execute(sa.text("SELECT coalesce(max(post_id), 0) FROM posts")).scalar()
+        for after in range(0, last_id, BACKFILL_BATCH_SIZE):
+            bind.execute(sa.text(BACKFILL_SQL), {"after": after, "upto": after + BACKFILL_BATCH_SIZE})
+
+
+def downgrade():
+    op.drop_column("posts", "comment_count")
+    op.drop_column("posts", "like_count")
@@ -0,0 +1,21 @@
+"""Index for incremental chat sync (messages after a given msg_id)
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from migrations.helpers import create_index_concurrently, drop_index_concurrently
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    create_index_concurrently("ix_messages_chat_msg", "messages", "chat_id, msg_id")
+
+
+def downgrade():
+    drop_index_concurrently("ix_messages_chat_msg")
@@ -0,0 +1,132 @@
+"""Partition messages by month of sent_at and add the compacted archive
+
+The existing table is not copied: it becomes the first partition,
+messages_legacy, covering everything before BOUNDARY. Its new
+(msg_id, sent_at) key is built CONCURRENTLY and its range is proven by a
+CHECK constraint validated without blocking writes, so the swap itself only
+holds the table lock for catalog changes. Monthly partitions after BOUNDARY
+are created here and then kept ahead by scripts/maintain_message_partitions.py,
+with a DEFAULT partition catching anything that slips past it.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+from datetime import datetime, timezone
+
+from alembic import op
+
+from migrations.helpers import create_index_concurrently, drop_index_concurrently
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+MONTHS_AHEAD = 3
+
+
+def month_start(months_from_now: int) -> datetime:
+    now = datetime.now(timezone.utc)
+    index = now.year * 12 + now.month - 1 + months_from_now
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+# Two months out, so rows written while the migration runs (even across a
+# month end) still satisfy the legacy partition's bound
+BOUNDARY = month_start(2)
+
+
+def upgrade():
+    boundary = BOUNDARY.isoformat()
+
+    # Rows without a timestamp predate the server default; file them as the oldest
+    op.execute("UPDATE messages SET sent_at = 'epoch' WHERE sent_at IS NULL")
+    create_index_concurrently("messages_legacy_pkey", "messages", "msg_id, sent_at", unique=True)
+    # Left over from create_all's index=True, now covered by the primary key
+    drop_index_concurrently("ix_messages_msg_id")
+    with op.get_context().autocommit_block():
+        op.execute(
+            "ALTER TABLE messages ADD CONSTRAINT messages_legacy_bounds "
+            f"CHECK (sent_at IS NOT NULL AND sent_at < '{boundary}') NOT VALID"
+        )
+        op.execute("ALTER TABLE messages VALIDATE CONSTRAINT messages_legacy_bounds")
+
+    op.execute(
+        "ALTER TABLE messages DROP CONSTRAINT messages_pkey, "
+        "ADD CONSTRAINT messages_legacy_pkey PRIMARY KEY USING INDEX messages_legacy_pkey"
+    )
+    op.execute("ALTER TABLE messages RENAME TO messages_legacy")
+    op.execute("ALTER INDEX IF EXISTS ix_messages_chat_sent RENAME TO messages_legacy_chat_sent_idx")
+    op.execute("ALTER INDEX IF EXISTS ix_messages_chat_msg RENAME TO messages_legacy_chat_msg_idx")
+
+    op.execute(
+        """
+        CREATE TABLE messages (
+            msg_id integer NOT NULL DEFAULT nextval('messages_msg_id_seq'),
+            chat_id integer CONSTRAINT messages_chat_id_fkey REFERENCES chat_rooms (chat_id) ON DELETE CASCADE,
+            sender_id uuid CONSTRAINT messages_sender_id_fkey REFERENCES users (user_id) ON DELETE SET NULL,
+            type varchar(50),
+            content text NOT NULL,
+            sent_at timestamptz NOT NULL DEFAULT now(),
+            CONSTRAINT messages_pkey PRIMARY KEY (msg_id, sent_at)
+        ) PARTITION BY RANGE (sent_at)
+        """
+    )
+    op.execute("ALTER SEQUENCE messages_msg_id_seq OWNED BY messages.msg_id")
+    # Created while the parent is empty; ATTACH adopts the legacy table's equivalent indexes
+    op.execute("CREATE INDEX ix_messages_chat_sent ON messages (chat_id, sent_at, msg_id)")
+    op.execute("CREATE INDEX ix_messages_chat_msg ON messages (chat_id, msg_id)")
+    op.execute(f"ALTER TABLE messages ATTACH PARTITION messages_legacy FOR VALUES FROM (MINVALUE) TO ('{boundary}')")
+    op.execute("ALTER TABLE messages_legacy DROP CONSTRAINT messages_legacy_bounds")
+
+    for offset in range(2, 2 + MONTHS_AHEAD):
+        start, end = month_start(offset), month_start(offset + 1)
+        op.execute(
+            f"CREATE TABLE messages_{start:%Y_%m} PARTITION OF messages "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        )
+    op.execute("CREATE TABLE messages_default PARTITION OF messages DEFAULT")
+
+    op.execute(
+        """
+        CREATE TABLE message_archive (
+            archive_id bigserial PRIMARY KEY,
+            chat_id integer NOT NULL REFERENCES chat_rooms (chat_id) ON DELETE CASCADE,
+            first_sent_at timestamptz NOT NULL,
+            first_msg_id integer NOT NULL,
+            last_sent_at timestamptz NOT NULL,
+            last_msg_id integer NOT NULL,
+            message_count integer NOT NULL,
+            messages jsonb NOT NULL,
+            archived_at timestamptz DEFAULT now()
+        )
+        """
+    )
+    op.execute("CREATE INDEX ix_message_archive_chat_first ON message_archive (chat_id, first_sent_at, first_msg_id)")
+
+
+def downgrade():
+    # Not online: rebuilds one plain table holding hot and archived messages
+    op.execute("CREATE TABLE messages_flat (LIKE messages INCLUDING DEFAULTS)")
+    op.execute("INSERT INTO messages_flat SELECT msg_id, chat_id, sender_id, type, content, sent_at FROM messages")
+    op.execute(
+        """
+        INSERT INTO messages_flat (msg_id, chat_id, sender_id, type, content, sent_at)
+        SELECT m.msg_id, a.chat_id, m.sender_id, m.type, m.content, m.sent_at
+        FROM message_archive a,
+             jsonb_to_recordset(a.messages) AS m(msg_id integer, sender_id uuid, type varchar(50), content text, sent_at timestamptz)
+        """
+    )
+    op.execute("DROP TABLE message_archive")
+    op.execute("ALTER SEQUENCE messages_msg_id_seq OWNED BY NONE")
+    op.execute("DROP TABLE messages")
+    op.execute("ALTER TABLE messages_flat RENAME TO messages")
+    op.execute("ALTER SEQUENCE messages_msg_id_seq OWNED BY messages.msg_id")
+    op.execute("ALTER TABLE messages ALTER COLUMN sent_at DROP NOT NULL")
+    op.execute("ALTER TABLE messages ADD PRIMARY KEY (msg_id)")
+    op.execute("ALTER TABLE messages ADD FOREIGN KEY (chat_id) REFERENCES chat_rooms (chat_id) ON DELETE CASCADE")
+    op.execute("ALTER TABLE messages ADD FOREIGN KEY (sender_id) REFERENCES users (user_id) ON DELETE SET NULL")
+    op.execute("CREATE INDEX ix_messages_chat_sent ON messages (chat_id, sent_at, msg_id)")
+    op.execute("CREATE INDEX ix_messages_chat_msg ON messages (chat_id, msg_id)")
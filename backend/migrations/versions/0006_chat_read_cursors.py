@@ -0,0 +1,35 @@
+"""Per-user read positions in chat rooms, for unread counts
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from migrations.helpers import create_index_concurrently, drop_index_concurrently
+
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "chat_read_cursors",
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.user_id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("chat_id", sa.Integer(), sa.ForeignKey("chat_rooms.chat_id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("last_read_msg_id", sa.Integer(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_chat_read_cursors_chat", "chat_read_cursors", ["chat_id"])
+    # Unread counts list every room of a community
+    create_index_concurrently("ix_chat_rooms_community", "chat_rooms", "community_id")
+
+
+def downgrade():
+    drop_index_concurrently("ix_chat_rooms_community")
+    op.drop_table("chat_read_cursors")
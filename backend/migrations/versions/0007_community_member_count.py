@@ -0,0 +1,48 @@
+"""Denormalized member_count on communities
+
+Counts every membership row, plus the owner when they have none (owners are
+members without joining). Backfilled in committed batches like 0003.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.helpers import context_is_offline
+
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH_SIZE = 5000
+
+BACKFILL_SQL = """
+UPDATE communities c
+SET member_count = (SELECT count(*) FROM memberships m WHERE m.community_id = c.community_id)
+    + CASE WHEN c.created_by IS NOT NULL AND NOT EXISTS (
+        SELECT 1 FROM memberships o WHERE o.community_id = c.community_id AND o.user_id = c.created_by
+    ) THEN 1 ELSE 0 END
+WHERE c.community_id > :after AND c.community_id <= :upto
+"""
+
+
+def upgrade():
+    op.add_column("communities", sa.Column("member_count", sa.Integer(), nullable=False, server_default="0"))
+
+    if context_is_offline():
+        op.execute(BACKFILL_SQL.replace(":after", "0").replace(":upto", "2147483647"))
+        return
+
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        last_id = bind.execute(sa.text("SELECT coalesce(max(community_id), 0) FROM communities")).scalar()
+        for after in range(0, last_id, BACKFILL_BATCH_SIZE):
+            bind.execute(sa.text(BACKFILL_SQL), {"after": after, "upto": after + BACKFILL_BATCH_SIZE})
+
+
+def downgrade():
+    op.drop_column("communities", "member_count")
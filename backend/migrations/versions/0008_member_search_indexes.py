@@ -0,0 +1,31 @@
+"""Indexes for filtered and searched member listings
+
+Prefix search lowercases both sides, so the users indexes are on lower(...)
+with text_pattern_ops, which lets LIKE 'abc%' use them under any collation.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18
+"""
+from migrations.helpers import create_index_concurrently, drop_index_concurrently
+
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Member listing filtered by role, oldest first
+    create_index_concurrently(
+        "ix_memberships_community_role_joined", "memberships", "community_id, role, joined_at, membership_id"
+    )
+    create_index_concurrently("ix_users_username_prefix", "users", "lower(username) text_pattern_ops")
+    create_index_concurrently("ix_users_display_name_prefix", "users", "lower(display_name) text_pattern_ops")
+
+
+def downgrade():
+    drop_index_concurrently("ix_users_display_name_prefix")
+    drop_index_concurrently("ix_users_username_prefix")
+    drop_index_concurrently("ix_memberships_community_role_joined")
@@ -0,0 +1,34 @@
+"""Progress of background community deletions
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "community_deletions",
+        sa.Column("community_id", sa.Integer(), primary_key=True),
+        sa.Column("requested_by", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("phase", sa.String(50), nullable=True),
+        sa.Column("deleted_rows", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("started_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+    )
+
+
+def downgrade():
+    op.drop_table("community_deletions")
@@ -0,0 +1,75 @@
+"""Materialized home timelines
+
+Communities above FANOUT_MAX_MEMBERS (the default of
+TIMELINE_FANOUT_MAX_MEMBERS) start out read-time. Timelines are seeded with
+the last RETENTION_DAYS of posts of every other community, in committed
+batches of posts like 0003.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from migrations.helpers import context_is_offline, create_index_concurrently, drop_index_concurrently
+
+
+revision = "0010"
+down_revision = "0009"
+branch_labels = None
+depends_on = None
+
+FANOUT_MAX_MEMBERS = 1000
+RETENTION_DAYS = 30
+BACKFILL_BATCH_SIZE = 1000
+
+BACKFILL_SQL = f"""
+INSERT INTO timeline_entries (user_id, created_at, post_id)
+SELECT m.user_id, p.created_at, p.post_id
+FROM posts p
+JOIN communities c ON c.community_id = p.community_id AND NOT c.fanout_on_read
+JOIN memberships m ON m.community_id = p.community_id
+WHERE p.post_id > :after AND p.post_id <= :upto
+  AND p.created_at >= now() - interval '{RETENTION_DAYS} days' AND m.user_id IS NOT NULL
+UNION
+SELECT c.created_by, p.created_at, p.post_id
+FROM posts p
+JOIN communities c ON c.community_id = p.community_id AND NOT c.fanout_on_read
+WHERE p.post_id > :after AND p.post_id <= :upto
+  AND p.created_at >= now() - interval '{RETENTION_DAYS} days' AND c.created_by IS NOT NULL
+ON CONFLICT DO NOTHING
+"""
+
+
+def upgrade():
+    op.add_column("communities", sa.Column("fanout_on_read", sa.Boolean(), nullable=False, server_default="false"))
+    op.execute(f"UPDATE communities SET fanout_on_read = true WHERE member_count > {FANOUT_MAX_MEMBERS}")
+    op.create_table(
+        "timeline_entries",
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.user_id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), primary_key=True),
+        sa.Column("post_id", sa.Integer(), sa.ForeignKey("posts.post_id", ondelete="CASCADE"), primary_key=True),
+    )
+    op.create_index("ix_timeline_entries_post", "timeline_entries", ["post_id"])
+    create_index_concurrently("ix_communities_fanout_on_read", "communities", "community_id", where="fanout_on_read")
+
+    if context_is_offline():
+        op.execute(BACKFILL_SQL.replace(":after", "0").replace(":upto", "2147483647"))
+        return
+
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        first_id, last_id = bind.execute(sa.text(
+            f"SELECT coalesce(min(post_id), 0), coalesce(max(post_id), 0) FROM posts "
+            f"WHERE created_at >= now() - interval '{RETENTION_DAYS} days'"
+        )).one()
+        for after in range(max(first_id - 1, 0), last_id, BACKFILL_BATCH_SIZE):
+            bind.execute(sa.text(BACKFILL_SQL), {"after": after, "upto": after + BACKFILL_BATCH_SIZE})
+
+
+def downgrade():
+    drop_index_concurrently("ix_communities_fanout_on_read")
+    op.drop_table("timeline_entries")
+    op.drop_column("communities", "fanout_on_read")
@@ -0,0 +1,72 @@
+"""Full-text search vectors on posts and comments
+
+search_vector is filled by a BEFORE INSERT OR UPDATE OF content trigger
+using the built-in tsvector_update_trigger, so every writer (the API,
+scripts, manual SQL) keeps it current at the cost of one to_tsvector per
+row. The trigger is created before the backfill, which then only has to
+cover rows that existed already: it runs in committed batches like 0003
+and does not touch content, so it does not fire the trigger. The GIN
+indexes keep fastupdate (the default), so inserts append to a pending list
+instead of updating the index tree on every write.
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from migrations.helpers import context_is_offline, create_index_concurrently, drop_index_concurrently
+
+
+revision = "0011"
+down_revision = "0010"
+branch_labels = None
+depends_on = None
+
+# Must match SEARCH_CONFIG in services/search/search_service.py
+SEARCH_CONFIG = "pg_catalog.english"
+BACKFILL_BATCH_SIZE = 5000
+
+# table -> primary key
+SEARCHABLE = {"posts": "post_id", "comments": "comment_id"}
+
+BACKFILL_SQL = """
+UPDATE {table} SET search_vector = to_tsvector('{config}', content)
+WHERE {key} > :after AND {key} <= :upto AND search_vector IS NULL
+"""
+
+
+def upgrade():
+    for table, key in SEARCHABLE.items():
+        op.add_column(table, sa.Column("search_vector", postgresql.TSVECTOR(), nullable=True))
+        op.execute(
+            f"CREATE TRIGGER {table}_search_vector_update BEFORE INSERT OR UPDATE OF content ON {table} "
+            f"FOR EACH ROW EXECUTE FUNCTION tsvector_update_trigger(search_vector, '{SEARCH_CONFIG}', content)"
+        )
+
+    for table, key in SEARCHABLE.items():
+        backfill_sql = BACKFILL_SQL.format(table=table, key=key, config=SEARCH_CONFIG)
+        if context_is_offline():
+            op.execute(backfill_sql.replace(":after", "0").replace(":upto", "2147483647"))
+            continue
+        with op.get_context().autocommit_block():
+            bind = op.get_bind()
+            last_id = bind.execute(sa.text(f"SELECT coalesce(max({key}), 0) FROM {table}")).scalar()
+            for after in range(0, last_id, BACKFILL_BATCH_SIZE):
+                bind.execute(sa.text(backfill_sql), {"after": after, "upto": after + BACKFILL_BATCH_SIZE})
+
+    create_index_concurrently("ix_posts_search", "posts", "search_vector", using="gin")
+    create_index_concurrently("ix_comments_search", "comments", "search_vector", using="gin")
+    # Search is scoped to the caller's communities, owned ones included
+    create_index_concurrently("ix_communities_created_by", "communities", "created_by")
+
+
+def downgrade():
+    drop_index_concurrently("ix_communities_created_by")
+    drop_index_concurrently("ix_comments_search")
+    drop_index_concurrently("ix_posts_search")
+    for table in SEARCHABLE:
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_search_vector_update ON {table}")
+        op.drop_column(table, "search_vector")
@@ -0,0 +1,84 @@
+"""Stored "hot" ranking score on posts
+
+    hot_score = log10(max(likes + 2 * comments, 1)) + (created_at - 2024-01-01) / 45000s
+
+The age term grows with creation time instead of shrinking with age, which
+orders posts exactly like decaying every score by the same amount: a post
+needs ten times the engagement to outrank one 12.5 hours newer. A score
+therefore only changes when its post's counters do, and never needs to be
+re-decayed by a periodic job.
+
+A BEFORE INSERT OR UPDATE OF like_count, comment_count trigger recomputes
+it, so it moves in the same statement as the counters, whichever writer
+changes them (the like and comment services, recount_post_counters, manual
+SQL). Existing rows are backfilled in committed batches like 0003.
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.helpers import context_is_offline, create_index_concurrently, drop_index_concurrently
+
+
+revision = "0012"
+down_revision = "0011"
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH_SIZE = 5000
+
+# extract(epoch) of a timestamptz does not depend on the session time zone,
+# so the function can be IMMUTABLE
+HOT_SCORE_FUNCTION_SQL = """
+CREATE FUNCTION post_hot_score(likes integer, comments integer, created_at timestamptz)
+RETURNS double precision LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+    SELECT log(greatest(likes + 2 * comments, 1)::double precision)
+        + (extract(epoch FROM created_at)::double precision - 1704067200) / 45000
+$$
+"""
+
+TRIGGER_FUNCTION_SQL = """
+CREATE FUNCTION posts_hot_score_trigger() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.hot_score := post_hot_score(NEW.like_count, NEW.comment_count, coalesce(NEW.created_at, now()));
+    RETURN NEW;
+END
+$$
+"""
+
+BACKFILL_SQL = """
+UPDATE posts SET hot_score = post_hot_score(like_count, comment_count, coalesce(created_at, now()))
+WHERE post_id > :after AND post_id <= :upto
+"""
+
+
+def upgrade():
+    op.add_column("posts", sa.Column("hot_score", sa.Float(), nullable=False, server_default="0"))
+    op.execute(HOT_SCORE_FUNCTION_SQL)
+    op.execute(TRIGGER_FUNCTION_SQL)
+    op.execute(
+        "CREATE TRIGGER posts_hot_score_update BEFORE INSERT OR UPDATE OF like_count, comment_count, created_at "
+        "ON posts FOR EACH ROW EXECUTE FUNCTION posts_hot_score_trigger()"
+    )
+
+    if context_is_offline():
+        op.execute(BACKFILL_SQL.replace(":after", "0").replace(":upto", "2147483647"))
+    else:
+        with op.get_context().autocommit_block():
+            bind = op.get_bind()
+            last_id = bind.execute(sa.text("SELECT coalesce(max(post_id), 0) FROM posts")).scalar()
+            for after in range(0, last_id, BACKFILL_BATCH_SIZE):
+                bind.execute(sa.text(BACKFILL_SQL), {"after": after, "upto": after + BACKFILL_BATCH_SIZE})
+
+    create_index_concurrently("ix_posts_community_hot", "posts", "community_id, hot_score, post_id")
+
+
+def downgrade():
+    drop_index_concurrently("ix_posts_community_hot")
+    op.execute("DROP TRIGGER IF EXISTS posts_hot_score_update ON posts")
+    op.execute("DROP FUNCTION IF EXISTS posts_hot_score_trigger()")
+    op.execute("DROP FUNCTION IF EXISTS post_hot_score(integer, integer, timestamptz)")
+    op.drop_column("posts", "hot_score")
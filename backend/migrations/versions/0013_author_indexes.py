@@ -0,0 +1,27 @@
+"""Indexes on post and comment authors
+
+A display name change invalidates the cached feeds of the communities its
+author wrote in; these let that lookup (and ON DELETE CASCADE from users)
+read only the author's rows, index-only for posts.
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-18
+"""
+from migrations.helpers import create_index_concurrently, drop_index_concurrently
+
+
+revision = "0013"
+down_revision = "0012"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    create_index_concurrently("ix_posts_author_community", "posts", "author_id, community_id")
+    create_index_concurrently("ix_comments_author_post", "comments", "author_id, post_id")
+
+
+def downgrade():
+    drop_index_concurrently("ix_comments_author_post")
+    drop_index_concurrently("ix_posts_author_community")
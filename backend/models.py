@@ -1,7 +1,7 @@
-from sqlalchemy import Column, String, Text, DateTime, Integer, ForeignKey
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import BigInteger, Boolean, Column, String, Text, DateTime, Float, Integer, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR, UUID
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
 from config.db import Base
 import uuid
 
@@ -19,11 +19,19 @@ class User(Base):
     display_name = Column(String, nullable=True)
 
     communities_created = relationship("Community", back_populates="creator")
-    memberships = relationship("Membership", back_populates="user")
-    posts = relationship("Post", back_populates="author")
-    comments = relationship("Comment", back_populates="author")
-    likes = relationship("Like", back_populates="user")
-    messages = relationship("Message", back_populates="sender")
+    memberships = relationship("Membership", back_populates="user", passive_deletes=True)
+    posts = relationship("Post", back_populates="author", passive_deletes=True)
+    comments = relationship("Comment", back_populates="author", passive_deletes=True)
+    likes = relationship("Like", back_populates="user", passive_deletes=True)
+    messages = relationship("Message", back_populates="sender", passive_deletes=True)
+
+    __table_args__ = (
+        # Prefix search in member listings: lower(...) LIKE 'abc%'
+        Index("ix_users_username_prefix", func.lower(username).label("username_lower"),
+              postgresql_ops={"username_lower": "text_pattern_ops"}),
+        Index("ix_users_display_name_prefix", func.lower(display_name).label("display_name_lower"),
+              postgresql_ops={"display_name_lower": "text_pattern_ops"}),
+    )
 
 
 class Community(Base):
@@ -34,11 +42,24 @@ class Community(Base):
     description = Column(Text, nullable=True)
     created_by = Column(UUID(as_uuid=True), ForeignKey("users.user_id"), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Memberships plus the owner when they have no membership row; kept by join/leave
+    member_count = Column(Integer, nullable=False, default=0, server_default="0")
+    # Set once the community outgrows timeline fan-out; its posts are then merged
+    # into home timelines at read time. Never unset, so no post falls between the two.
+    fanout_on_read = Column(Boolean, nullable=False, default=False, server_default="false")
 
     creator = relationship("User", back_populates="communities_created")
-    memberships = relationship("Membership", back_populates="community")
-    posts = relationship("Post", back_populates="community")
-    chat_rooms = relationship("ChatRoom", back_populates="community")
+    # The foreign keys cascade in the database; passive_deletes stops the ORM from
+    # loading every child row just to delete it when a community or post is deleted
+    memberships = relationship("Membership", back_populates="community", passive_deletes=True)
+    posts = relationship("Post", back_populates="community", passive_deletes=True)
+    chat_rooms = relationship("ChatRoom", back_populates="community", passive_deletes=True)
+
+    __table_args__ = (
+        # The few read-time communities, looked up for every home timeline
+        Index("ix_communities_fanout_on_read", community_id, postgresql_where=fanout_on_read),
+        Index("ix_communities_created_by", created_by),
+    )
 
 
 class Membership(Base):
@@ -53,6 +74,12 @@ class Membership(Base):
     user = relationship("User", back_populates="memberships")
     community = relationship("Community", back_populates="memberships")
 
+    __table_args__ = (
+        Index("uq_memberships_user_community", user_id, community_id, unique=True),
+        Index("ix_memberships_community_joined", community_id, joined_at, membership_id),
+        Index("ix_memberships_community_role_joined", community_id, role, joined_at, membership_id),
+    )
+
 
 class Post(Base):
     __tablename__ = "posts"
@@ -65,11 +92,25 @@ class Post(Base):
     media_type = Column(String(50), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=True)
+    # Maintained in the same transaction as the like/comment write; see scripts/recount_post_counters.py
+    like_count = Column(Integer, nullable=False, default=0, server_default="0")
+    comment_count = Column(Integer, nullable=False, default=0, server_default="0")
+    # Time-boosted engagement, recomputed from the counters by a database trigger (migration 0012)
+    hot_score = Column(Float, nullable=False, server_default="0")
+    # Set from content by a database trigger (migration 0011); deferred so it is never loaded with the post
+    search_vector = deferred(Column(TSVECTOR, nullable=True))
 
     community = relationship("Community", back_populates="posts")
     author = relationship("User", back_populates="posts")
-    comments = relationship("Comment", back_populates="post")
-    likes = relationship("Like", back_populates="post")
+    comments = relationship("Comment", back_populates="post", passive_deletes=True)
+    likes = relationship("Like", back_populates="post", passive_deletes=True)
+
+    __table_args__ = (
+        Index("ix_posts_community_created", community_id, created_at, post_id),
+        Index("ix_posts_community_hot", community_id, hot_score, post_id),
+        Index("ix_posts_search", search_vector, postgresql_using="gin"),
+        Index("ix_posts_author_community", author_id, community_id),
+    )
 
 
 class Comment(Base):
@@ -80,10 +121,18 @@ class Comment(Base):
     author_id = Column(UUID(as_uuid=True), ForeignKey("users.user_id", ondelete="CASCADE"), nullable=True)
     content = Column(Text, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Set from content by a database trigger (migration 0011)
+    search_vector = deferred(Column(TSVECTOR, nullable=True))
 
     post = relationship("Post", back_populates="comments")
     author = relationship("User", back_populates="comments")
 
+    __table_args__ = (
+        Index("ix_comments_post_created", post_id, created_at, comment_id),
+        Index("ix_comments_search", search_vector, postgresql_using="gin"),
+        Index("ix_comments_author_post", author_id, post_id),
+    )
+
 
 class Like(Base):
     __tablename__ = "likes"
@@ -96,6 +145,10 @@ class Like(Base):
     post = relationship("Post", back_populates="likes")
     user = relationship("User", back_populates="likes")
 
+    __table_args__ = (
+        Index("uq_likes_post_user", post_id, user_id, unique=True),
+    )
+
 
 class ChatRoom(Base):
     __tablename__ = "chat_rooms"
@@ -106,18 +159,108 @@ class ChatRoom(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     community = relationship("Community", back_populates="chat_rooms")
-    messages = relationship("Message", back_populates="chat_room")
+    messages = relationship("Message", back_populates="chat_room", passive_deletes=True)
+
+    __table_args__ = (
+        Index("ix_chat_rooms_community", community_id),
+    )
 
 
 class Message(Base):
     __tablename__ = "messages"
 
-    msg_id = Column(Integer, primary_key=True, index=True)
+    # Partitioned by month of sent_at, which therefore has to be part of the primary key
+    msg_id = Column(Integer, primary_key=True, autoincrement=True)
     chat_id = Column(Integer, ForeignKey("chat_rooms.chat_id", ondelete="CASCADE"), nullable=True)
     sender_id = Column(UUID(as_uuid=True), ForeignKey("users.user_id", ondelete="SET NULL"), nullable=True)
     type = Column(String(50), nullable=True)
     content = Column(Text, nullable=False)
-    sent_at = Column(DateTime(timezone=True), server_default=func.now())
+    sent_at = Column(DateTime(timezone=True), primary_key=True, server_default=func.now())
 
     chat_room = relationship("ChatRoom", back_populates="messages")
     sender = relationship("User", back_populates="messages")
+
+    __table_args__ = (
+        Index("ix_messages_chat_sent", chat_id, sent_at, msg_id),
+        Index("ix_messages_chat_msg", chat_id, msg_id),
+        {"postgresql_partition_by": "RANGE (sent_at)"},
+    )
+    # Fetch sent_at with INSERT ... RETURNING instead of a refresh after commit
+    __mapper_args__ = {"eager_defaults": True}
+
+
+class MessageArchive(Base):
+    """Messages from partitions past the retention window, compacted into
+    one row per run of up to a few hundred consecutive messages of a room."""
+    __tablename__ = "message_archive"
+
+    archive_id = Column(BigInteger, primary_key=True)
+    chat_id = Column(Integer, ForeignKey("chat_rooms.chat_id", ondelete="CASCADE"), nullable=False)
+    first_sent_at = Column(DateTime(timezone=True), nullable=False)
+    first_msg_id = Column(Integer, nullable=False)
+    last_sent_at = Column(DateTime(timezone=True), nullable=False)
+    last_msg_id = Column(Integer, nullable=False)
+    message_count = Column(Integer, nullable=False)
+    # [{msg_id, sender_id, type, content, sent_at}, ...] oldest first; large values are TOAST-compressed
+    messages = Column(JSONB, nullable=False)
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        # Chunks of a room never overlap, so this also orders them newest-first
+        Index("ix_message_archive_chat_first", chat_id, first_sent_at, first_msg_id),
+    )
+
+
+class ChatReadCursor(Base):
+    __tablename__ = "chat_read_cursors"
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.user_id", ondelete="CASCADE"), primary_key=True)
+    chat_id = Column(Integer, ForeignKey("chat_rooms.chat_id", ondelete="CASCADE"), primary_key=True)
+    # Highest msg_id the user has seen in the room; only ever moves forward
+    last_read_msg_id = Column(Integer, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        # The primary key leads with user_id; this serves the cascade when a room is deleted
+        Index("ix_chat_read_cursors_chat", chat_id),
+    )
+
+
+class CommunityDeletion(Base):
+    """Progress of a community being deleted in batches in the background.
+
+    Outlives the community (no foreign key), so clients can see it finish.
+    """
+    __tablename__ = "community_deletions"
+
+    community_id = Column(Integer, primary_key=True)
+    requested_by = Column(UUID(as_uuid=True), nullable=True)
+    # running, done or failed
+    status = Column(String(20), nullable=False, default="running")
+    # Table currently being emptied
+    phase = Column(String(50), nullable=True)
+    deleted_rows = Column(BigInteger, nullable=False, default=0, server_default="0")
+    error = Column(Text, nullable=True)
+    started_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class TimelineEntry(Base):
+    """A post in a member's home timeline, written when the post is created.
+
+    Only posts of communities below the fan-out limit are copied here; the
+    rest are merged in when the timeline is read. Trimmed by
+    scripts/trim_timelines.py.
+    """
+    __tablename__ = "timeline_entries"
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.user_id", ondelete="CASCADE"), primary_key=True)
+    # The post's created_at; the key orders each user's timeline newest-first
+    created_at = Column(DateTime(timezone=True), primary_key=True)
+    post_id = Column(Integer, ForeignKey("posts.post_id", ondelete="CASCADE"), primary_key=True)
+
+    __table_args__ = (
+        # Serves the cascade when a post is deleted
+        Index("ix_timeline_entries_post", post_id),
+    )
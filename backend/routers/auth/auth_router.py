@@ -1,6 +1,8 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
 from schemas.auth.auth_schema import UserSignup, UserLogin
 from services.auth.auth_service import AuthService
+from dependencies import optional_security
 import logging
 
 logger = logging.getLogger(__name__)
@@ -45,10 +47,10 @@ def login(user: UserLogin):
         raise HTTPException(status_code=400, detail=f"Login error: {str(e)}")
 
 @router.post("/logout")
-def logout():
+def logout(credentials: HTTPAuthorizationCredentials = Depends(optional_security)):
     try:
         logger.info("Logout request received")
-        AuthService.logout()
+        AuthService.logout(credentials.credentials if credentials else None)
         return {"message": "Logout successful"}
     except Exception as e:
         logger.error(f"Logout exception: {str(e)}")
@@ -1,64 +1,188 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, WebSocket, WebSocketDisconnect, status
+from starlette.concurrency import run_in_threadpool
+from typing import List, Optional
+import anyio
+import asyncio
+import os
 
-from config.db import get_db
+from config.auth import is_revoked, seconds_until_expiry
+from config.db import DbSession, db_session, get_db, get_read_db, read_db_session, skip_primary_pin
 from schemas.chat.chat_schema import (
     ChatRoomCreate,
     ChatRoomResponse,
+    ChatUnreadResponse,
+    MarkReadRequest,
     MessageCreate,
     MessageResponse,
-    MessageListResponse
+    MessageListResponse,
+    PresenceHeartbeat,
+    PresenceResponse,
+    ReadCursorResponse,
+    RoomOnlineResponse
 )
-from services.chat.chat_service import ChatService
-from dependencies import get_current_user
+from services.chat.chat_service import AsyncChatService
+from services.chat.chat_hub import chat_hub
+from services.chat.message_writer import CHAT_BATCH_WRITES, message_writer
+from services.chat.read_cursors import read_cursors
+from services.chat.presence import chat_key, community_key, presence
+from dependencies import authenticate_token, get_current_user
 import logging
 
 logger = logging.getLogger(__name__)
 
+# A socket that cannot take a frame within this many seconds is dropped
+CHAT_SOCKET_SEND_TIMEOUT = float(os.environ.get("CHAT_SOCKET_SEND_TIMEOUT", "5"))
+# How often an open socket re-checks that its user may still read the room
+CHAT_SOCKET_RECHECK_SECONDS = float(os.environ.get("CHAT_SOCKET_RECHECK_SECONDS", "60"))
+# Upper bound for ?wait= on long-polled message reads; keep below proxy idle timeouts
+CHAT_LONG_POLL_MAX_SECONDS = float(os.environ.get("CHAT_LONG_POLL_MAX_SECONDS", "30"))
+
 router = APIRouter(
     prefix="/chat",
     tags=["chat"]
 )
 
 @router.post("/rooms", response_model=ChatRoomResponse)
-def create_chat_room(
+async def create_chat_room(
     chat_room: ChatRoomCreate,
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_db),
     user = Depends(get_current_user)
 ):
     """Create a new chat room in a community"""
     try:
-        return ChatService.create_chat_room(db, chat_room, user.id)
+        return await AsyncChatService.create_chat_room(db, chat_room, user.id)
     except Exception as e:
         logger.error(f"Create chat room failed for user {user.id}: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/rooms/community/{community_id}", response_model=List[ChatRoomResponse])
-def get_community_chat_rooms(
+async def get_community_chat_rooms(
     community_id: int,
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_read_db),
     user = Depends(get_current_user)
 ):
     """Get all chat rooms for a community"""
     try:
-        return ChatService.get_community_chat_rooms(db, community_id, user.id)
+        return await AsyncChatService.get_community_chat_rooms(db, community_id, user.id)
     except Exception as e:
         logger.error(f"Get community chat rooms failed for community {community_id}: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
 
+@router.get("/rooms/community/{community_id}/unread", response_model=List[ChatUnreadResponse])
+async def get_unread_counts(
+    community_id: int,
+    db: DbSession = Depends(get_read_db),
+    user = Depends(get_current_user)
+):
+    """Unread message count of every room in a community, for badges without polling each room"""
+    try:
+        pending = read_cursors.pending_for(user.id)
+        return await AsyncChatService.get_unread_counts(db, community_id, user.id, pending)
+    except Exception as e:
+        logger.error(f"Get unread counts failed for community {community_id}: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/rooms/{chat_id}/read", response_model=ReadCursorResponse)
+async def mark_read(
+    chat_id: int,
+    position: MarkReadRequest,
+    db: DbSession = Depends(get_db),
+    user = Depends(get_current_user)
+):
+    """Mark a room read up to a message. Cheap to call often: positions are
+    buffered and written in batches every CHAT_READ_FLUSH_SECONDS."""
+    try:
+        await AsyncChatService.authorize_read(db, chat_id, user.id)
+        read_cursors.mark(user.id, chat_id, position.last_read_msg_id)
+        return {"chat_id": chat_id, "last_read_msg_id": position.last_read_msg_id}
+    except Exception as e:
+        logger.error(f"Mark read failed for chat {chat_id}: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+
+def presence_counts(chat_ids, community_ids):
+    return {
+        "chats": {chat_id: presence.count(chat_key(chat_id)) for chat_id in chat_ids},
+        "communities": {community_id: presence.count(community_key(community_id)) for community_id in community_ids}
+    }
+
+@router.post("/presence/heartbeat", response_model=PresenceResponse)
+async def presence_heartbeat(
+    request: Request,
+    beat: PresenceHeartbeat,
+    db: DbSession = Depends(get_read_db),
+    user = Depends(get_current_user)
+):
+    """Mark the caller online in several rooms (and their communities) at once.
+
+    Clients without an open socket to a room send this about every
+    CHAT_PRESENCE_TTL_SECONDS / 2. Returns the online counts of those rooms.
+    """
+    try:
+        # Presence lives in memory; there is nothing to read back from the primary
+        skip_primary_pin(request)
+        chats = await AsyncChatService.readable_chats(db, beat.chat_ids, user.id)
+        for chat_id, community_id in chats.items():
+            presence.touch(chat_key(chat_id), user.id)
+            presence.touch(community_key(community_id), user.id)
+        return presence_counts(chats, set(chats.values()))
+    except Exception as e:
+        logger.error(f"Presence heartbeat failed for user {user.id}: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/presence", response_model=PresenceResponse)
+async def get_presence(
+    chat_ids: List[int] = Query([], max_length=100),
+    community_ids: List[int] = Query([], max_length=100),
+    db: DbSession = Depends(get_read_db),
+    user = Depends(get_current_user)
+):
+    """Online counts for many rooms and communities: `/chat/presence?chat_ids=1&chat_ids=2&community_ids=3`"""
+    try:
+        chats = await AsyncChatService.readable_chats(db, chat_ids, user.id)
+        communities = await AsyncChatService.readable_communities(db, community_ids, user.id)
+        return presence_counts(chats, communities)
+    except Exception as e:
+        logger.error(f"Get presence failed for user {user.id}: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/rooms/{chat_id}/online", response_model=RoomOnlineResponse)
+async def get_online_users(
+    chat_id: int,
+    limit: int = Query(50, ge=1, le=200),
+    db: DbSession = Depends(get_read_db),
+    user = Depends(get_current_user)
+):
+    """Users online in a room, most recently active first"""
+    try:
+        await AsyncChatService.authorize_read(db, chat_id, user.id)
+        return {
+            "chat_id": chat_id,
+            "online_count": presence.count(chat_key(chat_id)),
+            "user_ids": presence.online(chat_key(chat_id), limit)
+        }
+    except Exception as e:
+        logger.error(f"Get online users failed for chat {chat_id}: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.post("/messages", response_model=MessageResponse)
-def send_message(
+async def send_message(
     message: MessageCreate,
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_db),
     user = Depends(get_current_user)
 ):
     """Send a message to a chat room"""
     try:
-        db_message = ChatService.send_message(db, message, user.id)
+        display_name = user.user_metadata.get('display_name') or user.email
+        if CHAT_BATCH_WRITES:
+            # Group commit: the writer shares one INSERT and COMMIT among concurrent senders
+            await AsyncChatService.authorize_message(db, message.chat_id, user.id)
+            row = await message_writer.submit(message.chat_id, user.id, message.content, message.type or 'text')
+            return {**row, "sender_display_name": display_name, "is_sender": True}
+        
+        db_message = await AsyncChatService.send_message(db, message, user.id)
         
         # Add sender information for response
-        db_message.sender_display_name = user.user_metadata.get('display_name') or user.email
+        db_message.sender_display_name = display_name
         db_message.is_sender = True
         
         return db_message
@@ -66,19 +190,178 @@ def send_message(
         logger.error(f"Send message failed for user {user.id}: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
 
-@router.get("/messages/{chat_id}")
-def get_chat_messages(
+@router.get("/messages/{chat_id}", response_model=MessageListResponse)
+async def get_chat_messages(
+    request: Request,
     chat_id: int,
     skip: int = 0,
-    limit: int = 50,
-    db: Session = Depends(get_db),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    after_msg_id: Optional[int] = None,
+    wait: float = Query(0, ge=0, le=CHAT_LONG_POLL_MAX_SECONDS),
     user = Depends(get_current_user)
 ):
-    """Get messages from a chat room with pagination"""
+    """Get the latest messages of a chat room; pass `next_cursor` as `cursor` for older ones.
+
+    With `after_msg_id` only newer messages are returned, oldest first, plus
+    any sent in the last CHAT_SINCE_OVERLAP_SECONDS with a lower id (a late
+    commit); clients de-duplicate by msg_id. Adding
+    `wait` (seconds) turns that into a long-poll: when nothing is new yet the
+    request is held, without a database connection, until a message arrives
+    or the wait runs out.
+    """
     try:
-        result = ChatService.get_chat_messages(db, chat_id, user.id, skip, limit)
+        if after_msg_id is not None and wait > 0:
+            result = await long_poll_messages(chat_id, str(user.id), after_msg_id, limit, wait)
+        else:
+            async with read_db_session(request) as db:
+                result = await AsyncChatService.get_chat_messages(db, chat_id, user.id, skip, limit, cursor, after_msg_id)
         result['chat_id'] = chat_id
         return result
     except Exception as e:
         logger.error(f"Get chat messages failed for chat {chat_id}: {str(e)}")
-        raise HTTPException(status_code=400, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=400, detail=str(e))
+
+async def long_poll_messages(chat_id: int, user_id: str, after_msg_id: int, limit: int, wait: float):
+    # Subscribe before querying so a message committed in between is not missed
+    subscription = chat_hub.subscribe(chat_id, user_id)
+    try:
+        # Primary, not replica: the hub may announce messages a replica has not replayed yet
+        async with db_session() as db:
+            result = await AsyncChatService.get_chat_messages(db, chat_id, user_id, limit=limit, after_msg_id=after_msg_id)
+            community_id = await AsyncChatService.get_room_community(db, chat_id)
+        # A client that keeps long-polling is online; this is its heartbeat
+        presence.touch(chat_key(chat_id), user_id)
+        presence.touch(community_key(community_id), user_id)
+        # Re-sent overlap alone is no reason to answer; only ids past after_msg_id are
+        if any(message.msg_id > after_msg_id for message in result["messages"]):
+            return result
+
+        try:
+            events = [await subscription.next(wait)]
+        except asyncio.TimeoutError:
+            return result
+        while not subscription.queue.empty():
+            events.append(subscription.queue.get_nowait())
+
+        if None in events:
+            # Cut off as a slow subscriber; read what we missed instead
+            async with db_session() as db:
+                return await AsyncChatService.get_chat_messages(db, chat_id, user_id, limit=limit, after_msg_id=after_msg_id)
+
+        # The pushed events committed after we subscribed, whatever their ids, so
+        # together with the overlap already read they answer without another query
+        known = {message.msg_id for message in result["messages"]}
+        pushed = [
+            {**event["message"], "is_sender": event["message"]["sender_id"] == user_id}
+            for event in events
+            if event["message"]["msg_id"] not in known
+        ]
+        return {
+            "messages": result["messages"] + pushed[:limit],
+            "has_more": len(pushed) > limit,
+            "next_cursor": None
+        }
+    finally:
+        chat_hub.unsubscribe(subscription)
+
+def socket_credentials(websocket: WebSocket):
+    """(token, subprotocol to echo) from an Authorization header, or from the
+    subprotocol pair browsers can send: new WebSocket(url, ["bearer", token])."""
+    authorization = websocket.headers.get("authorization", "")
+    if authorization.lower().startswith("bearer "):
+        return authorization[len("bearer "):], None
+    protocols = [p.strip() for p in websocket.headers.get("sec-websocket-protocol", "").split(",")]
+    if len(protocols) == 2 and protocols[0] == "bearer":
+        return protocols[1], "bearer"
+    return None, None
+
+async def can_read_chat(chat_id: int, user_id):
+    try:
+        async with db_session() as db:
+            await AsyncChatService.get_chat_room(db, chat_id, user_id)
+        return True
+    except Exception:
+        return False
+
+async def push_chat_events(websocket: WebSocket, subscription, token: str, user_id: str):
+    loop = asyncio.get_running_loop()
+    lifetime = seconds_until_expiry(token)
+    expires_at = loop.time() + lifetime if lifetime > 0 else float("inf")
+    next_check = loop.time() + CHAT_SOCKET_RECHECK_SECONDS
+
+    while True:
+        try:
+            event = await subscription.next(max(0, min(next_check, expires_at) - loop.time()))
+        except asyncio.TimeoutError:
+            if loop.time() >= expires_at or is_revoked(token):
+                await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Token expired")
+                return
+            if not await can_read_chat(subscription.chat_id, user_id):
+                await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Access to this chat was revoked")
+                return
+            next_check = loop.time() + CHAT_SOCKET_RECHECK_SECONDS
+            continue
+
+        if event is None:
+            # Cut off by the hub; the client reconnects and refetches what it missed
+            await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER, reason="Subscriber too slow")
+            return
+
+        message = event["message"]
+        frame = {**event, "message": {**message, "is_sender": message["sender_id"] == user_id}}
+        try:
+            await asyncio.wait_for(websocket.send_json(frame), CHAT_SOCKET_SEND_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.warning(f"Dropping chat socket of user {user_id}: send timed out")
+            return
+
+async def drain_client(websocket: WebSocket):
+    # Nothing is expected from the client; reading only notices when it goes away
+    while True:
+        await websocket.receive_text()
+
+@router.websocket("/ws/{chat_id}")
+async def chat_socket(websocket: WebSocket, chat_id: int):
+    """Push new messages of a chat room as {"type": "message", "message": {...}}.
+
+    The token and room access are checked once during the handshake. Messages
+    are still sent with POST /chat/messages.
+    """
+    token, subprotocol = socket_credentials(websocket)
+    try:
+        if not token:
+            raise Exception("Missing bearer token")
+        user = await run_in_threadpool(authenticate_token, token)
+        async with db_session() as db:
+            chat_room = await AsyncChatService.get_chat_room(db, chat_id, user.id)
+        subscription = chat_hub.subscribe(chat_id, user.id)
+    except Exception as e:
+        reason = e.detail if isinstance(e, HTTPException) else str(e)
+        logger.error(f"Chat socket rejected for chat {chat_id}: {reason}")
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=reason)
+        return
+
+    # An open socket keeps the user online in the room and its community
+    rooms = (chat_key(chat_id), community_key(chat_room.community_id))
+    for key in rooms:
+        presence.connect(key, user.id)
+    try:
+        await websocket.accept(subprotocol=subprotocol)
+        # Whichever side finishes first (client gone, or we closed) ends the other
+        async with anyio.create_task_group() as task_group:
+            async def run_until_done(func, *args):
+                try:
+                    await func(*args)
+                except (WebSocketDisconnect, RuntimeError):
+                    # RuntimeError: sending on a socket the client already closed
+                    pass
+                finally:
+                    task_group.cancel_scope.cancel()
+
+            task_group.start_soon(run_until_done, push_chat_events, websocket, subscription, token, str(user.id))
+            task_group.start_soon(run_until_done, drain_client, websocket)
+    finally:
+        chat_hub.unsubscribe(subscription)
+        for key in rooms:
+            presence.disconnect(key, user.id)
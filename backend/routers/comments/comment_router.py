@@ -1,13 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from typing import Optional
 
-from config.db import get_db
+from config.db import DbSession, get_db, read_db_session
+from config.response_cache import community_scope, response_cache
+from config.single_flight import SingleFlightTimeout
 from schemas.comments.comment_schema import (
     CommentCreate,
     CommentResponse,
     CommentListResponse
 )
-from services.comments.comment_service import CommentService
+from services.authorization.authorization_service import AsyncAuthorizationService
+from services.comments.comment_service import AsyncCommentService
 from dependencies import get_current_user
 import logging
 
@@ -19,13 +22,13 @@ router = APIRouter(
 )
 
 @router.post("/", response_model=CommentResponse)
-def create_comment(
+async def create_comment(
     comment: CommentCreate,
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_db),
     user = Depends(get_current_user)
 ):
     try:
-        db_comment = CommentService.create_comment(db, comment, user.id)
+        db_comment = await AsyncCommentService.create_comment(db, comment, user.id)
         
         # Add author information for response
         db_comment.author_display_name = user.user_metadata.get('display_name') or user.email
@@ -37,26 +40,50 @@ def create_comment(
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/post/{post_id}", response_model=CommentListResponse)
-def get_post_comments(
+async def get_post_comments(
+    request: Request,
     post_id: int,
-    db: Session = Depends(get_db),
+    skip: int = 0,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
     user = Depends(get_current_user)
 ):
+    """Comments on a post, newest first; follow `next_cursor` for older ones.
+
+    Cached with the post's community and ETag-validated like community feeds.
+    """
     try:
-        result = CommentService.get_post_comments(db, post_id, user.id)
-        return result
+        # Own short session: released before a miss opens the render's connection
+        async with read_db_session(request) as db:
+            community_id = await AsyncCommentService.get_post_community(db, post_id)
+            if community_id is None:
+                raise Exception("Post not found")
+            await AsyncAuthorizationService.require(db, community_id, user.id, "view_comments")
+
+        async def render():
+            async with read_db_session(request) as shared_db:
+                result = await AsyncCommentService.get_post_comments(shared_db, post_id, None, skip, limit, cursor)
+                return CommentListResponse.model_validate(result)
+
+        return await response_cache.respond(
+            request, ("comments", post_id, skip, limit, cursor),
+            [community_scope(community_id)], render, items="comments", viewer_id=user.id
+        )
+    except SingleFlightTimeout as e:
+        logger.warning(f"Get post comments failed for post {post_id}: {str(e)}")
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
     except Exception as e:
         logger.error(f"Get post comments failed for post {post_id}: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/{comment_id}", response_model=CommentResponse)
-def get_comment(
+async def get_comment(
     comment_id: int,
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_db),
     user = Depends(get_current_user)
 ):
     try:
-        comment = CommentService.get_comment(db, comment_id)
+        comment = await AsyncCommentService.get_comment(db, comment_id)
         if not comment:
             raise HTTPException(status_code=404, detail="Comment not found")
         
@@ -70,13 +97,13 @@ def get_comment(
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.delete("/{comment_id}")
-def delete_comment(
+async def delete_comment(
     comment_id: int,
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_db),
     user = Depends(get_current_user)
 ):
     try:
-        result = CommentService.delete_comment(db, comment_id, user.id)
+        result = await AsyncCommentService.delete_comment(db, comment_id, user.id)
         if not result:
             raise HTTPException(status_code=404, detail="Comment not found")
         
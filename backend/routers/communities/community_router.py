@@ -1,10 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from typing import List
 
-from config.db import get_db
-from schemas.communities.community_schema import CommunityCreate, CommunityUpdate, CommunityResponse, CommunityDetailResponse
-from services.communities.community_service import CommunityService
+from config.db import DbSession, get_db, get_read_db, read_db_session
+from config.response_cache import COMMUNITIES_SCOPE, community_scope, response_cache
+from config.single_flight import SingleFlightTimeout
+from schemas.communities.community_schema import (
+    CommunityCreate, CommunityUpdate, CommunityResponse, CommunityDetailResponse, CommunityDeletionResponse,
+    CommunityListResponse
+)
+from services.authorization.authorization_service import AsyncAuthorizationService
+from services.communities.community_deleter import community_deleter
+from services.communities.community_service import AsyncCommunityService
 from dependencies import get_current_user
 import logging
 
@@ -16,58 +22,97 @@ router = APIRouter(
 )
 
 @router.post("/", response_model=CommunityResponse)
-def create_community(
+async def create_community(
     community: CommunityCreate,
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_db),
     user = Depends(get_current_user)
 ):
     try:
-        return CommunityService.create_community(db, community, user.id)
+        return await AsyncCommunityService.create_community(db, community, user.id)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/", response_model=List[CommunityResponse])
-def read_communities(
+async def read_communities(
+    request: Request,
     skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db)
+    limit: int = 100
 ):
-    return CommunityService.get_all_communities(db, skip, limit)
+    async def render():
+        async with read_db_session(request) as shared_db:
+            return CommunityListResponse.model_validate(
+                await AsyncCommunityService.get_all_communities(shared_db, skip, limit)
+            )
+
+    try:
+        return await response_cache.respond(request, ("communities", skip, limit), [COMMUNITIES_SCOPE], render)
+    except SingleFlightTimeout as e:
+        logger.warning(f"List communities failed: {str(e)}")
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
 
 @router.get("/{community_id}", response_model=CommunityResponse)
-def read_community(
-    community_id: int,
-    db: Session = Depends(get_db)
+async def read_community(
+    request: Request,
+    community_id: int
 ):
-    community = CommunityService.get_community(db, community_id)
-    if not community:
-        raise HTTPException(status_code=404, detail="Community not found")
-    return community
+    async def render():
+        async with read_db_session(request) as shared_db:
+            community = await AsyncCommunityService.get_community(shared_db, community_id)
+        if not community:
+            raise HTTPException(status_code=404, detail="Community not found")
+        return CommunityResponse.model_validate(community)
+
+    try:
+        return await response_cache.respond(request, ("community", community_id), [community_scope(community_id)], render)
+    except SingleFlightTimeout as e:
+        logger.warning(f"Get community {community_id} failed: {str(e)}")
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
 
 @router.get("/{community_id}/details", response_model=CommunityDetailResponse)
-def read_community_details(
+async def read_community_details(
+    request: Request,
     community_id: int,
-    db: Session = Depends(get_db),
     user = Depends(get_current_user)
 ):
+    """The community with member_count and the caller's is_member/is_owner.
+
+    Cached per community and per (is_member, is_owner), both taken from the
+    caller's role, so every viewer shares one of three entries.
+    """
     try:
-        community = CommunityService.get_community_with_details(db, community_id, user.id)
-        if not community:
-            raise HTTPException(status_code=404, detail="Community not found")
-        return community
+        async with read_db_session(request) as db:
+            role = await AsyncAuthorizationService.get_role(db, community_id, user.id)
+        flags = {"is_member": role is not None, "is_owner": role == "owner"}
+
+        async def render():
+            async with read_db_session(request) as shared_db:
+                community = await AsyncCommunityService.get_community_with_details(shared_db, community_id)
+            if not community:
+                raise HTTPException(status_code=404, detail="Community not found")
+            return CommunityDetailResponse.model_validate(community).model_copy(update=flags)
+
+        return await response_cache.respond(
+            request, ("community_details", community_id, flags["is_member"], flags["is_owner"]),
+            [community_scope(community_id)], render
+        )
+    except HTTPException:
+        raise
+    except SingleFlightTimeout as e:
+        logger.warning(f"Get community details failed for community {community_id}: {str(e)}")
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
     except Exception as e:
         logger.error(f"Get community details failed for community {community_id}: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.put("/{community_id}", response_model=CommunityResponse)
-def update_community(
+async def update_community(
     community_id: int,
     community_update: CommunityUpdate,
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_db),
     user = Depends(get_current_user)
 ):
     try:
-        updated_community = CommunityService.update_community(db, community_id, community_update, user.id)
+        updated_community = await AsyncCommunityService.update_community(db, community_id, community_update, user.id)
         if not updated_community:
             raise HTTPException(status_code=404, detail="Community not found")
         return updated_community
@@ -76,16 +121,47 @@ def update_community(
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.delete("/{community_id}")
-def delete_community(
+async def delete_community(
     community_id: int,
-    db: Session = Depends(get_db),
+    response: Response,
+    background: bool = False,
+    db: DbSession = Depends(get_db),
     user = Depends(get_current_user)
 ):
+    """Delete a community and everything in it.
+
+    With ?background=true the deletion runs in batches after the response
+    (202); poll GET /communities/{id}/deletion for progress. Repeating the
+    request resumes a deletion that was interrupted.
+    """
     try:
-        result = CommunityService.delete_community(db, community_id, user.id)
+        if background:
+            deletion = await AsyncCommunityService.start_deletion(db, community_id, user.id)
+            if not deletion:
+                raise HTTPException(status_code=404, detail="Community not found")
+            community_deleter.start(community_id)
+            response.status_code = status.HTTP_202_ACCEPTED
+            return CommunityDeletionResponse.model_validate(deletion)
+        result = await AsyncCommunityService.delete_community(db, community_id, user.id)
         if not result:
             raise HTTPException(status_code=404, detail="Community not found")
         return {"message": "Community deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@router.get("/{community_id}/deletion", response_model=CommunityDeletionResponse)
+async def read_community_deletion(
+    community_id: int,
+    db: DbSession = Depends(get_read_db),
+    user = Depends(get_current_user)
+):
+    try:
+        deletion = await AsyncCommunityService.get_deletion(db, community_id, user.id)
+        if not deletion:
+            raise HTTPException(status_code=404, detail="No deletion recorded for this community")
+        return deletion
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
@@ -0,0 +1,70 @@
+from fastapi import APIRouter, Depends
+
+from config.auth import token_cache, revoked_tokens
+from config.db import DB_MODE, async_engine, async_replica_engine, engine, replica_engine
+from config.listener import pg_listener
+from config.pool import pool_status
+from config.response_cache import response_cache
+from dependencies import require_internal_access
+from services.authorization.authorization_service import AuthorizationService
+from services.chat.chat_broadcast import CHAT_BROADCAST
+from services.chat.chat_hub import chat_hub
+from services.chat.message_writer import message_writer
+from services.chat.presence import presence
+from services.chat.read_cursors import read_cursors
+from services.communities.community_deleter import community_deleter
+
+router = APIRouter(
+    prefix="/internal",
+    tags=["internal"],
+    dependencies=[Depends(require_internal_access)]
+)
+
+@router.get("/auth-cache")
+def get_auth_cache_stats():
+    """Hit/miss counters for the token-to-identity cache"""
+    return {
+        "tokens": token_cache.stats(),
+        "revoked": revoked_tokens.stats()
+    }
+
+@router.get("/pool")
+def get_pool_stats():
+    """Connection pool occupancy and checkout wait-time distribution"""
+    return {
+        "db_mode": DB_MODE,
+        "primary": pool_status(engine),
+        "primary_async": pool_status(async_engine.sync_engine) if async_engine else None,
+        "replica": pool_status(replica_engine),
+        "replica_async": pool_status(async_replica_engine.sync_engine) if async_replica_engine else None
+    }
+
+@router.get("/authz-cache")
+def get_authz_cache_stats():
+    """Hit/miss counters for the (user, community) -> role cache"""
+    return AuthorizationService.stats()
+
+@router.get("/chat-hub")
+def get_chat_hub_stats():
+    """Live chat subscriptions on this worker and how many were cut off for lagging"""
+    return {
+        **chat_hub.stats(),
+        "broadcast": CHAT_BROADCAST,
+        "listener": pg_listener.stats(),
+        "batch_writer": message_writer.stats(),
+        "read_cursors": read_cursors.stats(),
+        "presence": presence.stats()
+    }
+
+@router.get("/community-deletions")
+def get_community_deletion_stats():
+    """Background community deletions running on this worker"""
+    return community_deleter.stats()
+
+@router.get("/response-cache")
+def get_response_cache_stats():
+    """Cached GET responses on this worker, 304s served and invalidations seen"""
+    return {
+        **response_cache.stats(),
+        "listener": pg_listener.stats()
+    }
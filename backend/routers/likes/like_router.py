@@ -1,12 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from typing import Dict, List
 
-from config.db import get_db
+from config.db import DbSession, get_db, get_read_db
 from schemas.likes.like_schema import (
     LikeStatusResponse,
+    PostLikeState,
     LikeToggleResponse
 )
-from services.likes.like_service import LikeService
+from services.likes.like_service import AsyncLikeService
 from dependencies import get_current_user
 import logging
 
@@ -18,27 +19,43 @@ router = APIRouter(
 )
 
 @router.post("/toggle/{post_id}", response_model=LikeToggleResponse)
-def toggle_post_like(
+async def toggle_post_like(
     post_id: int,
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_db),
     user = Depends(get_current_user)
 ):
     try:
-        result = LikeService.toggle_like(db, post_id, user.id)
+        result = await AsyncLikeService.toggle_like(db, post_id, user.id)
         return result
     except Exception as e:
         logger.error(f"Toggle like failed for user {user.id}, post {post_id}: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
 
+# Enough for a full feed page; longer lists should be split by the client
+MAX_BATCH_POST_IDS = 100
+
+@router.get("/status", response_model=Dict[int, PostLikeState])
+async def get_posts_like_status(
+    post_ids: List[int] = Query(..., max_length=MAX_BATCH_POST_IDS),
+    db: DbSession = Depends(get_read_db),
+    user = Depends(get_current_user)
+):
+    """Like status for several posts at once: `/likes/status?post_ids=1&post_ids=2`"""
+    try:
+        return await AsyncLikeService.get_like_statuses(db, post_ids, user.id)
+    except Exception as e:
+        logger.error(f"Get like statuses failed for user {user.id}: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.get("/status/{post_id}", response_model=LikeStatusResponse)
-def get_post_like_status(
+async def get_post_like_status(
     post_id: int,
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_db),
     user = Depends(get_current_user)
 ):
     """Get like status for a specific post"""
     try:
-        result = LikeService.get_like_status(db, post_id, user.id)
+        result = await AsyncLikeService.get_like_status(db, post_id, user.id)
         return result
     except Exception as e:
         logger.error(f"Get like status failed for post {post_id}: {str(e)}")
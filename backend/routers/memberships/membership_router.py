@@ -1,8 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from typing import List, Optional
 
-from config.db import get_db
+from config.db import DbSession, get_db, get_read_db
 from schemas.memberships.membership_schema import (
     JoinCommunityResponse, 
     LeaveCommunityResponse, 
@@ -13,7 +12,7 @@ from schemas.memberships.membership_schema import (
     UpdateMemberRoleResponse
 )
 from schemas.communities.community_schema import CommunityResponse
-from services.memberships.membership_service import MembershipService
+from services.memberships.membership_service import AsyncMembershipService
 from dependencies import get_current_user
 import logging
 
@@ -25,15 +24,15 @@ router = APIRouter(
 )
 
 @router.post("/join/{community_id}", response_model=JoinCommunityResponse)
-def join_community(
+async def join_community(
     community_id: int,
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_db),
     user = Depends(get_current_user)
 ):
     try:
         from schemas.memberships.membership_schema import MembershipCreate
         membership_data = MembershipCreate(community_id=community_id)
-        membership = MembershipService.join_community(db, membership_data, user.id)
+        membership = await AsyncMembershipService.join_community(db, membership_data, user.id)
         return JoinCommunityResponse(
             message="Successfully joined the community",
             membership=membership
@@ -43,13 +42,13 @@ def join_community(
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.delete("/leave/{community_id}", response_model=LeaveCommunityResponse)
-def leave_community(
+async def leave_community(
     community_id: int,
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_db),
     user = Depends(get_current_user)
 ):
     try:
-        MembershipService.leave_community(db, community_id, user.id)
+        await AsyncMembershipService.leave_community(db, community_id, user.id)
         return LeaveCommunityResponse(
             message="Successfully left the community",
             community_id=community_id
@@ -59,13 +58,13 @@ def leave_community(
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/status/{community_id}", response_model=MembershipStatus)
-def get_membership_status(
+async def get_membership_status(
     community_id: int,
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_read_db),
     user = Depends(get_current_user)
 ):
     try:
-        is_member = MembershipService.is_member(db, community_id, user.id)
+        is_member = await AsyncMembershipService.is_member(db, community_id, user.id)
         return MembershipStatus(
             is_member=is_member,
             community_id=community_id,
@@ -76,47 +75,56 @@ def get_membership_status(
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/my-communities", response_model=List[CommunityResponse])
-def get_my_communities(
-    db: Session = Depends(get_db),
+async def get_my_communities(
+    db: DbSession = Depends(get_read_db),
     user = Depends(get_current_user)
 ):
     try:
-        communities = MembershipService.get_user_communities(db, user.id)
+        communities = await AsyncMembershipService.get_user_communities(db, user.id)
         return communities
     except Exception as e:
         logger.error(f"Get user communities failed for user {user.id}: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/community/{community_id}/members", response_model=MemberListResponse)
-def get_community_members(
+async def get_community_members(
     community_id: int,
-    db: Session = Depends(get_db),
+    skip: int = 0,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    role: Optional[str] = Query(None, max_length=50),
+    search: Optional[str] = Query(None, min_length=1, max_length=100),
+    db: DbSession = Depends(get_read_db),
     user = Depends(get_current_user)
 ):
     try:
-        members = MembershipService.get_community_members(db, community_id, user.id)
+        result = await AsyncMembershipService.get_community_members(
+            db, community_id, user.id, skip, limit, cursor, role, search
+        )
         return MemberListResponse(
-            members=members,
-            total_count=len(members),
-            community_id=community_id
+            members=result["members"],
+            total_count=len(result["members"]),
+            community_id=community_id,
+            has_more=result["has_more"],
+            next_cursor=result["next_cursor"]
         )
     except Exception as e:
         logger.error(f"Get community members failed for community {community_id}: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.put("/community/{community_id}/members/{target_user_id}/role", response_model=UpdateMemberRoleResponse)
-def update_member_role(
+async def update_member_role(
     community_id: int,
     target_user_id: str,  # UUID as string in URL
     role_update: UpdateMemberRoleRequest,
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_db),
     user = Depends(get_current_user)
 ):
     try:
         from uuid import UUID
         target_uuid = UUID(target_user_id)
         
-        updated_membership = MembershipService.update_member_role(
+        updated_membership = await AsyncMembershipService.update_member_role(
             db, community_id, str(target_uuid), role_update, user.id
         )
         
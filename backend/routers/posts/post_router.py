@@ -1,15 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from typing import List, Optional
 
-from config.db import get_db
+from config.db import DbSession, get_db, read_db_session
+from config.response_cache import community_scope, response_cache
+from config.single_flight import SingleFlightTimeout
 from schemas.posts.post_schema import (
     PostCreate,
     PostUpdate,
     PostResponse,
     PostListResponse
 )
-from services.posts.post_service import PostService
+from services.authorization.authorization_service import AsyncAuthorizationService
+from services.posts.post_service import AsyncPostService
 from dependencies import get_current_user
 import logging
 
@@ -21,13 +23,13 @@ router = APIRouter(
 )
 
 @router.post("/", response_model=PostResponse)
-def create_post(
+async def create_post(
     post: PostCreate,
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_db),
     user = Depends(get_current_user)
 ):
     try:
-        db_post = PostService.create_post(db, post, user.id)
+        db_post = await AsyncPostService.create_post(db, post, user.id)
         
         # Add author information for response
         db_post.author_display_name = user.user_metadata.get('display_name') or user.email
@@ -39,30 +41,53 @@ def create_post(
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/community/{community_id}", response_model=PostListResponse)
-def get_community_posts(
+async def get_community_posts(
+    request: Request,
     community_id: int,
     skip: int = 0,
-    limit: int = 20,
-    db: Session = Depends(get_db),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    sort: str = Query("new", pattern="^(new|hot)$"),
     user = Depends(get_current_user)
 ):
-    """Get posts for a specific community with pagination"""
+    """Get posts for a specific community, newest first, or by engagement with `sort=hot`.
+
+    Pass the previous response's `next_cursor` as `cursor` for the next page
+    (with the same `sort`); `skip` is still accepted for older clients.
+    Served from the response cache until the community changes; send the
+    ETag back as If-None-Match to get a 304.
+    """
     try:
-        result = PostService.get_community_posts(db, community_id, user.id, skip, limit)
-        return result
+        # Own short session: released before a miss opens the render's connection
+        async with read_db_session(request) as db:
+            await AsyncAuthorizationService.require(db, community_id, user.id, "view_posts")
+
+        # Shared by identical concurrent requests: own session, no viewer
+        async def render():
+            async with read_db_session(request) as shared_db:
+                result = await AsyncPostService.get_community_posts(shared_db, community_id, None, skip, limit, cursor, sort)
+                return PostListResponse.model_validate(result)
+
+        return await response_cache.respond(
+            request, ("posts", community_id, sort, skip, limit, cursor),
+            [community_scope(community_id)], render, items="posts", viewer_id=user.id
+        )
+    except SingleFlightTimeout as e:
+        logger.warning(f"Get community posts failed for community {community_id}: {str(e)}")
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
     except Exception as e:
         logger.error(f"Get community posts failed for community {community_id}: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/{post_id}", response_model=PostResponse)
-def get_post(
+async def get_post(
     post_id: int,
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_db),
     user = Depends(get_current_user)
 ):
     """Get a single post by ID"""
     try:
-        post = PostService.get_post(db, post_id)
+        post = await AsyncPostService.get_post(db, post_id)
         if not post:
             raise HTTPException(status_code=404, detail="Post not found")
         
@@ -77,15 +102,15 @@ def get_post(
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.put("/{post_id}", response_model=PostResponse)
-def update_post(
+async def update_post(
     post_id: int,
     post_update: PostUpdate,
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_db),
     user = Depends(get_current_user)
 ):
     """Update a post (only by author)"""
     try:
-        updated_post = PostService.update_post(db, post_id, post_update, user.id)
+        updated_post = await AsyncPostService.update_post(db, post_id, post_update, user.id)
         if not updated_post:
             raise HTTPException(status_code=404, detail="Post not found")
         
@@ -101,14 +126,14 @@ def update_post(
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.delete("/{post_id}")
-def delete_post(
+async def delete_post(
     post_id: int,
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_db),
     user = Depends(get_current_user)
 ):
     """Delete a post (only by author)"""
     try:
-        result = PostService.delete_post(db, post_id, user.id)
+        result = await AsyncPostService.delete_post(db, post_id, user.id)
         if not result:
             raise HTTPException(status_code=404, detail="Post not found")
         
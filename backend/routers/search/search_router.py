@@ -0,0 +1,50 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Optional
+
+from config.db import DbSession, get_read_db
+from schemas.search.search_schema import CommentSearchResponse, PostSearchResponse
+from services.search.search_service import AsyncSearchService
+from dependencies import get_current_user
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/search",
+    tags=["search"]
+)
+
+@router.get("/posts", response_model=PostSearchResponse)
+async def search_posts(
+    q: str = Query(..., min_length=1, max_length=200),
+    community_id: Optional[int] = None,
+    limit: int = Query(20, ge=1, le=50),
+    cursor: Optional[str] = None,
+    db: DbSession = Depends(get_read_db),
+    user = Depends(get_current_user)
+):
+    """Full-text search over posts in the caller's communities (or one of them), best match first.
+
+    `q` accepts web search syntax: "exact phrase", either OR other, -excluded.
+    """
+    try:
+        return await AsyncSearchService.search_posts(db, user.id, q, community_id, limit, cursor)
+    except Exception as e:
+        logger.error(f"Post search failed for user {user.id}: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/comments", response_model=CommentSearchResponse)
+async def search_comments(
+    q: str = Query(..., min_length=1, max_length=200),
+    community_id: Optional[int] = None,
+    limit: int = Query(20, ge=1, le=50),
+    cursor: Optional[str] = None,
+    db: DbSession = Depends(get_read_db),
+    user = Depends(get_current_user)
+):
+    """Full-text search over comments on posts in the caller's communities"""
+    try:
+        return await AsyncSearchService.search_comments(db, user.id, q, community_id, limit, cursor)
+    except Exception as e:
+        logger.error(f"Comment search failed for user {user.id}: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
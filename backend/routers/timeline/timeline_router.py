@@ -0,0 +1,32 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Optional
+
+from config.db import DbSession, get_read_db
+from schemas.posts.post_schema import PostListResponse
+from services.timeline.timeline_service import AsyncTimelineService
+from dependencies import get_current_user
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/timeline",
+    tags=["timeline"]
+)
+
+@router.get("/home", response_model=PostListResponse)
+async def get_home_timeline(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: DbSession = Depends(get_read_db),
+    user = Depends(get_current_user)
+):
+    """Newest posts from every community the user belongs to.
+
+    Pass the previous response's `next_cursor` as `cursor` for older posts.
+    """
+    try:
+        return await AsyncTimelineService.get_home_timeline(db, user.id, limit, cursor)
+    except Exception as e:
+        logger.error(f"Get home timeline failed for user {user.id}: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
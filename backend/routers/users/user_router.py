@@ -1,9 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
 
-from config.db import get_db
+from config.db import DbSession, get_db
 from schemas.users.user_schema import UserProfileUpdate, UserProfileResponse
-from services.users.user_service import UserService
+from services.users.user_service import AsyncUserService
 from dependencies import get_current_user
 import logging
 
@@ -15,24 +14,24 @@ router = APIRouter(
 )
 
 @router.get("/profile", response_model=UserProfileResponse)
-def get_my_profile(
-    db: Session = Depends(get_db),
+async def get_my_profile(
+    db: DbSession = Depends(get_db),
     user = Depends(get_current_user)
 ):
     try:
-        return UserService.get_user_profile(db, user.id)
+        return await AsyncUserService.get_user_profile(db, user.id)
     except Exception as e:
         logger.error(f"Get profile failed for user {user.id}: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.put("/profile", response_model=UserProfileResponse)
-def update_my_profile(
+async def update_my_profile(
     profile_update: UserProfileUpdate,
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_db),
     user = Depends(get_current_user)
 ):
     try:
-        return UserService.update_user_profile(db, user.id, profile_update)
+        return await AsyncUserService.update_user_profile(db, user.id, profile_update)
     except Exception as e:
         logger.error(f"Update profile failed for user {user.id}: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
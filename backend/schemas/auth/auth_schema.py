@@ -1,4 +1,5 @@
 from pydantic import BaseModel
+from typing import Optional
 
 class UserSignup(BaseModel):
     email: str
@@ -9,5 +10,20 @@ class UserLogin(BaseModel):
     email: str
     password: str
 
+class AuthenticatedUser(BaseModel):
+    """Identity built from verified token claims, shaped like Supabase's User"""
+    id: str
+    email: Optional[str] = None
+    role: Optional[str] = None
+    user_metadata: dict = {}
+    app_metadata: dict = {}
 
-
+    @classmethod
+    def from_claims(cls, claims: dict):
+        return cls(
+            id=claims["sub"],
+            email=claims.get("email"),
+            role=claims.get("role"),
+            user_metadata=claims.get("user_metadata") or {},
+            app_metadata=claims.get("app_metadata") or {},
+        )
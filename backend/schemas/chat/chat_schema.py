@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional, List
+from pydantic import BaseModel, Field
+from typing import Dict, Optional, List
 from datetime import datetime
 from uuid import UUID
 
@@ -47,7 +47,37 @@ class ChatRoomWithMessages(ChatRoomResponse):
 
 class MessageListResponse(BaseModel):
     messages: List[MessageResponse]
-    total_count: int
+    total_count: Optional[int] = None
     chat_id: int
     has_more: bool = False
-    chat_id: int
\ No newline at end of file
+    # Cursor for the next page of older messages
+    next_cursor: Optional[str] = None
+
+# Read cursor schemas
+class MarkReadRequest(BaseModel):
+    last_read_msg_id: int
+
+class ReadCursorResponse(BaseModel):
+    chat_id: int
+    last_read_msg_id: int
+
+class ChatUnreadResponse(BaseModel):
+    chat_id: int
+    last_read_msg_id: Optional[int] = None
+    # Capped (CHAT_UNREAD_COUNT_CAP): at the cap, show it as "99+"
+    unread_count: int
+
+# Presence schemas
+class PresenceHeartbeat(BaseModel):
+    # Every room the client shows, in one request
+    chat_ids: List[int] = Field(..., max_length=100)
+
+class PresenceResponse(BaseModel):
+    # id -> users online; rooms the caller may not read are left out
+    chats: Dict[int, int] = {}
+    communities: Dict[int, int] = {}
+
+class RoomOnlineResponse(BaseModel):
+    chat_id: int
+    online_count: int
+    user_ids: List[str]
@@ -28,4 +28,8 @@ class CommentResponse(CommentBase):
 class CommentListResponse(BaseModel):
     """Response for listing comments on a post"""
     comments: list[CommentResponse]
-    total_count: int
\ No newline at end of file
+    total_count: Optional[int] = None
+    page: Optional[int] = None
+    page_size: int
+    has_more: bool
+    next_cursor: Optional[str] = None
\ No newline at end of file
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, RootModel
 from typing import Optional, List
 from datetime import datetime
 from uuid import UUID
@@ -22,6 +22,9 @@ class CommunityResponse(CommunityBase):
     class Config:
         from_attributes = True
 
+class CommunityListResponse(RootModel[List[CommunityResponse]]):
+    """Body of GET /communities/: a plain JSON array of communities"""
+
 class CommunityDetailResponse(CommunityResponse):
     """Enhanced community response with membership info for detail pages"""
     member_count: int
@@ -31,3 +34,17 @@ class CommunityDetailResponse(CommunityResponse):
     class Config:
         from_attributes = True
 
+
+class CommunityDeletionResponse(BaseModel):
+    """Progress of a background community deletion"""
+    community_id: int
+    status: str
+    phase: Optional[str] = None
+    deleted_rows: int
+    error: Optional[str] = None
+    started_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
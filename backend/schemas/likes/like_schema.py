@@ -20,6 +20,11 @@ class LikeStatusResponse(BaseModel):
     is_liked: bool
     like_count: int
 
+class PostLikeState(BaseModel):
+    """Entry of the batch like-status response, keyed by post_id"""
+    is_liked: bool
+    like_count: int
+
 class LikeToggleResponse(BaseModel):
     """Response after liking/unliking a post"""
     post_id: int
@@ -1,7 +1,7 @@
 from pydantic import BaseModel
 from datetime import datetime
 from uuid import UUID
-from typing import Optional, List
+from typing import Literal, Optional, List
 
 class MembershipCreate(BaseModel):
     community_id: int
@@ -48,11 +48,15 @@ class MemberResponse(BaseModel):
 class MemberListResponse(BaseModel):
     """Response for community member list"""
     members: List[MemberResponse]
+    # Size of this page, not of the whole community
     total_count: int
     community_id: int
+    has_more: bool = False
+    next_cursor: Optional[str] = None
 
 class UpdateMemberRoleRequest(BaseModel):
-    role: str
+    # "owner" is never stored: it belongs to the community's creator alone
+    role: Literal["member", "moderator", "admin"]
 
 class UpdateMemberRoleResponse(BaseModel):
     """Response after updating member role"""
@@ -22,6 +22,8 @@ class PostResponse(PostBase):
     author_id: UUID
     created_at: datetime
     updated_at: Optional[datetime]
+    like_count: int = 0
+    comment_count: int = 0
     
     # Additional fields for frontend display
     author_display_name: Optional[str] = None
@@ -33,7 +35,10 @@ class PostResponse(PostBase):
 class PostListResponse(BaseModel):
     """Response for listing posts in a community"""
     posts: list[PostResponse]
-    total_count: int
-    page: int
+    # Not computed any more: counting every post made each page O(community size)
+    total_count: Optional[int] = None
+    page: Optional[int] = None
     page_size: int
-    has_more: bool
\ No newline at end of file
+    has_more: bool
+    # Pass back as `cursor` to fetch the next page
+    next_cursor: Optional[str] = None
\ No newline at end of file
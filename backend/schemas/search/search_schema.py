@@ -0,0 +1,26 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+from schemas.comments.comment_schema import CommentResponse
+from schemas.posts.post_schema import PostResponse
+
+class PostSearchResult(PostResponse):
+    """A matching post; `headline` is an excerpt with the matched words in <mark> tags"""
+    headline: str
+    rank: float
+
+class CommentSearchResult(CommentResponse):
+    community_id: int
+    headline: str
+    rank: float
+
+class PostSearchResponse(BaseModel):
+    results: List[PostSearchResult]
+    has_more: bool
+    # Pass back as `cursor` to fetch the next page
+    next_cursor: Optional[str] = None
+
+class CommentSearchResponse(BaseModel):
+    results: List[CommentSearchResult]
+    has_more: bool
+    next_cursor: Optional[str] = None
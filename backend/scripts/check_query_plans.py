@@ -0,0 +1,198 @@
+"""Fail when a hot query can no longer be served by an index.
+
+Runs EXPLAIN for every query in HOT_QUERIES with sequential scans
+disabled. On a small CI database the planner may legitimately prefer a seq
+scan, but with enable_seqscan off it only falls back to one when no usable
+index exists, which is exactly the regression we want to catch.
+
+    cd backend && python -m scripts.check_query_plans
+"""
+import json
+import os
+import sys
+import uuid
+
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, pool, text
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+load_dotenv()
+
+SAMPLE_PARAMS = {
+    "user_id": str(uuid.UUID(int=1)),
+    "community_id": 1,
+    "post_id": 1,
+    "chat_id": 1,
+    "limit": 21,
+    "cursor_ts": "2030-01-01T00:00:00+00:00",
+    "cursor_id": 1000000,
+}
+
+# name -> (tables that must not be seq scanned, SQL)
+HOT_QUERIES = {
+    "membership_check": (
+        ["memberships"],
+        "SELECT role FROM memberships WHERE user_id = :user_id AND community_id = :community_id",
+    ),
+    "user_communities": (
+        ["memberships"],
+        "SELECT community_id, role FROM memberships WHERE user_id = :user_id",
+    ),
+    "community_feed": (
+        ["posts"],
+        "SELECT * FROM posts WHERE community_id = :community_id "
+        "ORDER BY created_at DESC, post_id DESC LIMIT :limit",
+    ),
+    "community_hot_feed": (
+        ["posts"],
+        "SELECT * FROM posts WHERE community_id = :community_id "
+        "ORDER BY hot_score DESC, post_id DESC LIMIT :limit",
+    ),
+    "post_comments": (
+        ["comments"],
+        "SELECT * FROM comments WHERE post_id = :post_id "
+        "ORDER BY created_at DESC, comment_id DESC LIMIT :limit",
+    ),
+    "chat_history": (
+        ["messages"],
+        "SELECT * FROM messages WHERE chat_id = :chat_id "
+        "ORDER BY sent_at DESC, msg_id DESC LIMIT :limit",
+    ),
+    "community_feed_after_cursor": (
+        ["posts"],
+        "SELECT * FROM posts WHERE community_id = :community_id "
+        "AND (created_at, post_id) < (CAST(:cursor_ts AS timestamptz), :cursor_id) "
+        "ORDER BY created_at DESC, post_id DESC LIMIT :limit",
+    ),
+    "chat_history_after_cursor": (
+        ["messages"],
+        "SELECT * FROM messages WHERE chat_id = :chat_id "
+        "AND (sent_at, msg_id) < (CAST(:cursor_ts AS timestamptz), :cursor_id) "
+        "ORDER BY sent_at DESC, msg_id DESC LIMIT :limit",
+    ),
+    "chat_since": (
+        ["messages"],
+        "SELECT * FROM messages WHERE chat_id = :chat_id AND msg_id > :cursor_id "
+        "ORDER BY msg_id LIMIT :limit",
+    ),
+    "chat_since_overlap": (
+        ["messages"],
+        "SELECT * FROM messages WHERE chat_id = :chat_id AND msg_id <= :cursor_id "
+        "AND sent_at >= now() - interval '10 seconds' ORDER BY msg_id",
+    ),
+    "chat_archive": (
+        ["message_archive"],
+        "SELECT * FROM message_archive WHERE chat_id = :chat_id "
+        "AND (first_sent_at, first_msg_id) < (CAST(:cursor_ts AS timestamptz), :cursor_id) "
+        "ORDER BY first_sent_at DESC, first_msg_id DESC LIMIT 1",
+    ),
+    "chat_unread_counts": (
+        ["chat_rooms", "chat_read_cursors", "messages"],
+        "SELECT r.chat_id, (SELECT count(*) FROM (SELECT 1 FROM messages m WHERE m.chat_id = r.chat_id "
+        "AND m.msg_id > coalesce(c.last_read_msg_id, 0) LIMIT :limit) unread) "
+        "FROM chat_rooms r LEFT JOIN chat_read_cursors c ON c.chat_id = r.chat_id AND c.user_id = :user_id "
+        "WHERE r.community_id = :community_id",
+    ),
+    "community_members": (
+        ["memberships"],
+        "SELECT * FROM memberships WHERE community_id = :community_id "
+        "ORDER BY joined_at, membership_id LIMIT :limit",
+    ),
+    "community_members_by_role": (
+        ["memberships"],
+        "SELECT * FROM memberships WHERE community_id = :community_id AND role = 'moderator' "
+        "ORDER BY joined_at, membership_id LIMIT :limit",
+    ),
+    "member_prefix_search": (
+        ["users"],
+        "SELECT user_id FROM users WHERE lower(username) LIKE 'ab%' OR lower(display_name) LIKE 'ab%'",
+    ),
+    "home_timeline": (
+        ["timeline_entries"],
+        "SELECT post_id, created_at FROM timeline_entries WHERE user_id = :user_id "
+        "AND (created_at, post_id) < (CAST(:cursor_ts AS timestamptz), :cursor_id) "
+        "ORDER BY created_at DESC, post_id DESC LIMIT :limit",
+    ),
+    "read_time_communities": (
+        ["communities", "memberships"],
+        "SELECT c.community_id FROM communities c LEFT JOIN memberships m "
+        "ON m.community_id = c.community_id AND m.user_id = :user_id "
+        "WHERE c.fanout_on_read AND (m.membership_id IS NOT NULL OR c.created_by = :user_id)",
+    ),
+    "post_search": (
+        ["posts"],
+        "SELECT post_id FROM posts "
+        "WHERE search_vector @@ websearch_to_tsquery('pg_catalog.english', 'postgres index')",
+    ),
+    "comment_search": (
+        ["comments"],
+        "SELECT comment_id FROM comments "
+        "WHERE search_vector @@ websearch_to_tsquery('pg_catalog.english', 'postgres index')",
+    ),
+    "owned_communities": (
+        ["communities"],
+        "SELECT community_id FROM communities WHERE created_by = :user_id",
+    ),
+    "authored_communities": (
+        ["posts", "comments"],
+        "SELECT community_id FROM posts WHERE author_id = :user_id "
+        "UNION SELECT p.community_id FROM comments c JOIN posts p ON p.post_id = c.post_id "
+        "WHERE c.author_id = :user_id",
+    ),
+    "like_lookup": (
+        ["likes"],
+        "SELECT like_id FROM likes WHERE post_id = :post_id AND user_id = :user_id",
+    ),
+}
+
+
+def seq_scanned_tables(plan):
+    """Relations read by a Seq Scan anywhere in an EXPLAIN (FORMAT JSON) plan."""
+    found = []
+    if plan.get("Node Type") == "Seq Scan":
+        found.append(plan.get("Relation Name"))
+    for child in plan.get("Plans", []):
+        found.extend(seq_scanned_tables(child))
+    return found
+
+
+def partitions_of(connection):
+    """parent table -> names of its partitions (messages is partitioned by month)."""
+    partitions = {}
+    rows = connection.execute(text(
+        "SELECT p.relname, c.relname FROM pg_inherits i "
+        "JOIN pg_class p ON p.oid = i.inhparent JOIN pg_class c ON c.oid = i.inhrelid"
+    ))
+    for parent, child in rows:
+        partitions.setdefault(parent, []).append(child)
+    connection.commit()
+    return partitions
+
+
+def check(connection):
+    failures = []
+    partitions = partitions_of(connection)
+    for name, (tables, sql) in HOT_QUERIES.items():
+        tables = tables + [child for table in tables for child in partitions.get(table, [])]
+        with connection.begin():
+            connection.execute(text("SET LOCAL enable_seqscan = off"))
+            raw = connection.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"), SAMPLE_PARAMS).scalar()
+        plan = (json.loads(raw) if isinstance(raw, str) else raw)[0]["Plan"]
+        scanned = [table for table in seq_scanned_tables(plan) if table in tables]
+        if scanned:
+            failures.append(f"{name}: sequential scan on {', '.join(scanned)}")
+        print(f"{'FAIL' if scanned else 'ok  '} {name}")
+    return failures
+
+
+def main():
+    engine = create_engine(os.environ["DB_URL"], poolclass=pool.NullPool)
+    with engine.connect() as connection:
+        failures = check(connection)
+    if failures:
+        print("\nQuery plan regressions:\n  " + "\n  ".join(failures))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
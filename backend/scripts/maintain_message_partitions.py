@@ -0,0 +1,147 @@
+"""Keep the monthly partitions of messages ahead of time and archive old ones.
+
+Creates a partition for every month up to --months-ahead from now, so inserts
+never land in messages_default. Partitions that ended more than
+--retention-months ago are compacted into message_archive (one row per run of
+--chunk-size messages of a room, stored as JSONB that TOAST compresses), then
+detached and dropped in the same transaction, so a message is always either
+hot or archived. Chat history reads fall back to the archive transparently.
+
+Run it daily or at least monthly, e.g. from cron:
+
+    cd backend && python -m scripts.maintain_message_partitions [--months-ahead 3] [--retention-months 6]
+"""
+import argparse
+import os
+import re
+import sys
+from datetime import datetime, timezone
+
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, pool, text
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+load_dotenv()
+
+PARTITIONS_SQL = """
+SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+FROM pg_inherits i
+JOIN pg_class c ON c.oid = i.inhrelid
+WHERE i.inhparent = 'messages'::regclass
+"""
+
+BOUND_PATTERN = re.compile(r"FROM \((.+)\) TO \((.+)\)")
+
+# New partitions are built standalone and then attached, taking along any
+# rows that already fell into the default partition
+MOVE_SQL = """
+WITH moved AS (
+    DELETE FROM messages_default WHERE sent_at >= :start AND sent_at < :end RETURNING *
+)
+INSERT INTO {name} SELECT * FROM moved
+"""
+
+COMPACT_SQL = """
+INSERT INTO message_archive (chat_id, first_sent_at, first_msg_id, last_sent_at, last_msg_id, message_count, messages)
+SELECT chat_id,
+       min(sent_at),
+       (array_agg(msg_id ORDER BY sent_at, msg_id))[1],
+       max(sent_at),
+       (array_agg(msg_id ORDER BY sent_at DESC, msg_id DESC))[1],
+       count(*),
+       jsonb_agg(jsonb_build_object(
+           'msg_id', msg_id, 'sender_id', sender_id, 'type', type, 'content', content, 'sent_at', sent_at
+       ) ORDER BY sent_at, msg_id)
+FROM (
+    SELECT *, (row_number() OVER (PARTITION BY chat_id ORDER BY sent_at, msg_id) - 1) / :chunk_size AS chunk
+    FROM {name}
+    WHERE chat_id IS NOT NULL
+) m
+GROUP BY chat_id, chunk
+"""
+
+
+def month_start(moment: datetime, months: int = 0) -> datetime:
+    index = moment.year * 12 + moment.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def parse_bound(value: str):
+    """A range bound from pg_get_expr: None for MINVALUE/MAXVALUE, else a datetime."""
+    if value in ("MINVALUE", "MAXVALUE"):
+        return None
+    return datetime.fromisoformat(value.strip("'").replace(" ", "T")).astimezone(timezone.utc)
+
+
+def list_partitions(connection):
+    """[(name, lower, upper)] of the range partitions, oldest first; lower is None for MINVALUE."""
+    partitions = []
+    for name, bound in connection.execute(text(PARTITIONS_SQL)):
+        match = BOUND_PATTERN.search(bound)
+        if match:
+            partitions.append((name, parse_bound(match.group(1)), parse_bound(match.group(2))))
+    connection.commit()
+    return sorted(partitions, key=lambda partition: partition[2])
+
+
+def create_partitions(connection, months_ahead: int = 3, now: datetime = None):
+    """Create monthly partitions from the newest existing one up to `months_ahead`; returns their names."""
+    now = now or datetime.now(timezone.utc)
+    partitions = list_partitions(connection)
+    start = partitions[-1][2] if partitions else month_start(now)
+    horizon = month_start(now, months_ahead + 1)
+
+    created = []
+    while start < horizon:
+        end = month_start(start, 1)
+        name = f"messages_{start:%Y_%m}"
+        with connection.begin():
+            connection.execute(text(f"CREATE TABLE {name} (LIKE messages INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+            connection.execute(text(MOVE_SQL.format(name=name)), {"start": start, "end": end})
+            connection.execute(text(
+                f"ALTER TABLE messages ATTACH PARTITION {name} "
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+            ))
+        created.append(name)
+        start = end
+    return created
+
+
+def archive_partitions(connection, retention_months: int = 6, chunk_size: int = 200,
+                       lock_timeout: str = "5s", now: datetime = None):
+    """Compact, detach and drop partitions older than the retention window; returns [(name, chunks)]."""
+    cutoff = month_start(now or datetime.now(timezone.utc), -retention_months)
+
+    archived = []
+    for name, _, upper in list_partitions(connection):
+        if upper > cutoff:
+            break
+        with connection.begin():
+            # DETACH needs a brief exclusive lock on messages: give up rather than queue
+            # behind a long query and stall every chat write; the next run retries
+            connection.execute(text(f"SET LOCAL lock_timeout = '{lock_timeout}'"))
+            chunks = connection.execute(text(COMPACT_SQL.format(name=name)), {"chunk_size": chunk_size}).rowcount
+            connection.execute(text(f"ALTER TABLE messages DETACH PARTITION {name}"))
+            connection.execute(text(f"DROP TABLE {name}"))
+        archived.append((name, chunks))
+    return archived
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--months-ahead", type=int, default=3)
+    parser.add_argument("--retention-months", type=int, default=6)
+    parser.add_argument("--chunk-size", type=int, default=200)
+    args = parser.parse_args()
+
+    engine = create_engine(os.environ["DB_URL"], poolclass=pool.NullPool)
+    with engine.connect() as connection:
+        created = create_partitions(connection, args.months_ahead)
+        archived = archive_partitions(connection, args.retention_months, args.chunk_size)
+    print(f"Created {len(created)} partition(s){': ' + ', '.join(created) if created else ''}")
+    for name, chunks in archived:
+        print(f"Archived {name} into {chunks} chunk(s)")
+
+
+if __name__ == "__main__":
+    main()
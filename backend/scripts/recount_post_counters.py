@@ -0,0 +1,76 @@
+"""Recompute posts.like_count and posts.comment_count from the source tables.
+
+The counters are kept in step with every like toggle and comment write, but
+rows removed behind the application's back (a cascading user delete, manual
+SQL) leave them drifting. This job walks posts in post_id ranges, one short
+transaction per batch, and only rewrites rows whose counts are wrong.
+hot_score follows the corrected counts through its trigger (migration 0012).
+
+    cd backend && python -m scripts.recount_post_counters [--batch-size 1000] [--community-id 7]
+"""
+import argparse
+import os
+import sys
+
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, pool, text
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+load_dotenv()
+
+# Locking the batch first means a like/comment that commits while we count
+# is either already visible or waits and applies its +1/-1 on top of our value
+LOCK_SQL = """
+SELECT post_id FROM posts
+WHERE post_id > :after AND post_id <= :upto {community_filter}
+ORDER BY post_id
+FOR UPDATE
+"""
+
+RECOUNT_SQL = """
+UPDATE posts p
+SET like_count = c.like_count, comment_count = c.comment_count
+FROM (
+    SELECT post_id,
+           (SELECT count(*) FROM likes l WHERE l.post_id = posts.post_id) AS like_count,
+           (SELECT count(*) FROM comments m WHERE m.post_id = posts.post_id) AS comment_count
+    FROM posts
+    WHERE post_id > :after AND post_id <= :upto {community_filter}
+) c
+WHERE p.post_id = c.post_id
+  AND (p.like_count <> c.like_count OR p.comment_count <> c.comment_count)
+"""
+
+
+def recount(connection, batch_size: int = 1000, community_id: int = None):
+    """Fix every drifted post; returns how many rows were rewritten."""
+    community_filter = "AND community_id = :community_id" if community_id is not None else ""
+    lock_sql = text(LOCK_SQL.format(community_filter=community_filter))
+    recount_sql = text(RECOUNT_SQL.format(community_filter=community_filter))
+
+    last_id = connection.execute(text("SELECT coalesce(max(post_id), 0) FROM posts")).scalar()
+    connection.commit()
+
+    fixed = 0
+    for after in range(0, last_id, batch_size):
+        params = {"after": after, "upto": after + batch_size, "community_id": community_id}
+        with connection.begin():
+            connection.execute(lock_sql, params)
+            fixed += connection.execute(recount_sql, params).rowcount
+    return fixed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--community-id", type=int, default=None)
+    args = parser.parse_args()
+
+    engine = create_engine(os.environ["DB_URL"], poolclass=pool.NullPool)
+    with engine.connect() as connection:
+        fixed = recount(connection, args.batch_size, args.community_id)
+    print(f"Recounted posts, {fixed} row(s) corrected")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Trim materialized home timelines to their most recent entries.
+
+Every post of a small community is copied into each member's timeline, so
+timeline_entries grows with posts x members. This job keeps at most
+--max-entries entries per user and none older than --retention-days. Users
+are walked in user_id order, --batch-size at a time, one short transaction
+per batch; each delete is a range scan of the timeline primary key.
+Timelines then simply end there: paging past the oldest kept entry returns
+no more posts.
+
+Run it daily, e.g. from cron:
+
+    cd backend && python -m scripts.trim_timelines [--max-entries 800] [--retention-days 30]
+"""
+import argparse
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, pool, text
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+load_dotenv()
+
+USERS_SQL = """
+SELECT user_id FROM users
+WHERE CAST(:after AS uuid) IS NULL OR user_id > CAST(:after AS uuid)
+ORDER BY user_id
+LIMIT :batch_size
+"""
+
+TRIM_SQL = """
+DELETE FROM timeline_entries t
+USING (
+    SELECT user_id, created_at, post_id,
+           row_number() OVER (PARTITION BY user_id ORDER BY created_at DESC, post_id DESC) AS position
+    FROM timeline_entries
+    WHERE user_id = ANY(:user_ids)
+) ranked
+WHERE t.user_id = ranked.user_id AND t.created_at = ranked.created_at AND t.post_id = ranked.post_id
+  AND (ranked.position > :max_entries OR ranked.created_at < :cutoff)
+"""
+
+
+def trim(connection, max_entries: int = 800, retention_days: int = 30, batch_size: int = 500, now: datetime = None):
+    """Delete timeline entries past the limits; returns how many were removed."""
+    cutoff = (now or datetime.now(timezone.utc)) - timedelta(days=retention_days)
+    removed = 0
+    after = None
+    while True:
+        with connection.begin():
+            user_ids = connection.execute(text(USERS_SQL), {"after": after, "batch_size": batch_size}).scalars().all()
+            if not user_ids:
+                break
+            removed += connection.execute(
+                text(TRIM_SQL), {"user_ids": user_ids, "max_entries": max_entries, "cutoff": cutoff}
+            ).rowcount
+        after = str(user_ids[-1])
+    return removed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--max-entries", type=int, default=800)
+    parser.add_argument("--retention-days", type=int, default=30)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    engine = create_engine(os.environ["DB_URL"], poolclass=pool.NullPool)
+    with engine.connect() as connection:
+        removed = trim(connection, args.max_entries, args.retention_days, args.batch_size)
+    print(f"Removed {removed} timeline entries")
+
+
+if __name__ == "__main__":
+    main()
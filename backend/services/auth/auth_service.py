@@ -1,4 +1,5 @@
 from config.db import supabase
+from config.auth import revoke_token
 import logging
 
 logger = logging.getLogger(__name__)
@@ -53,9 +54,12 @@ class AuthService:
             raise
 
     @staticmethod
-    def logout():
+    def logout(token: str = None):
         try:
             logger.info("Attempting logout")
+            if token:
+                revoke_token(token)
+
             if not supabase:
                 logger.error("Supabase client is not initialized")
                 raise Exception("Authentication service unavailable")
@@ -0,0 +1,212 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, event, text
+from models import Community, Membership
+from config.cache import LRUCache
+from config.db import async_service
+from config.listener import pg_listener
+from uuid import UUID
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Per-worker cache of (user, community) -> role. Membership changes drop
+# entries when they commit: "local" on the worker that wrote only, "postgres"
+# on every worker through NOTIFY (needed with >1 worker, or a revoked role
+# keeps working elsewhere until its entry expires)
+AUTHZ_CACHE_BROADCAST = os.environ.get("AUTHZ_CACHE_BROADCAST", "local").lower()
+AUTHZ_CACHE_CHANNEL = "authz_invalidations"
+AUTHZ_CACHE_SIZE = int(os.environ.get("AUTHZ_CACHE_SIZE", "50000"))
+# Without broadcast the TTL is all that bounds another worker's staleness, so keep it short;
+# with it, the TTL only covers NOTIFYs lost while a listener reconnects
+AUTHZ_CACHE_TTL_SECONDS = int(os.environ.get(
+    "AUTHZ_CACHE_TTL_SECONDS", "30" if AUTHZ_CACHE_BROADCAST == "postgres" else "3"
+))
+
+ROLE_RANK = {
+    "member": 1,
+    "moderator": 2,
+    "admin": 3,
+    "owner": 4
+}
+
+# action -> (lowest role allowed, error raised otherwise)
+ACTIONS = {
+    "view_posts": ("member", "You must be a member of this community to view posts"),
+    "create_post": ("member", "You must be a member of this community to create posts"),
+    "view_comments": ("member", "You must be a member of this community to view comments"),
+    "comment": ("member", "You must be a member of this community to comment"),
+    "like": ("member", "You must be a member of this community to like posts"),
+    "view_chat_rooms": ("member", "You must be a member of this community to view chat rooms"),
+    "create_chat_room": ("member", "You must be a member of this community to create chat rooms"),
+    "view_messages": ("member", "You must be a member of this community to view messages"),
+    "send_message": ("member", "You must be a member of this community to send messages"),
+    "view_members": ("member", "You must be a member of this community to view members"),
+    "manage_roles": ("admin", "You must be an owner or admin to change member roles"),
+    "edit_community": ("owner", "You can only edit communities you created"),
+    "delete_community": ("owner", "You can only delete communities you created")
+}
+
+NOT_A_MEMBER = ""
+_MISSING = object()
+
+role_cache = LRUCache(maxsize=AUTHZ_CACHE_SIZE, ttl=AUTHZ_CACHE_TTL_SECONDS)
+_generation_lock = threading.Lock()
+_generation = 0
+_PENDING = "authz_invalidations"
+
+# Roles a membership row may grant; "owner" comes from communities.created_by only
+MEMBERSHIP_ROLES = {"member", "moderator", "admin"}
+
+def _resolve_role(user_id, created_by, membership_id, membership_role):
+    if created_by is not None and str(created_by) == str(user_id):
+        return "owner"
+    if membership_id is not None:
+        # Anything else stored in the row (an old "owner") counts as a plain member
+        return membership_role if membership_role in MEMBERSHIP_ROLES else "member"
+    return NOT_A_MEMBER
+
+class AuthorizationService:
+    @staticmethod
+    def get_role(db: Session, community_id: int, user_id: UUID, fresh: bool = False):
+        """Role of the user in the community ("owner" for its creator), None if not a member.
+
+        One query on a cache miss: the community row left-joined to the user's membership.
+        """
+        key = (str(user_id), community_id)
+        if not fresh:
+            cached = role_cache.get(key, _MISSING)
+            if cached is not _MISSING:
+                return cached or None
+
+        generation = _generation
+        row = db.query(Community.created_by, Membership.membership_id, Membership.role).outerjoin(
+            Membership,
+            and_(
+                Membership.community_id == Community.community_id,
+                Membership.user_id == user_id
+            )
+        ).filter(Community.community_id == community_id).first()
+
+        if row is None:
+            raise Exception("Community not found")
+
+        role = _resolve_role(user_id, *row)
+
+        # Skip the fill if an invalidation raced with our read
+        if generation == _generation:
+            role_cache.set(key, role)
+        return role or None
+
+    @staticmethod
+    def get_roles(db: Session, community_ids, user_id: UUID):
+        """get_role for several communities at once: {community_id: role or None}.
+
+        Cache misses are resolved together in one query; unknown communities are left out.
+        """
+        roles = {}
+        missing = []
+        for community_id in set(community_ids):
+            cached = role_cache.get((str(user_id), community_id), _MISSING)
+            if cached is _MISSING:
+                missing.append(community_id)
+            else:
+                roles[community_id] = cached or None
+        if not missing:
+            return roles
+
+        generation = _generation
+        rows = db.query(
+            Community.community_id, Community.created_by, Membership.membership_id, Membership.role
+        ).outerjoin(
+            Membership,
+            and_(
+                Membership.community_id == Community.community_id,
+                Membership.user_id == user_id
+            )
+        ).filter(Community.community_id.in_(missing)).all()
+
+        for community_id, *row in rows:
+            role = _resolve_role(user_id, *row)
+            if generation == _generation:
+                role_cache.set((str(user_id), community_id), role)
+            roles[community_id] = role or None
+        return roles
+
+    @staticmethod
+    def allows(role, action: str):
+        minimum_role, _ = ACTIONS[action]
+        if role is None:
+            return False
+        return ROLE_RANK.get(role, ROLE_RANK["member"]) >= ROLE_RANK[minimum_role]
+
+    @staticmethod
+    def can(db: Session, community_id: int, user_id: UUID, action: str):
+        role = AuthorizationService.get_role(db, community_id, user_id)
+        return AuthorizationService.allows(role, action)
+
+    @staticmethod
+    def require(db: Session, community_id: int, user_id: UUID, action: str):
+        if not AuthorizationService.can(db, community_id, user_id, action):
+            raise Exception(ACTIONS[action][1])
+
+    @staticmethod
+    def invalidate_on_commit(db: Session, community_id: int, user_id: UUID = None):
+        """invalidate() once db's transaction commits, on every worker in postgres mode.
+
+        Call it before the commit; nothing happens if the transaction rolls back.
+        """
+        payload = f"{community_id}:{user_id}" if user_id is not None else str(community_id)
+        db.info.setdefault(_PENDING, set()).add(payload)
+        if AUTHZ_CACHE_BROADCAST == "postgres":
+            # Delivered by Postgres only if the transaction commits
+            db.execute(
+                text("SELECT pg_notify(:channel, :payload)"),
+                {"channel": AUTHZ_CACHE_CHANNEL, "payload": payload}
+            )
+
+    @staticmethod
+    def invalidate(community_id: int, user_id: UUID = None):
+        """Drop this worker's cached grants; every user of the community if user_id is None."""
+        global _generation
+        with _generation_lock:
+            _generation += 1
+        if user_id is not None:
+            role_cache.delete((str(user_id), community_id))
+        else:
+            role_cache.delete_where(lambda key, role: key[1] == community_id)
+
+    @staticmethod
+    def stats():
+        return {**role_cache.stats(), "broadcast": AUTHZ_CACHE_BROADCAST}
+
+
+AsyncAuthorizationService = async_service(AuthorizationService)
+
+
+def _apply_invalidations(payloads):
+    for payload in payloads:
+        try:
+            community_id, _, user_id = payload.partition(":")
+            AuthorizationService.invalidate(int(community_id), user_id or None)
+        except ValueError:
+            logger.error(f"Ignoring malformed authorization invalidation {payload!r}")
+
+
+@event.listens_for(Session, "after_commit")
+def invalidate_committed_grants(session):
+    payloads = session.info.pop(_PENDING, None)
+    if payloads:
+        # Right away on this worker; the NOTIFY (if any) repeats it harmlessly
+        _apply_invalidations(payloads)
+
+
+@event.listens_for(Session, "after_rollback")
+def forget_rolled_back_grants(session):
+    session.info.pop(_PENDING, None)
+
+
+if AUTHZ_CACHE_BROADCAST == "postgres":
+    # Listener-thread handler for what other workers committed (our own NOTIFYs included)
+    pg_listener.on(AUTHZ_CACHE_CHANNEL, _apply_invalidations)
@@ -0,0 +1,94 @@
+from sqlalchemy import and_, func, or_, text
+from sqlalchemy.orm import Session
+from config.db import SessionLocal
+from config.listener import pg_listener
+from models import Message, User
+from schemas.chat.chat_schema import MessageResponse
+from services.chat.chat_hub import chat_hub
+from datetime import timedelta
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# "local" delivers only to sockets on the worker that saved the message;
+# "postgres" fans out to every worker through NOTIFY (needed with >1 worker)
+CHAT_BROADCAST = os.environ.get("CHAT_BROADCAST", "local").lower()
+CHAT_CHANNEL = "chat_messages"
+# Announced messages were sent moments ago; this bound lets the relay query
+# skip every monthly partition but the newest ones
+RELAY_MAX_AGE = timedelta(hours=1)
+
+
+def message_event(message, sender: User = None):
+    """Wire format pushed to chat subscribers; is_sender is filled in per recipient.
+
+    `message` is a Message or any row with the same attributes (batch INSERT ... RETURNING).
+    """
+    payload = MessageResponse.model_validate(message)
+    payload.sender_display_name = (sender.display_name or sender.username or sender.email) if sender else "Unknown User"
+    return {
+        "type": "message",
+        "message": payload.model_dump(mode="json")
+    }
+
+
+def announce_messages(db: Session, messages):
+    """Queue NOTIFYs for flushed messages; Postgres sends them only if the transaction commits"""
+    if CHAT_BROADCAST != "postgres" or not messages:
+        return
+    db.execute(
+        text("SELECT pg_notify(:channel, payload) FROM unnest(CAST(:payloads AS text[])) AS payload"),
+        {"channel": CHAT_CHANNEL, "payloads": [f"{m.chat_id}:{m.msg_id}" for m in messages]}
+    )
+
+
+def deliver_messages(db: Session, messages):
+    """After commit: push straight to this worker's subscribers unless NOTIFY will do it"""
+    if CHAT_BROADCAST == "postgres":
+        return
+    watched = [m for m in messages if chat_hub.has_subscribers(m.chat_id)]
+    if not watched:
+        return
+    sender_ids = {m.sender_id for m in watched if m.sender_id}
+    senders = {str(user.user_id): user for user in db.query(User).filter(User.user_id.in_(sender_ids))} if sender_ids else {}
+    chat_hub.publish_many_threadsafe([
+        (m.chat_id, message_event(m, senders.get(str(m.sender_id)))) for m in watched
+    ])
+
+
+def relay_notifications(payloads):
+    """Listener-thread handler: load a batch of announced messages and publish them.
+
+    Duplicates collapse, rooms nobody on this worker watches are skipped, and
+    the rest is read in one query from the primary (a replica may lag the NOTIFY),
+    per room on the (chat_id, msg_id) index.
+    """
+    by_chat = {}
+    for payload in payloads:
+        try:
+            chat_id, msg_id = (int(part) for part in payload.split(":"))
+        except ValueError:
+            logger.error(f"Ignoring malformed chat notification {payload!r}")
+            continue
+        if chat_hub.has_subscribers(chat_id):
+            by_chat.setdefault(chat_id, set()).add(msg_id)
+    if not by_chat:
+        return
+
+    db = SessionLocal()
+    try:
+        rows = db.query(Message, User).outerjoin(
+            User, Message.sender_id == User.user_id
+        ).filter(
+            Message.sent_at >= func.now() - RELAY_MAX_AGE,
+            or_(*(and_(Message.chat_id == chat_id, Message.msg_id.in_(msg_ids)) for chat_id, msg_ids in by_chat.items()))
+        ).order_by(Message.msg_id).all()
+        events = [(message.chat_id, message_event(message, sender)) for message, sender in rows]
+    finally:
+        db.close()
+    chat_hub.publish_many_threadsafe(events)
+
+
+if CHAT_BROADCAST == "postgres":
+    pg_listener.on(CHAT_CHANNEL, relay_notifications)
@@ -0,0 +1,128 @@
+import asyncio
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Events buffered per subscriber before it counts as too slow and is cut off
+CHAT_SUBSCRIBER_QUEUE_SIZE = int(os.environ.get("CHAT_SUBSCRIBER_QUEUE_SIZE", "100"))
+# Sockets allowed per worker; further connections are refused
+CHAT_MAX_SUBSCRIBERS = int(os.environ.get("CHAT_MAX_SUBSCRIBERS", "10000"))
+
+
+class Subscription:
+    """One live consumer of a chat room, fed through a bounded queue."""
+
+    def __init__(self, chat_id: int, user_id, maxsize: int):
+        self.chat_id = chat_id
+        self.user_id = str(user_id)
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = False
+
+    def offer(self, event) -> bool:
+        """Enqueue without waiting; False once the subscriber has fallen behind."""
+        if self.dropped:
+            return False
+        try:
+            self.queue.put_nowait(event)
+            return True
+        except asyncio.QueueFull:
+            # Throw away the backlog and leave a None so the reader wakes up and disconnects
+            self.dropped = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+            return False
+
+    async def next(self, timeout: float = None):
+        """Next event, None when cut off; raises asyncio.TimeoutError on timeout."""
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+
+class ChatHub:
+    """In-process pub/sub of chat events, keyed by chat_id.
+
+    Queues live on the event loop, so publish() must run there; code on
+    other threads (services in the threadpool) uses publish_threadsafe().
+    """
+
+    def __init__(self, queue_size: int = CHAT_SUBSCRIBER_QUEUE_SIZE, max_subscribers: int = CHAT_MAX_SUBSCRIBERS):
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self._rooms = {}
+        self._lock = threading.Lock()
+        self._loop = None
+        self._subscribers = 0
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+
+    def subscribe(self, chat_id: int, user_id) -> Subscription:
+        self._loop = asyncio.get_running_loop()
+        subscription = Subscription(chat_id, user_id, self.queue_size)
+        with self._lock:
+            if self._subscribers >= self.max_subscribers:
+                raise Exception("Too many chat connections on this server")
+            self._rooms.setdefault(chat_id, set()).add(subscription)
+            self._subscribers += 1
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            room = self._rooms.get(subscription.chat_id)
+            if room is None or subscription not in room:
+                return
+            room.discard(subscription)
+            self._subscribers -= 1
+            if not room:
+                del self._rooms[subscription.chat_id]
+
+    def has_subscribers(self, chat_id: int) -> bool:
+        return chat_id in self._rooms
+
+    def publish(self, chat_id: int, event):
+        with self._lock:
+            subscribers = list(self._rooms.get(chat_id, ()))
+        self.published += 1
+        for subscription in subscribers:
+            if subscription.offer(event):
+                self.delivered += 1
+            elif subscription.dropped:
+                self.dropped += 1
+                logger.warning(f"Cutting off slow chat subscriber {subscription.user_id} in chat {chat_id}")
+                self.unsubscribe(subscription)
+
+    def publish_threadsafe(self, chat_id: int, event):
+        loop = self._loop
+        if loop is None or loop.is_closed() or not self.has_subscribers(chat_id):
+            return
+        loop.call_soon_threadsafe(self.publish, chat_id, event)
+
+    def publish_many(self, events):
+        for chat_id, event in events:
+            self.publish(chat_id, event)
+
+    def publish_many_threadsafe(self, events):
+        """Hand a batch of (chat_id, event) to the loop in a single wake-up"""
+        loop = self._loop
+        if loop is None or loop.is_closed() or not events:
+            return
+        loop.call_soon_threadsafe(self.publish_many, events)
+
+    def stats(self):
+        with self._lock:
+            rooms = len(self._rooms)
+            subscribers = self._subscribers
+        return {
+            "rooms": rooms,
+            "subscribers": subscribers,
+            "max_subscribers": self.max_subscribers,
+            "queue_size": self.queue_size,
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped_slow_subscribers": self.dropped,
+        }
+
+
+chat_hub = ChatHub()
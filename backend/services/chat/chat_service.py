@@ -1,29 +1,56 @@
+from sqlalchemy import func, insert, text, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
-from models import ChatRoom, Community, Membership, Message, User
+from models import ChatReadCursor, ChatRoom, Message, MessageArchive, User
 from schemas.chat.chat_schema import ChatRoomCreate, MessageCreate
+from services.authorization.authorization_service import AuthorizationService
+from services.common.pagination import decode_cursor, encode_cursor, paginate
+from services.chat.chat_broadcast import announce_messages, deliver_messages
+from datetime import datetime, timedelta
 from uuid import UUID
+from config.cache import LRUCache
+from config.db import async_service
 import logging
+import os
 
 logger = logging.getLogger(__name__)
 
+# chat_id -> community_id; a deleted room surfaces as a foreign key error on insert
+room_communities = LRUCache(maxsize=50000, ttl=3600)
+
+# Unread counts stop here (shown as "99+"), so a room never opened costs a bounded index scan
+CHAT_UNREAD_COUNT_CAP = int(os.environ.get("CHAT_UNREAD_COUNT_CAP", "100"))
+
+# msg_id is drawn at INSERT but visible only at COMMIT, so a slower transaction
+# can commit a lower id after a reader has moved past it. after_msg_id reads
+# therefore also return messages at or below it sent within this many seconds;
+# clients drop the ones they already have by msg_id.
+CHAT_SINCE_OVERLAP_SECONDS = float(os.environ.get("CHAT_SINCE_OVERLAP_SECONDS", "10"))
+
+# One row per room of the community. `pending` carries read positions this
+# worker has accepted but not written yet, so counts reflect them immediately.
+UNREAD_COUNTS_SQL = """
+SELECT r.chat_id,
+       nullif(greatest(coalesce(c.last_read_msg_id, 0), coalesce(p.msg_id, 0)), 0) AS last_read_msg_id,
+       (SELECT count(*) FROM (
+            SELECT 1 FROM messages m
+            WHERE m.chat_id = r.chat_id
+              AND m.msg_id > greatest(coalesce(c.last_read_msg_id, 0), coalesce(p.msg_id, 0))
+              AND m.sender_id IS DISTINCT FROM :user_id
+            LIMIT :cap
+       ) unread) AS unread_count
+FROM chat_rooms r
+LEFT JOIN chat_read_cursors c ON c.chat_id = r.chat_id AND c.user_id = :user_id
+LEFT JOIN unnest(CAST(:pending_chat_ids AS integer[]), CAST(:pending_msg_ids AS integer[])) AS p(chat_id, msg_id)
+       ON p.chat_id = r.chat_id
+WHERE r.community_id = :community_id
+ORDER BY r.chat_id
+"""
+
 class ChatService:
     @staticmethod
     def create_chat_room(db: Session, chat_room: ChatRoomCreate, user_id: UUID):
-        community = db.query(Community).filter(Community.community_id == chat_room.community_id).first()
-        if not community:
-            raise Exception("Community not found")
-        
-        is_owner = str(community.created_by) == str(user_id)
-        
-        if not is_owner:
-            membership = db.query(Membership).filter(
-                Membership.user_id == user_id,
-                Membership.community_id == chat_room.community_id
-            ).first()
-            
-            if not membership:
-                raise Exception("You must be a member of this community to create chat rooms")
+        AuthorizationService.require(db, chat_room.community_id, user_id, "create_chat_room")
         
         existing_room = db.query(ChatRoom).filter(
             ChatRoom.community_id == chat_room.community_id,
@@ -47,41 +74,69 @@ class ChatService:
     
     @staticmethod
     def get_community_chat_rooms(db: Session, community_id: int, user_id: UUID):
-        community = db.query(Community).filter(Community.community_id == community_id).first()
-        if not community:
-            raise Exception("Community not found")
-        
-        is_owner = str(community.created_by) == str(user_id)
-        
-        if not is_owner:
-            membership = db.query(Membership).filter(
-                Membership.user_id == user_id,
-                Membership.community_id == community_id
-            ).first()
-            
-            if not membership:
-                raise Exception("You must be a member of this community to view chat rooms")
+        AuthorizationService.require(db, community_id, user_id, "view_chat_rooms")
         
         chat_rooms = db.query(ChatRoom).filter(ChatRoom.community_id == community_id).all()
         
         return chat_rooms
     
+    @staticmethod
+    def get_room_community(db: Session, chat_id: int):
+        """community_id of a chat room; rooms never move, so the answer is cached"""
+        community_id = room_communities.get(chat_id)
+        if community_id is None:
+            community_id = db.query(ChatRoom.community_id).filter(ChatRoom.chat_id == chat_id).scalar()
+            if community_id is None:
+                raise Exception("Chat room not found")
+            room_communities.set(chat_id, community_id)
+        return community_id
+    
+    @staticmethod
+    def get_room_communities(db: Session, chat_ids):
+        """get_room_community for many rooms, misses in one query; unknown rooms are left out"""
+        communities = {}
+        missing = []
+        for chat_id in set(chat_ids):
+            community_id = room_communities.get(chat_id)
+            if community_id is None:
+                missing.append(chat_id)
+            else:
+                communities[chat_id] = community_id
+        if missing:
+            for chat_id, community_id in db.query(ChatRoom.chat_id, ChatRoom.community_id).filter(ChatRoom.chat_id.in_(missing)):
+                room_communities.set(chat_id, community_id)
+                communities[chat_id] = community_id
+        return communities
+    
+    @staticmethod
+    def readable_chats(db: Session, chat_ids, user_id: UUID):
+        """{chat_id: community_id} for the rooms among chat_ids the user may read"""
+        communities = ChatService.get_room_communities(db, chat_ids)
+        roles = AuthorizationService.get_roles(db, communities.values(), user_id)
+        return {
+            chat_id: community_id for chat_id, community_id in communities.items()
+            if AuthorizationService.allows(roles.get(community_id), "view_messages")
+        }
+    
+    @staticmethod
+    def readable_communities(db: Session, community_ids, user_id: UUID):
+        """The communities among community_ids whose chat the user may read"""
+        roles = AuthorizationService.get_roles(db, community_ids, user_id)
+        return [community_id for community_id, role in roles.items() if AuthorizationService.allows(role, "view_messages")]
+    
+    @staticmethod
+    def authorize_message(db: Session, chat_id: int, user_id: UUID):
+        community_id = ChatService.get_room_community(db, chat_id)
+        AuthorizationService.require(db, community_id, user_id, "send_message")
+    
+    @staticmethod
+    def authorize_read(db: Session, chat_id: int, user_id: UUID):
+        community_id = ChatService.get_room_community(db, chat_id)
+        AuthorizationService.require(db, community_id, user_id, "view_messages")
+    
     @staticmethod
     def send_message(db: Session, message: MessageCreate, user_id: UUID):
-        chat_room = db.query(ChatRoom).filter(ChatRoom.chat_id == message.chat_id).first()
-        if not chat_room:
-            raise Exception("Chat room not found")
-        
-        is_owner = str(chat_room.community.created_by) == str(user_id) if hasattr(chat_room, 'community') else False
-        
-        if not is_owner:
-            membership = db.query(Membership).filter(
-                Membership.user_id == user_id,
-                Membership.community_id == chat_room.community_id
-            ).first()
-            
-            if not membership:
-                raise Exception("You must be a member of this community to send messages")
+        ChatService.authorize_message(db, message.chat_id, user_id)
         
         db_message = Message(
             chat_id=message.chat_id,
@@ -91,50 +146,188 @@ class ChatService:
         )
         
         db.add(db_message)
+        db.flush()
+        announce_messages(db, [db_message])
         db.commit()
-        db.refresh(db_message)
         
+        deliver_messages(db, [db_message])
         return db_message
     
     @staticmethod
-    def get_chat_messages(db: Session, chat_id: int, user_id: UUID, skip: int = 0, limit: int = 50):
+    def insert_messages(db: Session, messages: list[dict]):
+        """Insert already-authorized messages with one INSERT ... RETURNING and one commit.
+
+        Returns the new rows in the order of `messages`. Used by the batched writer.
+        """
+        rows = db.execute(
+            insert(Message).returning(
+                Message.msg_id, Message.chat_id, Message.sender_id, Message.type, Message.content, Message.sent_at,
+                sort_by_parameter_order=True
+            ),
+            messages
+        ).all()
+        announce_messages(db, rows)
+        db.commit()
+        
+        deliver_messages(db, rows)
+        return rows
+    
+    @staticmethod
+    def get_chat_room(db: Session, chat_id: int, user_id: UUID):
+        """Chat room the user may read, for subscribing to it"""
         chat_room = db.query(ChatRoom).filter(ChatRoom.chat_id == chat_id).first()
         if not chat_room:
             raise Exception("Chat room not found")
         
-        community = db.query(Community).filter(Community.community_id == chat_room.community_id).first()
-        is_owner = str(community.created_by) == str(user_id) if community else False
+        AuthorizationService.require(db, chat_room.community_id, user_id, "view_messages")
+        return chat_room
+    
+    @staticmethod
+    def get_chat_messages(db: Session, chat_id: int, user_id: UUID, skip: int = 0, limit: int = 50, cursor: str = None, after_msg_id: int = None):
+        chat_room = db.query(ChatRoom).filter(ChatRoom.chat_id == chat_id).first()
+        if not chat_room:
+            raise Exception("Chat room not found")
         
-        if not is_owner:
-            membership = db.query(Membership).filter(
-                Membership.user_id == user_id,
-                Membership.community_id == chat_room.community_id
-            ).first()
-            
-            if not membership:
-                raise Exception("You must be a member of this community to view messages")
+        AuthorizationService.require(db, chat_room.community_id, user_id, "view_messages")
         
         messages_query = db.query(Message, User).join(
             User, Message.sender_id == User.user_id, isouter=True
-        ).filter(Message.chat_id == chat_id).order_by(desc(Message.sent_at))
+        ).filter(Message.chat_id == chat_id)
         
-        total_count = messages_query.count()
-        messages_with_users = messages_query.offset(skip).limit(limit).all()
+        if after_msg_id is not None:
+            # Incremental sync: what the client has not seen yet, oldest first, plus
+            # recent lower ids that may have committed after it last read
+            rows = messages_query.filter(Message.msg_id > after_msg_id).order_by(Message.msg_id).limit(limit + 1).all()
+            has_more = len(rows) > limit
+            late = []
+            if CHAT_SINCE_OVERLAP_SECONDS > 0:
+                late = messages_query.filter(
+                    Message.msg_id <= after_msg_id,
+                    Message.sent_at >= func.now() - timedelta(seconds=CHAT_SINCE_OVERLAP_SECONDS)
+                ).order_by(Message.msg_id).all()
+            messages_with_users, next_cursor = late + rows[:limit], None
+        else:
+            # Newest page first; next_cursor walks back into older history
+            columns = [Message.sent_at, Message.msg_id]
+            before = decode_cursor(cursor, columns) if cursor else None
+            if before:
+                # Plain bound on the partition key so old pages skip the newer partitions
+                messages_query = messages_query.filter(Message.sent_at <= before[0])
+            messages_with_users, has_more, next_cursor = paginate(
+                messages_query,
+                columns,
+                key=lambda row: (row[0].sent_at, row[0].msg_id),
+                cursor=cursor,
+                limit=limit,
+                skip=skip
+            )
+            if not has_more and (cursor or not skip):
+                # Hot partitions exhausted: carry on into the archive (offset paging stays hot-only)
+                if messages_with_users:
+                    before = (messages_with_users[-1][0].sent_at, messages_with_users[-1][0].msg_id)
+                archived, has_more = ChatService.get_archived_messages(
+                    db, chat_id, before, limit - len(messages_with_users)
+                )
+                messages_with_users += archived
+                if has_more:
+                    oldest = messages_with_users[-1][0]
+                    next_cursor = encode_cursor([oldest.sent_at, oldest.msg_id])
+            messages_with_users = list(reversed(messages_with_users))
         
         messages_data = []
-        for message, sender in reversed(messages_with_users):
+        for message, sender in messages_with_users:
             message.sender_display_name = sender.display_name or sender.username or sender.email if sender else "Unknown User"
             message.is_sender = user_id and str(message.sender_id) == str(user_id)
             messages_data.append(message)
         
-        has_more = skip + limit < total_count
-        
         return {
             "messages": messages_data,
-            "total_count": total_count,
-            "has_more": has_more
+            "has_more": has_more,
+            "next_cursor": next_cursor
         }
     
+    @staticmethod
+    def get_archived_messages(db: Session, chat_id: int, before=None, limit: int = 50):
+        """Archived messages of a room older than `before` (sent_at, msg_id), newest first.
+
+        Reads whole compacted chunks, newest first, until limit + 1 messages
+        are found. Returns ([(Message, sender)], has_more); the messages are
+        transient objects, never added to the session.
+        """
+        found = []
+        bound = before
+        while len(found) <= limit:
+            chunk_query = db.query(MessageArchive).filter(MessageArchive.chat_id == chat_id)
+            if bound is not None:
+                chunk_query = chunk_query.filter(
+                    tuple_(MessageArchive.first_sent_at, MessageArchive.first_msg_id) < tuple_(*bound)
+                )
+            chunk = chunk_query.order_by(
+                MessageArchive.first_sent_at.desc(), MessageArchive.first_msg_id.desc()
+            ).first()
+            if chunk is None:
+                break
+            for item in reversed(chunk.messages):
+                message = Message(
+                    msg_id=item["msg_id"],
+                    chat_id=chat_id,
+                    sender_id=UUID(item["sender_id"]) if item["sender_id"] else None,
+                    type=item["type"],
+                    content=item["content"],
+                    sent_at=datetime.fromisoformat(item["sent_at"])
+                )
+                if before is None or (message.sent_at, message.msg_id) < tuple(before):
+                    found.append(message)
+            bound = (chunk.first_sent_at, chunk.first_msg_id)
+        
+        has_more = len(found) > limit
+        found = found[:limit]
+        sender_ids = {message.sender_id for message in found if message.sender_id}
+        senders = {user.user_id: user for user in db.query(User).filter(User.user_id.in_(sender_ids))} if sender_ids else {}
+        return [(message, senders.get(message.sender_id)) for message in found], has_more
+    
+    @staticmethod
+    def get_unread_counts(db: Session, community_id: int, user_id: UUID, pending: dict = None):
+        """Unread messages per room of a community, in one query; other people's messages only."""
+        AuthorizationService.require(db, community_id, user_id, "view_messages")
+        
+        pending = pending or {}
+        rows = db.execute(text(UNREAD_COUNTS_SQL), {
+            "user_id": user_id,
+            "community_id": community_id,
+            "cap": CHAT_UNREAD_COUNT_CAP,
+            "pending_chat_ids": list(pending),
+            "pending_msg_ids": list(pending.values())
+        }).all()
+        return [
+            {"chat_id": chat_id, "last_read_msg_id": last_read_msg_id, "unread_count": unread_count}
+            for chat_id, last_read_msg_id, unread_count in rows
+        ]
+    
+    @staticmethod
+    def save_read_cursors(db: Session, cursors: dict):
+        """Upsert {(user_id, chat_id): last_read_msg_id} in one statement; cursors never move back.
+
+        Rooms deleted since the position was reported are skipped.
+        """
+        chat_ids = {chat_id for _, chat_id in cursors}
+        existing = {chat_id for (chat_id,) in db.query(ChatRoom.chat_id).filter(ChatRoom.chat_id.in_(chat_ids))}
+        # Sorted so concurrent flushes from several workers lock rows in the same order
+        rows = [
+            {"user_id": user_id, "chat_id": chat_id, "last_read_msg_id": msg_id}
+            for (user_id, chat_id), msg_id in sorted(cursors.items())
+            if chat_id in existing
+        ]
+        if rows:
+            statement = pg_insert(ChatReadCursor).values(rows)
+            db.execute(statement.on_conflict_do_update(
+                index_elements=[ChatReadCursor.user_id, ChatReadCursor.chat_id],
+                set_={"last_read_msg_id": statement.excluded.last_read_msg_id, "updated_at": func.now()},
+                where=ChatReadCursor.last_read_msg_id < statement.excluded.last_read_msg_id
+            ))
+        db.commit()
+        return len(rows)
+    
     @staticmethod
     def create_default_chat_room(db: Session, community_id: int):
         existing_general = db.query(ChatRoom).filter(
@@ -154,4 +347,7 @@ class ChatService:
             logger.info(f"Created default chat room for community {community_id}")
             return default_room
         
-        return existing_general
\ No newline at end of file
+        return existing_general
+
+
+AsyncChatService = async_service(ChatService)
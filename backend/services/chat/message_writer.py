@@ -0,0 +1,146 @@
+from config.db import db_session, env_flag, run_db
+from services.chat.chat_service import ChatService
+import asyncio
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Opt in to group commit for POST /chat/messages
+CHAT_BATCH_WRITES = env_flag("CHAT_BATCH_WRITES", "false")
+# How long the first message of a batch may wait for company
+CHAT_BATCH_MAX_DELAY_MS = float(os.environ.get("CHAT_BATCH_MAX_DELAY_MS", "5"))
+# Rows per INSERT; a full batch is written without waiting out the delay
+CHAT_BATCH_MAX_SIZE = int(os.environ.get("CHAT_BATCH_MAX_SIZE", "100"))
+# Messages allowed to queue up behind a slow commit before senders are made to wait
+CHAT_BATCH_QUEUE_LIMIT = int(os.environ.get("CHAT_BATCH_QUEUE_LIMIT", "10000"))
+
+
+_STOP = object()
+
+
+def _insert_one_by_one(db, messages):
+    """Fallback after a failed batch: commit the good rows, report each bad one."""
+    db.rollback()
+    results = []
+    for message in messages:
+        try:
+            results.append(ChatService.insert_messages(db, [message])[0])
+        except Exception as e:
+            db.rollback()
+            results.append(e)
+    return results
+
+
+class MessageBatchWriter:
+    """Group commit for chat messages.
+
+    Concurrent senders submit() already-authorized messages; a single flusher
+    task gathers them for up to max_delay (or until max_size), writes them
+    with one multi-row INSERT ... RETURNING and one COMMIT, and resolves each
+    caller's future with its own row. The next batch accumulates while the
+    current one commits.
+    """
+
+    def __init__(self, max_delay_ms: float = CHAT_BATCH_MAX_DELAY_MS, max_size: int = CHAT_BATCH_MAX_SIZE,
+                 queue_limit: int = CHAT_BATCH_QUEUE_LIMIT):
+        self.max_delay = max_delay_ms / 1000
+        self.max_size = max_size
+        self.queue_limit = queue_limit
+        self._queue = None
+        self._task = None
+        self.batches = 0
+        self.messages = 0
+        self.fallbacks = 0
+        self.largest_batch = 0
+
+    def _ensure_started(self):
+        # The queue and flusher belong to one event loop; start afresh if called from another
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._queue = asyncio.Queue(maxsize=self.queue_limit)
+            self._task = loop.create_task(self._run())
+
+    async def submit(self, chat_id: int, sender_id, content: str, type: str = "text"):
+        """Queue a message and wait until it is committed; returns its row as a dict"""
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        values = {"chat_id": chat_id, "sender_id": sender_id, "content": content, "type": type}
+        await self._queue.put((values, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is _STOP:
+                return
+            batch = [item]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_size:
+                # Take whatever is already queued, then wait out the rest of the delay
+                if self._queue.empty():
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), remaining)
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    item = self._queue.get_nowait()
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._flush(batch)
+
+    async def _flush(self, batch):
+        values = [item[0] for item in batch]
+        try:
+            async with db_session() as db:
+                try:
+                    results = await run_db(db, ChatService.insert_messages, values)
+                except Exception as e:
+                    # One bad row (e.g. its room was just deleted) must not fail its neighbours
+                    logger.error(f"Batched insert of {len(values)} messages failed, retrying one by one: {str(e)}")
+                    self.fallbacks += 1
+                    results = await run_db(db, _insert_one_by_one, values)
+        except Exception as e:
+            results = [e] * len(batch)
+
+        self.batches += 1
+        self.messages += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(dict(result._mapping))
+
+    async def close(self):
+        """Write what is queued, then stop the flusher; called on shutdown"""
+        if self._task is None or self._task.done():
+            return
+        await self._queue.put(_STOP)
+        await self._task
+        self._task = None
+
+    def stats(self):
+        return {
+            "enabled": CHAT_BATCH_WRITES,
+            "max_delay_ms": self.max_delay * 1000,
+            "max_size": self.max_size,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "batches": self.batches,
+            "messages": self.messages,
+            "avg_batch": round(self.messages / self.batches, 2) if self.batches else 0,
+            "largest_batch": self.largest_batch,
+            "fallbacks": self.fallbacks,
+        }
+
+
+message_writer = MessageBatchWriter()
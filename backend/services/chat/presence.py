@@ -0,0 +1,161 @@
+from collections import OrderedDict
+from itertools import chain, islice
+import asyncio
+import os
+import time
+
+# A user stays online this long after their last heartbeat (open sockets never expire)
+CHAT_PRESENCE_TTL_SECONDS = float(os.environ.get("CHAT_PRESENCE_TTL_SECONDS", "60"))
+# Heartbeat-only users tracked per room; past this the least recently seen one is dropped
+CHAT_PRESENCE_MAX_PER_ROOM = int(os.environ.get("CHAT_PRESENCE_MAX_PER_ROOM", "5000"))
+# How often rooms nobody reads are swept of expired users
+CHAT_PRESENCE_SWEEP_SECONDS = float(os.environ.get("CHAT_PRESENCE_SWEEP_SECONDS", "30"))
+
+
+def chat_key(chat_id: int):
+    return ("chat", chat_id)
+
+
+def community_key(community_id: int):
+    return ("community", community_id)
+
+
+class RoomPresence:
+    __slots__ = ("seen", "sockets")
+
+    def __init__(self):
+        # Users online by heartbeat: user_id -> expiry (monotonic), least recently seen first
+        self.seen = OrderedDict()
+        # Users with open sockets: user_id -> socket count. Never in `seen` at the same
+        # time, so the room's count is simply the sum of both sizes.
+        self.sockets = {}
+
+
+class PresenceTracker:
+    """Who is online, per chat room and per community, in this worker's memory.
+
+    Nothing is written to Postgres. A heartbeat moves the user to the back of
+    the room's OrderedDict with a fresh expiry, so the front always holds the
+    stalest entry: touching is O(1), and expiry pops from the front until it
+    meets a live entry (amortised O(1) per expired user). Counts expire lazily
+    on read; a periodic sweep drops rooms nobody asks about.
+
+    Users with an open socket are held apart and never expire; the per-room
+    cap applies to heartbeat users (sockets are bounded by the chat hub).
+    Only used from the event loop, so it needs no locking. Each worker counts
+    the users connected to it.
+    """
+
+    def __init__(self, ttl: float = CHAT_PRESENCE_TTL_SECONDS, max_per_room: int = CHAT_PRESENCE_MAX_PER_ROOM,
+                 sweep_interval: float = CHAT_PRESENCE_SWEEP_SECONDS):
+        self.ttl = ttl
+        self.max_per_room = max_per_room
+        self.sweep_interval = sweep_interval
+        self._rooms = {}
+        self._task = None
+        self.heartbeats = 0
+        self.expired = 0
+        self.evicted = 0
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._task = loop.create_task(self._run())
+
+    def _expire(self, room: RoomPresence, now: float):
+        seen = room.seen
+        while seen:
+            user_id, expires_at = next(iter(seen.items()))
+            if expires_at > now:
+                break
+            seen.popitem(last=False)
+            self.expired += 1
+
+    def touch(self, key, user_id, now: float = None):
+        """Heartbeat: the user is online in `key` for the next ttl seconds"""
+        self._ensure_started()
+        now = now or time.monotonic()
+        room = self._rooms.get(key)
+        if room is None:
+            room = self._rooms[key] = RoomPresence()
+        seen = room.seen
+        user_id = str(user_id)
+        if user_id in room.sockets:
+            return
+        if user_id in seen:
+            seen.move_to_end(user_id)
+        elif len(seen) >= self.max_per_room:
+            self._expire(room, now)
+            if len(seen) >= self.max_per_room:
+                seen.popitem(last=False)
+                self.evicted += 1
+        seen[user_id] = now + self.ttl
+        self.heartbeats += 1
+
+    def connect(self, key, user_id):
+        """A socket opened: online until the last of the user's sockets in `key` closes"""
+        self._ensure_started()
+        user_id = str(user_id)
+        room = self._rooms.get(key)
+        if room is None:
+            room = self._rooms[key] = RoomPresence()
+        room.seen.pop(user_id, None)
+        room.sockets[user_id] = room.sockets.get(user_id, 0) + 1
+
+    def disconnect(self, key, user_id):
+        user_id = str(user_id)
+        room = self._rooms.get(key)
+        if room is None or user_id not in room.sockets:
+            return
+        room.sockets[user_id] -= 1
+        if room.sockets[user_id] == 0:
+            # Closing the last socket means leaving, not going idle: no grace period
+            del room.sockets[user_id]
+            if not room.seen and not room.sockets:
+                del self._rooms[key]
+
+    def count(self, key, now: float = None) -> int:
+        room = self._rooms.get(key)
+        if room is None:
+            return 0
+        self._expire(room, now or time.monotonic())
+        return len(room.seen) + len(room.sockets)
+
+    def online(self, key, limit: int = 100, now: float = None):
+        """Online user ids in `key`: connected ones first, then most recently seen"""
+        room = self._rooms.get(key)
+        if room is None:
+            return []
+        self._expire(room, now or time.monotonic())
+        return list(islice(chain(room.sockets, reversed(room.seen)), limit))
+
+    def sweep(self, now: float = None):
+        now = now or time.monotonic()
+        for key, room in list(self._rooms.items()):
+            self._expire(room, now)
+            if not room.seen and not room.sockets:
+                del self._rooms[key]
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            self.sweep()
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def stats(self):
+        return {
+            "ttl_seconds": self.ttl,
+            "max_per_room": self.max_per_room,
+            "rooms": len(self._rooms),
+            "tracked": sum(len(room.seen) + len(room.sockets) for room in self._rooms.values()),
+            "heartbeats": self.heartbeats,
+            "expired": self.expired,
+            "evicted": self.evicted,
+        }
+
+
+presence = PresenceTracker()
@@ -0,0 +1,112 @@
+from config.db import db_session, run_db
+from services.chat.chat_service import ChatService
+import asyncio
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# How often this worker writes the read positions it has collected
+CHAT_READ_FLUSH_SECONDS = float(os.environ.get("CHAT_READ_FLUSH_SECONDS", "2"))
+
+
+def _raise(buffer: dict, user_id: str, chat_id: int, msg_id: int):
+    chats = buffer.setdefault(user_id, {})
+    if msg_id > chats.get(chat_id, 0):
+        chats[chat_id] = msg_id
+
+
+class ReadCursorBuffer:
+    """Coalesces "mark read" calls into one upsert per interval.
+
+    A client scrolling through a room reports a new position for almost every
+    message. Only the highest msg_id per (user, room) is kept, and a
+    background task writes everything collected with a single
+    INSERT ... ON CONFLICT every `interval` seconds. Positions only move
+    forward (the upsert checks too), so flushes from different workers
+    cannot rewind each other.
+    """
+
+    def __init__(self, interval: float = CHAT_READ_FLUSH_SECONDS):
+        self.interval = interval
+        # user_id -> {chat_id: msg_id}, so a user's lookup touches only their rooms
+        self._pending = {}
+        self._flushing = {}
+        self._task = None
+        self._closing = None
+        self.marked = 0
+        self.flushes = 0
+        self.written = 0
+        self.failures = 0
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._closing = asyncio.Event()
+            self._task = loop.create_task(self._run())
+
+    def mark(self, user_id, chat_id: int, msg_id: int):
+        """Record that the user has seen everything up to msg_id; written on the next flush"""
+        self._ensure_started()
+        _raise(self._pending, str(user_id), chat_id, msg_id)
+        self.marked += 1
+
+    def pending_for(self, user_id) -> dict:
+        """chat_id -> position accepted for this user but not yet in the database"""
+        user_id = str(user_id)
+        positions = dict(self._flushing.get(user_id, {}))
+        for chat_id, msg_id in self._pending.get(user_id, {}).items():
+            if msg_id > positions.get(chat_id, 0):
+                positions[chat_id] = msg_id
+        return positions
+
+    async def _run(self):
+        while not self._closing.is_set():
+            try:
+                await asyncio.wait_for(self._closing.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            await self.flush()
+
+    async def flush(self):
+        if not self._pending:
+            return
+        self._flushing, self._pending = self._pending, {}
+        cursors = {
+            (user_id, chat_id): msg_id
+            for user_id, chats in self._flushing.items()
+            for chat_id, msg_id in chats.items()
+        }
+        try:
+            async with db_session() as db:
+                self.written += await run_db(db, ChatService.save_read_cursors, cursors)
+            self.flushes += 1
+        except Exception as e:
+            # Keep the positions for the next attempt, merged with anything newer
+            logger.error(f"Saving {len(cursors)} read cursors failed: {str(e)}")
+            self.failures += 1
+            for (user_id, chat_id), msg_id in cursors.items():
+                _raise(self._pending, user_id, chat_id, msg_id)
+        finally:
+            self._flushing = {}
+
+    async def close(self):
+        """Write what is buffered and stop; called on shutdown"""
+        if self._task is None or self._task.done():
+            return
+        self._closing.set()
+        await self._task
+        self._task = None
+
+    def stats(self):
+        return {
+            "flush_seconds": self.interval,
+            "pending": sum(len(chats) for chats in self._pending.values()),
+            "marked": self.marked,
+            "flushes": self.flushes,
+            "written": self.written,
+            "failures": self.failures,
+        }
+
+
+read_cursors = ReadCursorBuffer()
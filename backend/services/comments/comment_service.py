@@ -1,12 +1,22 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
-from models import Comment, Post, Community, Membership, User
+from sqlalchemy import update
+from models import Comment, Post, User
 from schemas.comments.comment_schema import CommentCreate, CommentUpdate
+from services.authorization.authorization_service import AuthorizationService
+from services.common.pagination import paginate
 from uuid import UUID
+from config.cache import LRUCache
+from config.db import async_service
+from config.response_cache import community_scope, invalidate
 import logging
+import os
 
 logger = logging.getLogger(__name__)
 
+# post_id -> community_id for cached comment lists; a post never changes community
+POST_COMMUNITY_CACHE_SIZE = int(os.environ.get("POST_COMMUNITY_CACHE_SIZE", "50000"))
+post_communities = LRUCache(maxsize=POST_COMMUNITY_CACHE_SIZE, ttl=3600)
+
 class CommentService:
     @staticmethod
     def create_comment(db: Session, comment: CommentCreate, user_id: UUID):
@@ -14,17 +24,7 @@ class CommentService:
         if not post:
             raise Exception("Post not found")
         
-        community = db.query(Community).filter(Community.community_id == post.community_id).first()
-        is_owner = str(community.created_by) == str(user_id) if community else False
-        
-        if not is_owner:
-            membership = db.query(Membership).filter(
-                Membership.user_id == user_id,
-                Membership.community_id == post.community_id
-            ).first()
-            
-            if not membership:
-                raise Exception("You must be a member of this community to comment")
+        AuthorizationService.require(db, post.community_id, user_id, "comment")
         
         db_comment = Comment(
             content=comment.content,
@@ -33,6 +33,7 @@ class CommentService:
         )
         
         db.add(db_comment)
+        CommentService._add_to_comment_count(db, comment.post_id, 1)
         db.commit()
         db.refresh(db_comment)
         
@@ -40,48 +41,43 @@ class CommentService:
         return db_comment
     
     @staticmethod
-    def get_post_comments(db: Session, post_id: int, user_id: UUID = None, skip: int = 0, limit: int = 20):
+    def get_post_comments(db: Session, post_id: int, user_id: UUID = None, skip: int = 0, limit: int = 20, cursor: str = None):
         post = db.query(Post).filter(Post.post_id == post_id).first()
         if not post:
             raise Exception("Post not found")
         
         if user_id:
-            community = db.query(Community).filter(Community.community_id == post.community_id).first()
-            is_owner = str(community.created_by) == str(user_id) if community else False
-            
-            if not is_owner:
-                membership = db.query(Membership).filter(
-                    Membership.user_id == user_id,
-                    Membership.community_id == post.community_id
-                ).first()
-                
-                if not membership:
-                    raise Exception("You must be a member of this community to view comments")
+            AuthorizationService.require(db, post.community_id, user_id, "view_comments")
         
         comments_query = db.query(Comment, User).join(
             User, Comment.author_id == User.user_id
         ).filter(
             Comment.post_id == post_id
-        ).order_by(desc(Comment.created_at))
+        )
         
-        total_count = comments_query.count()
-        comments_with_users = comments_query.offset(skip).limit(limit).all()
+        comments_with_users, has_more, next_cursor = paginate(
+            comments_query,
+            [Comment.created_at, Comment.comment_id],
+            key=lambda row: (row[0].created_at, row[0].comment_id),
+            cursor=cursor,
+            limit=limit,
+            skip=skip
+        )
         
         comments_data = []
         for comment, author in comments_with_users:
             comment.author_display_name = author.display_name or author.username or author.email
-            comment.is_author = user_id and str(comment.author_id) == str(user_id)
+            comment.is_author = bool(user_id) and str(comment.author_id) == str(user_id)
             comments_data.append(comment)
         
-        has_more = skip + limit < total_count
-        page = (skip // limit) + 1 if limit > 0 else 1
+        page = (skip // limit) + 1 if limit > 0 and not cursor else None
         
         return {
             "comments": comments_data,
-            "total_count": total_count,
             "page": page,
             "page_size": limit,
-            "has_more": has_more
+            "has_more": has_more,
+            "next_cursor": next_cursor
         }
     
     @staticmethod
@@ -98,6 +94,7 @@ class CommentService:
         for field, value in update_data.items():
             setattr(db_comment, field, value)
         
+        invalidate(db, community_scope(CommentService.get_post_community(db, db_comment.post_id)))
         db.commit()
         db.refresh(db_comment)
         
@@ -115,7 +112,33 @@ class CommentService:
             raise Exception("You can only delete your own comments")
         
         db.delete(db_comment)
+        CommentService._add_to_comment_count(db, db_comment.post_id, -1)
         db.commit()
         
         logger.info(f"User {user_id} deleted comment {comment_id}")
-        return True
\ No newline at end of file
+        return True
+    
+    @staticmethod
+    def _add_to_comment_count(db: Session, post_id: int, delta: int):
+        community_id = db.execute(
+            update(Post).where(Post.post_id == post_id)
+            # Pin updated_at, or the column's onupdate would mark the post as edited
+            .values(comment_count=Post.comment_count + delta, updated_at=Post.updated_at)
+            .returning(Post.community_id)
+        ).scalar()
+        # The post's comment_count and its comment list are both cached with the community
+        if community_id is not None:
+            invalidate(db, community_scope(community_id))
+    
+    @staticmethod
+    def get_post_community(db: Session, post_id: int):
+        """community_id of a post, None if it does not exist"""
+        community_id = post_communities.get(post_id)
+        if community_id is None:
+            community_id = db.query(Post.community_id).filter(Post.post_id == post_id).scalar()
+            if community_id is not None:
+                post_communities.set(post_id, community_id)
+        return community_id
+
+
+AsyncCommentService = async_service(CommentService)
@@ -0,0 +1,52 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+from sqlalchemy import DateTime, tuple_
+import json
+
+
+def encode_cursor(values):
+    """Opaque, URL-safe token for the sort key of the last row on a page."""
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns):
+    try:
+        raw = urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError("wrong arity")
+        return [
+            datetime.fromisoformat(value) if isinstance(column.type, DateTime) else value
+            for column, value in zip(columns, values)
+        ]
+    except Exception:
+        raise Exception("Invalid cursor")
+
+
+def paginate(query, columns, key, cursor: str = None, limit: int = 20, skip: int = 0, descending: bool = True):
+    """Keyset pagination over `columns`, the last of which must be unique.
+
+    Fetches limit + 1 rows so has_more never needs a count(). `key(row)` returns
+    the values of `columns` for a result row and feeds the next cursor. `skip`
+    is honoured only without a cursor, for clients still paging by offset.
+
+    Returns (rows, has_more, next_cursor).
+    """
+    if cursor:
+        values = decode_cursor(cursor, columns)
+        position = tuple_(*columns)
+        boundary = tuple_(*values)
+        query = query.filter(position < boundary if descending else position > boundary)
+
+    ordering = [column.desc() if descending else column.asc() for column in columns]
+    query = query.order_by(*ordering)
+    if skip and not cursor:
+        query = query.offset(skip)
+    rows = query.limit(limit + 1).all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_cursor(key(rows[-1])) if has_more and rows else None
+    return rows, has_more, next_cursor
@@ -0,0 +1,92 @@
+from config.db import db_session, run_db
+from services.communities.community_service import BATCH_DELETE_SQL, CommunityService
+import asyncio
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Rows per DELETE statement of a background community deletion
+COMMUNITY_DELETE_BATCH_SIZE = int(os.environ.get("COMMUNITY_DELETE_BATCH_SIZE", "1000"))
+# Breather between batches, so replicas and autovacuum keep up
+COMMUNITY_DELETE_PAUSE_MS = float(os.environ.get("COMMUNITY_DELETE_PAUSE_MS", "50"))
+
+
+class CommunityDeleter:
+    """Deletes large communities a bounded batch at a time.
+
+    A single DELETE of a community cascades through every message, post,
+    comment and like in one transaction, holding locks and WAL until the
+    end. Here each table in BATCH_DELETE_SQL is emptied in short
+    transactions of batch_size rows, each of which also records progress in
+    community_deletions, and the community row goes last. The community
+    stays readable meanwhile; anything written to it during the run goes
+    with it in the final cascade.
+
+    Runs as tasks on this worker. A deletion interrupted by a restart stays
+    "running" and resumes from where it was when the owner asks again.
+    """
+
+    def __init__(self, batch_size: int = COMMUNITY_DELETE_BATCH_SIZE, pause_ms: float = COMMUNITY_DELETE_PAUSE_MS):
+        self.batch_size = batch_size
+        self.pause = pause_ms / 1000
+        self._tasks = {}
+        self.started = 0
+        self.finished = 0
+        self.failed = 0
+        self.deleted_rows = 0
+
+    def start(self, community_id: int):
+        loop = asyncio.get_running_loop()
+        task = self._tasks.get(community_id)
+        if task is not None and not task.done() and task.get_loop() is loop:
+            return
+        self._tasks[community_id] = loop.create_task(self._run(community_id))
+        self.started += 1
+
+    async def _run(self, community_id: int):
+        try:
+            for phase in BATCH_DELETE_SQL:
+                while True:
+                    async with db_session() as db:
+                        deleted = await run_db(db, CommunityService.delete_batch, community_id, phase, self.batch_size)
+                    self.deleted_rows += deleted
+                    if deleted < self.batch_size:
+                        break
+                    await asyncio.sleep(self.pause)
+            async with db_session() as db:
+                await run_db(db, CommunityService.finish_deletion, community_id)
+            self.finished += 1
+            logger.info(f"Deleted community {community_id} in the background")
+        except Exception as e:
+            logger.error(f"Background deletion of community {community_id} failed: {str(e)}")
+            self.failed += 1
+            try:
+                async with db_session() as db:
+                    await run_db(db, CommunityService.fail_deletion, community_id, str(e))
+            except Exception as e:
+                logger.error(f"Recording the failed deletion of community {community_id} failed: {str(e)}")
+        finally:
+            if self._tasks.get(community_id) is asyncio.current_task():
+                del self._tasks[community_id]
+
+    async def close(self):
+        """Stop on shutdown; each committed batch stays deleted and the rest resumes on request"""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    def stats(self):
+        return {
+            "batch_size": self.batch_size,
+            "running": len(self._tasks),
+            "started": self.started,
+            "finished": self.finished,
+            "failed": self.failed,
+            "deleted_rows": self.deleted_rows,
+        }
+
+
+community_deleter = CommunityDeleter()
@@ -1,22 +1,77 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from models import Community, Membership
+from sqlalchemy import and_, false, func, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from models import Community, CommunityDeletion, Membership
 from schemas.communities.community_schema import CommunityCreate, CommunityUpdate
 from services.chat.chat_service import ChatService
+from services.authorization.authorization_service import ACTIONS, AuthorizationService
 from uuid import UUID
+from config.db import async_service
+from config.response_cache import COMMUNITIES_SCOPE, community_scope, invalidate
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Background deletion empties these one bounded batch at a time, leaves first,
+# so no single statement (or its cascades) touches more than batch_size rows
+BATCH_DELETE_SQL = {
+    "messages": """
+        DELETE FROM messages WHERE (msg_id, sent_at) IN (
+            SELECT m.msg_id, m.sent_at FROM messages m JOIN chat_rooms r ON r.chat_id = m.chat_id
+            WHERE r.community_id = :community_id LIMIT :batch_size
+        )""",
+    "message_archive": """
+        DELETE FROM message_archive WHERE archive_id IN (
+            SELECT a.archive_id FROM message_archive a JOIN chat_rooms r ON r.chat_id = a.chat_id
+            WHERE r.community_id = :community_id LIMIT :batch_size
+        )""",
+    "chat_read_cursors": """
+        DELETE FROM chat_read_cursors WHERE (user_id, chat_id) IN (
+            SELECT c.user_id, c.chat_id FROM chat_read_cursors c JOIN chat_rooms r ON r.chat_id = c.chat_id
+            WHERE r.community_id = :community_id LIMIT :batch_size
+        )""",
+    "chat_rooms": """
+        DELETE FROM chat_rooms WHERE chat_id IN (
+            SELECT chat_id FROM chat_rooms WHERE community_id = :community_id LIMIT :batch_size
+        )""",
+    "likes": """
+        DELETE FROM likes WHERE like_id IN (
+            SELECT l.like_id FROM likes l JOIN posts p ON p.post_id = l.post_id
+            WHERE p.community_id = :community_id LIMIT :batch_size
+        )""",
+    "comments": """
+        DELETE FROM comments WHERE comment_id IN (
+            SELECT c.comment_id FROM comments c JOIN posts p ON p.post_id = c.post_id
+            WHERE p.community_id = :community_id LIMIT :batch_size
+        )""",
+    # Fan-out copies: a post's cascade would otherwise reach one row per member
+    "timeline_entries": """
+        DELETE FROM timeline_entries WHERE (user_id, created_at, post_id) IN (
+            SELECT t.user_id, t.created_at, t.post_id FROM timeline_entries t JOIN posts p ON p.post_id = t.post_id
+            WHERE p.community_id = :community_id LIMIT :batch_size
+        )""",
+    "posts": """
+        DELETE FROM posts WHERE post_id IN (
+            SELECT post_id FROM posts WHERE community_id = :community_id LIMIT :batch_size
+        )""",
+    "memberships": """
+        DELETE FROM memberships WHERE membership_id IN (
+            SELECT membership_id FROM memberships WHERE community_id = :community_id LIMIT :batch_size
+        )""",
+}
+
 class CommunityService:
     @staticmethod
     def create_community(db: Session, community: CommunityCreate, user_id: UUID):
         db_community = Community(
             name=community.name,
             description=community.description,
-            created_by=user_id
+            created_by=user_id,
+            # The owner counts as a member without a membership row
+            member_count=1 if user_id else 0
         )
         db.add(db_community)
+        invalidate(db, COMMUNITIES_SCOPE)
         db.commit()
         db.refresh(db_community)
         
@@ -37,40 +92,21 @@ class CommunityService:
     
     @staticmethod
     def get_community_with_details(db: Session, community_id: int, user_id: UUID = None):
-        community = db.query(Community).filter(Community.community_id == community_id).first()
+        """The community with member_count, is_member and is_owner, in one query"""
+        caller_membership = and_(
+            Membership.community_id == Community.community_id,
+            Membership.user_id == user_id
+        ) if user_id else false()
+        row = db.query(Community, Membership.membership_id).outerjoin(
+            Membership, caller_membership
+        ).filter(Community.community_id == community_id).first()
         
-        if not community:
+        if not row:
             return None
         
-        membership_count = db.query(Membership).filter(Membership.community_id == community_id).count()
-        
-        owner_has_membership = False
-        if community.created_by:
-            owner_membership = db.query(Membership).filter(
-                Membership.user_id == community.created_by,
-                Membership.community_id == community_id
-            ).first()
-            owner_has_membership = owner_membership is not None
-        
-        member_count = membership_count + (1 if community.created_by and not owner_has_membership else 0)
-        
-        is_member = False
-        is_owner = False
-        
-        if user_id:
-            is_owner = str(community.created_by) == str(user_id)
-            
-            if is_owner:
-                is_member = True
-            else:
-                membership = db.query(Membership).filter(
-                    Membership.user_id == user_id,
-                    Membership.community_id == community_id
-                ).first()
-                is_member = membership is not None
-        community.member_count = member_count
-        community.is_member = is_member
-        community.is_owner = is_owner
+        community, membership_id = row
+        community.is_owner = bool(user_id) and str(community.created_by) == str(user_id)
+        community.is_member = community.is_owner or membership_id is not None
         
         return community
 
@@ -80,28 +116,100 @@ class CommunityService:
         
         if not db_community:
             return None
-        if str(db_community.created_by) != str(user_id):
-            logger.error(f"Ownership check failed - user {user_id} cannot edit community {community_id} created by {db_community.created_by}")
-            raise Exception("You can only edit communities you created")
+        AuthorizationService.require(db, community_id, user_id, "edit_community")
         
         update_data = community_update.model_dump(exclude_unset=True)
         for field, value in update_data.items():
             setattr(db_community, field, value)
         
+        invalidate(db, COMMUNITIES_SCOPE, community_scope(community_id))
         db.commit()
         db.refresh(db_community)
         return db_community
 
+    @staticmethod
+    def _require_owner(db: Session, community_id: int, user_id: UUID):
+        """False if the community does not exist; raises unless user_id may delete it"""
+        if db.query(Community.community_id).filter(Community.community_id == community_id).first() is None:
+            return False
+        AuthorizationService.require(db, community_id, user_id, "delete_community")
+        return True
+
     @staticmethod
     def delete_community(db: Session, community_id: int, user_id: UUID):
-        db_community = db.query(Community).filter(Community.community_id == community_id).first()
-        
-        if not db_community:
+        """Delete in one transaction; posts, chat rooms and the rest go by ON DELETE CASCADE"""
+        if not CommunityService._require_owner(db, community_id, user_id):
             return None
-        if str(db_community.created_by) != str(user_id):
-            raise Exception("You can only delete communities you created")
         
-        db.delete(db_community)
+        db.query(Community).filter(Community.community_id == community_id).delete(synchronize_session=False)
+        invalidate(db, COMMUNITIES_SCOPE, community_scope(community_id))
+        AuthorizationService.invalidate_on_commit(db, community_id)
         db.commit()
         return True
 
+    @staticmethod
+    def start_deletion(db: Session, community_id: int, user_id: UUID):
+        """Record a background deletion (or restart an unfinished one); the caller runs the batches"""
+        if not CommunityService._require_owner(db, community_id, user_id):
+            return None
+        
+        statement = pg_insert(CommunityDeletion).values(
+            community_id=community_id, requested_by=user_id, status="running"
+        ).on_conflict_do_update(
+            index_elements=[CommunityDeletion.community_id],
+            set_={"requested_by": user_id, "status": "running", "error": None, "finished_at": None,
+                  "updated_at": func.now()}
+        ).returning(CommunityDeletion)
+        deletion = db.scalars(statement, execution_options={"populate_existing": True}).one()
+        db.commit()
+        return deletion
+
+    @staticmethod
+    def delete_batch(db: Session, community_id: int, phase: str, batch_size: int):
+        """Delete up to batch_size rows of one table and record the progress; returns the row count"""
+        deleted = db.execute(
+            text(BATCH_DELETE_SQL[phase]), {"community_id": community_id, "batch_size": batch_size}
+        ).rowcount
+        db.execute(
+            update(CommunityDeletion).where(CommunityDeletion.community_id == community_id)
+            .values(phase=phase, deleted_rows=CommunityDeletion.deleted_rows + deleted, updated_at=func.now())
+        )
+        if deleted:
+            invalidate(db, community_scope(community_id))
+        db.commit()
+        return deleted
+
+    @staticmethod
+    def finish_deletion(db: Session, community_id: int):
+        # Rows written while the batches ran are few; the cascade takes them with the community
+        deleted = db.query(Community).filter(Community.community_id == community_id).delete(synchronize_session=False)
+        db.execute(
+            update(CommunityDeletion).where(CommunityDeletion.community_id == community_id)
+            .values(status="done", phase=None, deleted_rows=CommunityDeletion.deleted_rows + deleted,
+                    updated_at=func.now(), finished_at=func.now())
+        )
+        invalidate(db, COMMUNITIES_SCOPE, community_scope(community_id))
+        AuthorizationService.invalidate_on_commit(db, community_id)
+        db.commit()
+
+    @staticmethod
+    def fail_deletion(db: Session, community_id: int, error: str):
+        db.execute(
+            update(CommunityDeletion).where(CommunityDeletion.community_id == community_id)
+            .values(status="failed", error=error, updated_at=func.now())
+        )
+        db.commit()
+
+    @staticmethod
+    def get_deletion(db: Session, community_id: int, user_id: UUID):
+        """Deletion progress, for the owner only; None if no deletion was recorded"""
+        deletion = db.query(CommunityDeletion).filter(CommunityDeletion.community_id == community_id).first()
+        if not deletion:
+            return None
+        # Once the community row is gone, whoever started the deletion was its owner
+        if not CommunityService._require_owner(db, community_id, user_id) and str(deletion.requested_by) != str(user_id):
+            raise Exception(ACTIONS["delete_community"][1])
+        return deletion
+
+
+AsyncCommunityService = async_service(CommunityService)
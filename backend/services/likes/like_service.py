@@ -1,6 +1,11 @@
 from sqlalchemy.orm import Session
-from models import Like, Post, Community, Membership
+from sqlalchemy import and_, delete, update
+from sqlalchemy.dialects.postgresql import insert
+from models import Like, Post
+from services.authorization.authorization_service import AuthorizationService
 from uuid import UUID
+from config.db import async_service
+from config.response_cache import community_scope, invalidate
 import logging
 
 logger = logging.getLogger(__name__)
@@ -8,58 +13,93 @@ logger = logging.getLogger(__name__)
 class LikeService:
     @staticmethod
     def toggle_like(db: Session, post_id: int, user_id: UUID):
-        post = db.query(Post).filter(Post.post_id == post_id).first()
+        post = db.query(Post.post_id, Post.community_id).filter(Post.post_id == post_id).first()
         if not post:
             raise Exception("Post not found")
         
-        community = db.query(Community).filter(Community.community_id == post.community_id).first()
-        is_owner = str(community.created_by) == str(user_id) if community else False
+        AuthorizationService.require(db, post.community_id, user_id, "like")
         
-        if not is_owner:
-            membership = db.query(Membership).filter(
-                Membership.user_id == user_id,
-                Membership.community_id == post.community_id
-            ).first()
-            
-            if not membership:
-                raise Exception("You must be a member of this community to like posts")
-        
-        existing_like = db.query(Like).filter(
-            Like.post_id == post_id,
-            Like.user_id == user_id
+        # The like row and the counter change commit together; uq_likes_post_user
+        # makes concurrent double-likes a no-op instead of a double increment
+        unliked = db.execute(
+            delete(Like).where(Like.post_id == post_id, Like.user_id == user_id).returning(Like.like_id)
         ).first()
         
-        if existing_like:
-            db.delete(existing_like)
-            db.commit()
-            logger.info(f"User {user_id} unliked post {post_id}")
-            like_count = db.query(Like).filter(Like.post_id == post_id).count()
-            return {
-                "post_id": post_id,
-                "is_liked": False,
-                "like_count": like_count,
-                "message": "Post unliked successfully"
-            }
+        if unliked:
+            like_count = LikeService._add_to_like_count(db, post_id, -1)
+            is_liked = False
         else:
-            new_like = Like(
-                post_id=post_id,
-                user_id=user_id
-            )
-            db.add(new_like)
-            db.commit()
-            db.refresh(new_like)
-            logger.info(f"User {user_id} liked post {post_id}")
-            like_count = db.query(Like).filter(Like.post_id == post_id).count()
-            return {
-                "post_id": post_id,
-                "is_liked": True,
-                "like_count": like_count,
-                "message": "Post liked successfully"
-            }
+            liked = db.execute(
+                insert(Like).values(post_id=post_id, user_id=user_id)
+                .on_conflict_do_nothing(index_elements=[Like.post_id, Like.user_id])
+                .returning(Like.like_id)
+            ).first()
+            like_count = LikeService._add_to_like_count(db, post_id, 1) if liked else None
+            is_liked = True
+        
+        if like_count is None:
+            like_count = db.query(Post.like_count).filter(Post.post_id == post_id).scalar()
+        invalidate(db, community_scope(post.community_id))
+        db.commit()
+        
+        logger.info(f"User {user_id} {'liked' if is_liked else 'unliked'} post {post_id}")
+        return {
+            "post_id": post_id,
+            "is_liked": is_liked,
+            "like_count": like_count,
+            "message": "Post liked successfully" if is_liked else "Post unliked successfully"
+        }
+    
+    @staticmethod
+    def _add_to_like_count(db: Session, post_id: int, delta: int):
+        return db.execute(
+            update(Post).where(Post.post_id == post_id)
+            # Pin updated_at, or the column's onupdate would mark the post as edited
+            .values(like_count=Post.like_count + delta, updated_at=Post.updated_at)
+            .returning(Post.like_count)
+        ).scalar()
     
     @staticmethod
     def get_post_likes_count(db: Session, post_id: int):
-        return db.query(Like).filter(Like.post_id == post_id).count()
+        return db.query(Post.like_count).filter(Post.post_id == post_id).scalar() or 0
+    
+    @staticmethod
+    def get_like_status(db: Session, post_id: int, user_id: UUID):
+        post = db.query(Post.post_id, Post.community_id, Post.like_count).filter(Post.post_id == post_id).first()
+        if not post:
+            raise Exception("Post not found")
+        
+        AuthorizationService.require(db, post.community_id, user_id, "view_posts")
+        
+        return {
+            "post_id": post_id,
+            "is_liked": LikeService.is_post_liked_by_user(db, post_id, user_id),
+            "like_count": post.like_count
+        }
+    
+    @staticmethod
+    def get_like_statuses(db: Session, post_ids: list[int], user_id: UUID):
+        """{post_id: {is_liked, like_count}} for a page of posts.
+
+        One query reads the counters and the user's likes together, one more
+        resolves the user's role in every community involved. Posts that do
+        not exist or that the user may not see are left out.
+        """
+        if not post_ids:
+            return {}
+        
+        rows = db.query(Post.post_id, Post.community_id, Post.like_count, Like.like_id).outerjoin(
+            Like,
+            and_(Like.post_id == Post.post_id, Like.user_id == user_id)
+        ).filter(Post.post_id.in_(set(post_ids))).all()
+        
+        roles = AuthorizationService.get_roles(db, {row.community_id for row in rows}, user_id)
+        
+        return {
+            row.post_id: {"is_liked": row.like_id is not None, "like_count": row.like_count}
+            for row in rows
+            if AuthorizationService.allows(roles.get(row.community_id), "view_posts")
+        }
     
     @staticmethod
     def is_post_liked_by_user(db: Session, post_id: int, user_id: UUID):
@@ -71,4 +111,7 @@ class LikeService:
             Like.user_id == user_id
         ).first()
         
-        return like is not None
\ No newline at end of file
+        return like is not None
+
+
+AsyncLikeService = async_service(LikeService)
@@ -1,7 +1,13 @@
 from sqlalchemy.orm import Session
+from sqlalchemy import exists, func, literal, or_, select, true, union_all, update
 from models import Membership, Community, User
 from schemas.memberships.membership_schema import MembershipCreate, UpdateMemberRoleRequest
+from services.authorization.authorization_service import AuthorizationService
+from services.common.pagination import paginate
+from services.timeline.timeline_service import TimelineService
 from uuid import UUID
+from config.db import async_service
+from config.response_cache import community_scope, invalidate
 import logging
 
 logger = logging.getLogger(__name__)
@@ -9,21 +15,14 @@ logger = logging.getLogger(__name__)
 class MembershipService:
     @staticmethod
     def join_community(db: Session, membership: MembershipCreate, user_id: UUID):
-        community = db.query(Community).filter(Community.community_id == membership.community_id).first()
-        if not community:
-            raise Exception("Community not found")
+        role = AuthorizationService.get_role(db, membership.community_id, user_id, fresh=True)
         
-        existing_membership = db.query(Membership).filter(
-            Membership.user_id == user_id,
-            Membership.community_id == membership.community_id
-        ).first()
+        if role == "owner":
+            raise Exception("You are the owner of this community")
         
-        if existing_membership:
+        if role:
             raise Exception("You are already a member of this community")
         
-        if str(community.created_by) == str(user_id):
-            raise Exception("You are the owner of this community")
-        
         db_membership = Membership(
             user_id=user_id,
             community_id=membership.community_id,
@@ -31,6 +30,10 @@ class MembershipService:
         )
         
         db.add(db_membership)
+        MembershipService._add_to_member_count(db, membership.community_id, 1)
+        TimelineService.add_member(db, membership.community_id, user_id)
+        invalidate(db, community_scope(membership.community_id))
+        AuthorizationService.invalidate_on_commit(db, membership.community_id, user_id)
         db.commit()
         db.refresh(db_membership)
         
@@ -39,34 +42,39 @@ class MembershipService:
     
     @staticmethod
     def leave_community(db: Session, community_id: int, user_id: UUID):
-        community = db.query(Community).filter(Community.community_id == community_id).first()
-        if not community:
-            raise Exception("Community not found")
+        role = AuthorizationService.get_role(db, community_id, user_id, fresh=True)
         
-        if str(community.created_by) == str(user_id):
+        if role == "owner":
             raise Exception("Community owners cannot leave their own community")
         
-        membership = db.query(Membership).filter(
+        deleted = db.query(Membership).filter(
             Membership.user_id == user_id,
             Membership.community_id == community_id
-        ).first()
+        ).delete(synchronize_session=False)
         
-        if not membership:
+        if not deleted:
             raise Exception("You are not a member of this community")
         
-        db.delete(membership)
+        MembershipService._add_to_member_count(db, community_id, -1)
+        TimelineService.remove_member(db, community_id, user_id)
+        invalidate(db, community_scope(community_id))
+        AuthorizationService.invalidate_on_commit(db, community_id, user_id)
         db.commit()
         
         logger.info(f"User {user_id} left community {community_id}")
         return True
     
+    @staticmethod
+    def _add_to_member_count(db: Session, community_id: int, delta: int):
+        db.execute(
+            update(Community).where(Community.community_id == community_id)
+            .values(member_count=Community.member_count + delta)
+        )
+    
     @staticmethod
     def is_member(db: Session, community_id: int, user_id: UUID):
-        membership = db.query(Membership).filter(
-            Membership.user_id == user_id,
-            Membership.community_id == community_id
-        ).first()
-        return membership is not None
+        role = AuthorizationService.get_role(db, community_id, user_id)
+        return role is not None and role != "owner"
     
     @staticmethod
     def get_user_communities(db: Session, user_id: UUID):
@@ -83,81 +91,93 @@ class MembershipService:
         return membership_data
     
     @staticmethod
-    def get_community_members(db: Session, community_id: int, requesting_user_id: UUID):
-        community = db.query(Community).filter(Community.community_id == community_id).first()
-        if not community:
-            raise Exception("Community not found")
-        
-        is_owner = str(community.created_by) == str(requesting_user_id)
-        
-        if not is_owner:
-            requesting_membership = db.query(Membership).filter(
-                Membership.user_id == requesting_user_id,
-                Membership.community_id == community_id
-            ).first()
-            
-            if not requesting_membership:
-                raise Exception("You must be a member of this community to view members")
-        
-        memberships_query = db.query(Membership, User).join(
-            User, Membership.user_id == User.user_id
-        ).filter(Membership.community_id == community_id)
-        
-        memberships_with_users = memberships_query.all()
-        
-        members_data = []
-        for membership, user in memberships_with_users:
-            member_data = {
-                "membership_id": membership.membership_id,
-                "user_id": str(user.user_id),
+    def _filter_members(query, role_column, role: str = None, search: str = None):
+        """Role and name-prefix filters shared by both halves of the member listing"""
+        if role:
+            query = query.where(role_column == role)
+        if search:
+            # Served by the lower(...) text_pattern_ops indexes on users
+            pattern = search.lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            query = query.where(or_(
+                func.lower(User.display_name).like(pattern, escape="\\"),
+                func.lower(User.username).like(pattern, escape="\\")
+            ))
+        return query
+    
+    @staticmethod
+    def get_community_members(db: Session, community_id: int, requesting_user_id: UUID, skip: int = 0, limit: int = 100,
+                              cursor: str = None, role: str = None, search: str = None):
+        AuthorizationService.require(db, community_id, requesting_user_id, "view_members")
+        members = MembershipService._filter_members(select(
+            Membership.membership_id,
+            Membership.user_id,
+            Membership.role,
+            Membership.joined_at,
+            User.display_name,
+            User.username,
+            User.email,
+            (Membership.user_id == Community.created_by).label("is_owner")
+        ).join(User, Membership.user_id == User.user_id).join(
+            Community, Membership.community_id == Community.community_id
+        ).where(Membership.community_id == community_id), Membership.role, role, search)
+        
+        # An owner without a membership row is listed as joining when the community
+        # was created, which sorts them ahead of every member on the first page
+        owner = MembershipService._filter_members(select(
+            literal(0).label("membership_id"),
+            User.user_id,
+            literal("owner").label("role"),
+            Community.created_at.label("joined_at"),
+            User.display_name,
+            User.username,
+            User.email,
+            true().label("is_owner")
+        ).select_from(Community).join(User, Community.created_by == User.user_id).where(
+            Community.community_id == community_id,
+            ~exists().where(
+                Membership.community_id == Community.community_id,
+                Membership.user_id == Community.created_by
+            )
+        ), literal("owner"), role, search)
+        
+        rows = union_all(members, owner).subquery("member_rows")
+        
+        # Oldest members first, matching ix_memberships_community_joined
+        page, has_more, next_cursor = paginate(
+            db.query(rows),
+            [rows.c.joined_at, rows.c.membership_id],
+            key=lambda row: (row.joined_at, row.membership_id),
+            cursor=cursor,
+            limit=limit,
+            skip=skip,
+            descending=False
+        )
+        
+        members_data = [
+            {
+                "membership_id": row.membership_id,
+                "user_id": str(row.user_id),
                 "community_id": community_id,
-                "role": membership.role,
-                "joined_at": membership.joined_at,
-                "user_display_name": user.display_name or user.username or user.email,
-                "is_owner": False
+                "role": row.role,
+                "joined_at": row.joined_at,
+                "user_display_name": row.display_name or row.username or row.email,
+                "is_owner": bool(row.is_owner)
             }
-            members_data.append(member_data)
-        
-        if community.created_by:
-            owner_in_members = any(member["user_id"] == str(community.created_by) for member in members_data)
-            
-            if not owner_in_members:
-                owner = db.query(User).filter(User.user_id == community.created_by).first()
-                if owner:
-                    owner_data = {
-                        "membership_id": 0,
-                        "user_id": str(owner.user_id),
-                        "community_id": community_id,
-                        "role": "owner",
-                        "joined_at": community.created_at,
-                        "user_display_name": owner.display_name or owner.username or owner.email,
-                        "is_owner": True
-                    }
-                    members_data.insert(0, owner_data)
-            else:
-                for member in members_data:
-                    if member["user_id"] == str(community.created_by):
-                        member["is_owner"] = True
-                        break
-        
-        return members_data
+            for row in page
+        ]
+        
+        return {
+            "members": members_data,
+            "has_more": has_more,
+            "next_cursor": next_cursor
+        }
     
     @staticmethod
     def update_member_role(db: Session, community_id: int, target_user_id: str, role_request: UpdateMemberRoleRequest, requesting_user_id: UUID):
-        community = db.query(Community).filter(Community.community_id == community_id).first()
-        if not community:
-            raise Exception("Community not found")
-        
-        is_owner = str(community.created_by) == str(requesting_user_id)
+        AuthorizationService.require(db, community_id, requesting_user_id, "manage_roles")
         
-        if not is_owner:
-            requesting_membership = db.query(Membership).filter(
-                Membership.user_id == requesting_user_id,
-                Membership.community_id == community_id
-            ).first()
-            
-            if not requesting_membership or requesting_membership.role not in ["owner", "admin"]:
-                raise Exception("You must be an owner or admin to change member roles")
+        if AuthorizationService.get_role(db, community_id, target_user_id) == "owner":
+            raise Exception("Cannot change the role of the community owner")
         
         target_membership = db.query(Membership).filter(
             Membership.user_id == target_user_id,
@@ -167,12 +187,13 @@ class MembershipService:
         if not target_membership:
             raise Exception("Target user is not a member of this community")
         
-        if str(community.created_by) == target_user_id:
-            raise Exception("Cannot change the role of the community owner")
-        
         target_membership.role = role_request.role
+        AuthorizationService.invalidate_on_commit(db, community_id, target_user_id)
         db.commit()
         db.refresh(target_membership)
         
         logger.info(f"User {requesting_user_id} changed role of user {target_user_id} to {role_request.role} in community {community_id}")
-        return target_membership
\ No newline at end of file
+        return target_membership
+
+
+AsyncMembershipService = async_service(MembershipService)
@@ -1,29 +1,28 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
-from models import Post, Community, Membership, User
+from models import Post, Community, User
 from schemas.posts.post_schema import PostCreate, PostUpdate
+from services.authorization.authorization_service import AuthorizationService
+from services.common.pagination import paginate
+from services.timeline.timeline_service import TimelineService
 from uuid import UUID
+from config.db import async_service
+from config.response_cache import community_scope, invalidate
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Feed orderings: keyset columns, the last one unique
+POST_SORTS = {
+    "new": [Post.created_at, Post.post_id],
+    # hot_score is maintained by a trigger on the like/comment counters (migration 0012)
+    "hot": [Post.hot_score, Post.post_id],
+}
+
 class PostService:
     @staticmethod
     def create_post(db: Session, post: PostCreate, user_id: UUID):
-        community = db.query(Community).filter(Community.community_id == post.community_id).first()
-        if not community:
-            raise Exception("Community not found")
-        
-        is_owner = str(community.created_by) == str(user_id)
+        AuthorizationService.require(db, post.community_id, user_id, "create_post")
         
-        if not is_owner:
-            membership = db.query(Membership).filter(
-                Membership.user_id == user_id,
-                Membership.community_id == post.community_id
-            ).first()
-            
-            if not membership:
-                raise Exception("You must be a member of this community to create posts")
         db_post = Post(
             content=post.content,
             media_url=post.media_url,
@@ -33,6 +32,10 @@ class PostService:
         )
         
         db.add(db_post)
+        db.flush()
+        # Committed with the post, so a timeline never shows a post that failed to save
+        TimelineService.fan_out(db, db_post)
+        invalidate(db, community_scope(post.community_id))
         db.commit()
         db.refresh(db_post)
         
@@ -40,46 +43,45 @@ class PostService:
         return db_post
     
     @staticmethod
-    def get_community_posts(db: Session, community_id: int, user_id: UUID = None, skip: int = 0, limit: int = 20):
-        community = db.query(Community).filter(Community.community_id == community_id).first()
-        if not community:
-            raise Exception("Community not found")
+    def get_community_posts(db: Session, community_id: int, user_id: UUID = None, skip: int = 0, limit: int = 20, cursor: str = None, sort: str = "new"):
+        columns = POST_SORTS.get(sort)
+        if columns is None:
+            raise Exception(f"Unknown sort: {sort}")
         
         if user_id:
-            is_owner = str(community.created_by) == str(user_id)
-            
-            if not is_owner:
-                membership = db.query(Membership).filter(
-                    Membership.user_id == user_id,
-                    Membership.community_id == community_id
-                ).first()
-                
-                if not membership:
-                    raise Exception("You must be a member of this community to view posts")
+            AuthorizationService.require(db, community_id, user_id, "view_posts")
+        elif not db.query(Community.community_id).filter(Community.community_id == community_id).first():
+            raise Exception("Community not found")
+        
         posts_query = db.query(Post, User).join(
             User, Post.author_id == User.user_id
         ).filter(
             Post.community_id == community_id
-        ).order_by(desc(Post.created_at))
+        )
         
-        total_count = posts_query.count()
-        posts_with_users = posts_query.offset(skip).limit(limit).all()
+        posts_with_users, has_more, next_cursor = paginate(
+            posts_query,
+            columns,
+            key=lambda row: [getattr(row[0], column.key) for column in columns],
+            cursor=cursor,
+            limit=limit,
+            skip=skip
+        )
         
         posts_data = []
         for post, author in posts_with_users:
             post.author_display_name = author.display_name or author.username or author.email
-            post.is_author = user_id and str(post.author_id) == str(user_id)
+            post.is_author = bool(user_id) and str(post.author_id) == str(user_id)
             posts_data.append(post)
         
-        has_more = skip + limit < total_count
-        page = (skip // limit) + 1 if limit > 0 else 1
+        page = (skip // limit) + 1 if limit > 0 and not cursor else None
         
         return {
             "posts": posts_data,
-            "total_count": total_count,
             "page": page,
             "page_size": limit,
-            "has_more": has_more
+            "has_more": has_more,
+            "next_cursor": next_cursor
         }
     
     @staticmethod
@@ -99,6 +101,7 @@ class PostService:
         for field, value in update_data.items():
             setattr(db_post, field, value)
         
+        invalidate(db, community_scope(db_post.community_id))
         db.commit()
         db.refresh(db_post)
         
@@ -116,7 +119,11 @@ class PostService:
             raise Exception("You can only delete your own posts")
         
         db.delete(db_post)
+        invalidate(db, community_scope(db_post.community_id))
         db.commit()
         
         logger.info(f"User {user_id} deleted post {post_id}")
-        return True
\ No newline at end of file
+        return True
+
+
+AsyncPostService = async_service(PostService)
@@ -0,0 +1,109 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import Float, cast, func, literal_column, select, union
+from models import Comment, Community, Membership, Post, User
+from services.authorization.authorization_service import AuthorizationService
+from services.common.pagination import paginate
+from uuid import UUID
+from config.db import async_service
+import logging
+
+logger = logging.getLogger(__name__)
+
+# The text search configuration of the search_vector triggers (migration 0011).
+# Inlined rather than bound, so every driver sees a regconfig.
+SEARCH_CONFIG = literal_column("'pg_catalog.english'::regconfig")
+# Highlighted words are wrapped in <mark>...</mark>; the rest is the raw content
+HEADLINE_OPTIONS = "StartSel=<mark>, StopSel=</mark>, MaxWords=35, MinWords=15, MaxFragments=2"
+
+
+class SearchService:
+    @staticmethod
+    def _scope(db: Session, user_id: UUID, community_id: int = None):
+        """Community ids to search: the one asked for, or every community of the user"""
+        if community_id is not None:
+            AuthorizationService.require(db, community_id, user_id, "view_posts")
+            return [community_id]
+        return union(
+            select(Membership.community_id).where(Membership.user_id == user_id),
+            select(Community.community_id).where(Community.created_by == user_id)
+        )
+
+    @staticmethod
+    def _headlines(db: Session, column, key_column, ids, query):
+        """key -> ts_headline, computed only for the rows on the page (it re-parses the content)"""
+        if not ids:
+            return {}
+        rows = db.query(key_column, func.ts_headline(SEARCH_CONFIG, column, query, HEADLINE_OPTIONS)).filter(
+            key_column.in_(ids)
+        ).all()
+        return dict(rows)
+
+    @staticmethod
+    def search_posts(db: Session, user_id: UUID, q: str, community_id: int = None, limit: int = 20, cursor: str = None):
+        """Posts matching `q` (web search syntax: quotes, OR, -word), best match first"""
+        query = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+        # float8, so the rank printed into the cursor compares exactly equal to the row's
+        rank = cast(func.ts_rank_cd(Post.search_vector, query), Float)
+        posts_query = db.query(Post, User, rank).join(
+            User, Post.author_id == User.user_id
+        ).filter(
+            Post.search_vector.bool_op("@@")(query),
+            Post.community_id.in_(SearchService._scope(db, user_id, community_id))
+        )
+
+        rows, has_more, next_cursor = paginate(
+            posts_query,
+            [rank, Post.post_id],
+            key=lambda row: (row[2], row[0].post_id),
+            cursor=cursor,
+            limit=limit
+        )
+
+        headlines = SearchService._headlines(db, Post.content, Post.post_id, [row[0].post_id for row in rows], query)
+        results = []
+        for post, author, score in rows:
+            post.author_display_name = author.display_name or author.username or author.email
+            post.is_author = str(post.author_id) == str(user_id)
+            post.rank = score
+            post.headline = headlines.get(post.post_id, post.content)
+            results.append(post)
+
+        return {"results": results, "has_more": has_more, "next_cursor": next_cursor}
+
+    @staticmethod
+    def search_comments(db: Session, user_id: UUID, q: str, community_id: int = None, limit: int = 20, cursor: str = None):
+        query = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+        rank = cast(func.ts_rank_cd(Comment.search_vector, query), Float)
+        comments_query = db.query(Comment, User, Post.community_id, rank).join(
+            Post, Comment.post_id == Post.post_id
+        ).join(
+            User, Comment.author_id == User.user_id
+        ).filter(
+            Comment.search_vector.bool_op("@@")(query),
+            Post.community_id.in_(SearchService._scope(db, user_id, community_id))
+        )
+
+        rows, has_more, next_cursor = paginate(
+            comments_query,
+            [rank, Comment.comment_id],
+            key=lambda row: (row[3], row[0].comment_id),
+            cursor=cursor,
+            limit=limit
+        )
+
+        headlines = SearchService._headlines(
+            db, Comment.content, Comment.comment_id, [row[0].comment_id for row in rows], query
+        )
+        results = []
+        for comment, author, post_community_id, score in rows:
+            comment.author_display_name = author.display_name or author.username or author.email
+            comment.is_author = str(comment.author_id) == str(user_id)
+            comment.community_id = post_community_id
+            comment.rank = score
+            comment.headline = headlines.get(comment.comment_id, comment.content)
+            results.append(comment)
+
+        return {"results": results, "has_more": has_more, "next_cursor": next_cursor}
+
+
+AsyncSearchService = async_service(SearchService)
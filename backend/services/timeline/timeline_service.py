@@ -0,0 +1,141 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, or_, select, text, tuple_, union
+from models import Community, Membership, Post, TimelineEntry, User
+from services.common.pagination import decode_cursor, encode_cursor
+from uuid import UUID
+from config.db import async_service
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Posts of communities up to this size are copied into every member's timeline
+# when written; bigger communities are merged in when a timeline is read
+TIMELINE_FANOUT_MAX_MEMBERS = int(os.environ.get("TIMELINE_FANOUT_MAX_MEMBERS", "1000"))
+# Recent posts of a community copied into the timeline of someone who joins it
+TIMELINE_JOIN_BACKFILL = int(os.environ.get("TIMELINE_JOIN_BACKFILL", "20"))
+
+# Every member plus an owner without a membership row; UNION drops the overlap
+FAN_OUT_SQL = text("""
+INSERT INTO timeline_entries (user_id, created_at, post_id)
+SELECT m.user_id, p.created_at, p.post_id
+FROM posts p JOIN memberships m ON m.community_id = p.community_id
+WHERE p.post_id = :post_id AND m.user_id IS NOT NULL
+UNION
+SELECT c.created_by, p.created_at, p.post_id
+FROM posts p JOIN communities c ON c.community_id = p.community_id
+WHERE p.post_id = :post_id AND c.created_by IS NOT NULL
+ON CONFLICT DO NOTHING
+""")
+
+JOIN_BACKFILL_SQL = text("""
+INSERT INTO timeline_entries (user_id, created_at, post_id)
+SELECT :user_id, created_at, post_id FROM posts
+WHERE community_id = :community_id
+ORDER BY created_at DESC, post_id DESC
+LIMIT :limit
+ON CONFLICT DO NOTHING
+""")
+
+LEAVE_SQL = text("""
+DELETE FROM timeline_entries t USING posts p
+WHERE t.user_id = :user_id AND p.post_id = t.post_id AND p.community_id = :community_id
+""")
+
+
+class TimelineService:
+    @staticmethod
+    def fan_out(db: Session, post: Post):
+        """Copy a new post into its community's timelines, in the caller's transaction.
+
+        Returns the number of timelines written; 0 once the community is read-time.
+        """
+        community = db.query(Community.member_count, Community.fanout_on_read).filter(
+            Community.community_id == post.community_id
+        ).first()
+        if community is None or community.fanout_on_read:
+            return 0
+        if community.member_count > TIMELINE_FANOUT_MAX_MEMBERS:
+            db.query(Community).filter(Community.community_id == post.community_id).update(
+                {"fanout_on_read": True}, synchronize_session=False
+            )
+            logger.info(f"Community {post.community_id} switched to read-time timeline merging")
+            return 0
+        return db.execute(FAN_OUT_SQL, {"post_id": post.post_id}).rowcount
+
+    @staticmethod
+    def add_member(db: Session, community_id: int, user_id: UUID):
+        """Seed a new member's timeline with the community's latest posts"""
+        fanout_on_read = db.query(Community.fanout_on_read).filter(Community.community_id == community_id).scalar()
+        if fanout_on_read is False:
+            db.execute(JOIN_BACKFILL_SQL, {
+                "user_id": user_id, "community_id": community_id, "limit": TIMELINE_JOIN_BACKFILL
+            })
+
+    @staticmethod
+    def remove_member(db: Session, community_id: int, user_id: UUID):
+        db.execute(LEAVE_SQL, {"user_id": user_id, "community_id": community_id})
+
+    @staticmethod
+    def read_time_communities(db: Session, user_id: UUID):
+        """Communities of the user whose posts are not in its timeline table"""
+        rows = db.query(Community.community_id).outerjoin(
+            Membership,
+            and_(Membership.community_id == Community.community_id, Membership.user_id == user_id)
+        ).filter(
+            Community.fanout_on_read,
+            or_(Membership.membership_id.isnot(None), Community.created_by == user_id)
+        ).all()
+        return [row.community_id for row in rows]
+
+    @staticmethod
+    def get_home_timeline(db: Session, user_id: UUID, limit: int = 20, cursor: str = None):
+        """Newest posts from every community of the user, keyset-paginated.
+
+        The materialized timeline and each read-time community contribute
+        their own newest limit + 1 rows after the cursor (each an index range
+        scan), and the union of those is merged and cut to the page.
+        """
+        before = decode_cursor(cursor, [TimelineEntry.created_at, TimelineEntry.post_id]) if cursor else None
+
+        def newest(query, created_at, post_id):
+            if before:
+                query = query.where(tuple_(created_at, post_id) < tuple_(*before))
+            return query.order_by(created_at.desc(), post_id.desc()).limit(limit + 1)
+
+        sources = [newest(
+            select(TimelineEntry.post_id, TimelineEntry.created_at).where(TimelineEntry.user_id == user_id),
+            TimelineEntry.created_at, TimelineEntry.post_id
+        )]
+        for community_id in TimelineService.read_time_communities(db, user_id):
+            sources.append(newest(
+                select(Post.post_id, Post.created_at).where(Post.community_id == community_id),
+                Post.created_at, Post.post_id
+            ))
+        timeline = union(*[source.subquery().select() for source in sources]).subquery("timeline")
+
+        rows = db.query(Post, User).join(
+            timeline, Post.post_id == timeline.c.post_id
+        ).join(
+            User, Post.author_id == User.user_id
+        ).order_by(
+            timeline.c.created_at.desc(), timeline.c.post_id.desc()
+        ).limit(limit + 1).all()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        posts_data = []
+        for post, author in rows:
+            post.author_display_name = author.display_name or author.username or author.email
+            post.is_author = str(post.author_id) == str(user_id)
+            posts_data.append(post)
+
+        return {
+            "posts": posts_data,
+            "page_size": limit,
+            "has_more": has_more,
+            "next_cursor": encode_cursor([rows[-1][0].created_at, rows[-1][0].post_id]) if has_more else None
+        }
+
+
+AsyncTimelineService = async_service(TimelineService)
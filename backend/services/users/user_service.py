@@ -1,7 +1,10 @@
 from sqlalchemy.orm import Session
-from models import User
+from sqlalchemy import select, union
+from models import Comment, Post, User
 from schemas.users.user_schema import UserProfileUpdate
 from uuid import UUID
+from config.db import async_service
+from config.response_cache import community_scope, invalidate
 import logging
 
 logger = logging.getLogger(__name__)
@@ -21,6 +24,11 @@ class UserService:
             raise Exception("User not found")
         
         update_data = profile_update.model_dump(exclude_unset=True)
+        # Feeds show the display name (not the bio), only where the user wrote something
+        if "display_name" in update_data and update_data["display_name"] != user.display_name:
+            community_ids = UserService._authored_community_ids(db, user_id)
+            if community_ids:
+                invalidate(db, *(community_scope(community_id) for community_id in community_ids))
         for field, value in update_data.items():
             setattr(user, field, value)
         
@@ -30,3 +38,13 @@ class UserService:
         logger.info(f"User {user_id} updated profile")
         return user
 
+    @staticmethod
+    def _authored_community_ids(db: Session, user_id: UUID):
+        posted = select(Post.community_id).where(Post.author_id == user_id)
+        commented = select(Post.community_id).join(Comment, Comment.post_id == Post.post_id).where(
+            Comment.author_id == user_id
+        )
+        return [community_id for community_id in db.scalars(union(posted, commented)) if community_id is not None]
+
+
+AsyncUserService = async_service(UserService)
@@ -1,4 +1,4 @@
-import api from './axios';
+import api, { API_URL } from './axios';
 
 export const createChatRoom = async (roomData) => {
   try {
@@ -30,12 +30,73 @@ export const sendMessage = async (messageData) => {
   }
 };
 
-export const getChatMessages = async (chatId, skip = 0, limit = 50) => {
+// Unread count per room of a community (capped server-side; 100 means "99+")
+export const getUnreadCounts = async (communityId) => {
   try {
-    const response = await api.get(`/chat/messages/${chatId}?skip=${skip}&limit=${limit}`);
+    const response = await api.get(`/chat/rooms/community/${communityId}/unread`);
+    return response.data;
+  } catch (error) {
+    console.error('Get unread counts error:', error.response?.data || error.message);
+    throw error.response?.data || error;
+  }
+};
+
+// Cheap to call on every new message: the server batches these writes
+export const markChatRead = async (chatId, lastReadMsgId) => {
+  try {
+    const response = await api.post(`/chat/rooms/${chatId}/read`, { last_read_msg_id: lastReadMsgId });
+    return response.data;
+  } catch (error) {
+    console.error('Mark chat read error:', error.response?.data || error.message);
+    throw error.response?.data || error;
+  }
+};
+
+// Online counts for several rooms at once: { chats: { [chatId]: n }, communities: {} }
+export const getPresence = async (chatIds) => {
+  try {
+    const response = await api.get('/chat/presence', {
+      params: { chat_ids: chatIds },
+      paramsSerializer: { indexes: null }
+    });
+    return response.data;
+  } catch (error) {
+    console.error('Get presence error:', error.response?.data || error.message);
+    throw error.response?.data || error;
+  }
+};
+
+// Pass the previous page's next_cursor to load older messages
+export const getChatMessages = async (chatId, cursor = null, limit = 50) => {
+  try {
+    const params = cursor ? { cursor, limit } : { limit };
+    const response = await api.get(`/chat/messages/${chatId}`, { params });
     return response.data;
   } catch (error) {
     console.error('Get chat messages error:', error.response?.data || error.message);
     throw error.response?.data || error;
   }
-};
\ No newline at end of file
+};
+
+// Messages newer than afterMsgId. With wait > 0 the server holds the request
+// (long-poll) until something arrives or `wait` seconds pass.
+export const getNewChatMessages = async (chatId, afterMsgId, wait = 0) => {
+  try {
+    const response = await api.get(`/chat/messages/${chatId}`, {
+      params: { after_msg_id: afterMsgId, wait },
+      timeout: (wait + 10) * 1000
+    });
+    return response.data;
+  } catch (error) {
+    console.error('Get new chat messages error:', error.response?.data || error.message);
+    throw error.response?.data || error;
+  }
+};
+
+// Live feed of new messages in a room. Browsers cannot set headers on a
+// WebSocket, so the token travels as the ["bearer", token] subprotocol pair.
+export const openChatSocket = (chatId) => {
+  const token = localStorage.getItem('authToken');
+  const url = `${API_URL.replace(/^http/, 'ws')}/chat/ws/${chatId}`;
+  return new WebSocket(url, ['bearer', token]);
+};
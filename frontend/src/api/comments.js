@@ -10,9 +10,10 @@ export const createComment = async (commentData) => {
   }
 };
 
-export const getPostComments = async (postId) => {
+export const getPostComments = async (postId, cursor = null, limit = 20) => {
   try {
-    const response = await api.get(`/comments/post/${postId}`);
+    const params = cursor ? { cursor, limit } : { limit };
+    const response = await api.get(`/comments/post/${postId}`, { params });
     return response.data;
   } catch (error) {
     console.error('Get post comments error:', error.response?.data || error.message);
@@ -18,4 +18,19 @@ export const getPostLikeStatus = async (postId) => {
     console.error('Get like status error:', error.response?.data || error.message);
     throw error.response?.data || error;
   }
-};
\ No newline at end of file
+};
+
+// One request for a whole feed page: resolves to { [postId]: { is_liked, like_count } }
+export const getPostsLikeStatus = async (postIds) => {
+  if (!postIds.length) return {};
+  try {
+    const response = await api.get('/likes/status', {
+      params: { post_ids: postIds },
+      paramsSerializer: { indexes: null }
+    });
+    return response.data;
+  } catch (error) {
+    console.error('Get like statuses error:', error.response?.data || error.message);
+    throw error.response?.data || error;
+  }
+};
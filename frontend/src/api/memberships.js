@@ -40,9 +40,13 @@ export const getMyCommunities = async () => {
   }
 };
 
-export const getCommunityMembers = async (communityId) => {
+export const getCommunityMembers = async (communityId, { cursor = null, search = '', role = '', limit = 50 } = {}) => {
   try {
-    const response = await api.get(`/memberships/community/${communityId}/members`);
+    const params = { limit };
+    if (cursor) params.cursor = cursor;
+    if (search) params.search = search;
+    if (role) params.role = role;
+    const response = await api.get(`/memberships/community/${communityId}/members`, { params });
     return response.data;
   } catch (error) {
     console.error('Get community members error:', error.response?.data || error.message);
@@ -10,9 +10,12 @@ export const createPost = async (postData) => {
   }
 };
 
-export const getCommunityPosts = async (communityId, skip = 0, limit = 20) => {
+// Pass the previous page's next_cursor to load older posts
+// sort is 'new' (newest first) or 'hot' (likes and comments, weighed against age)
+export const getCommunityPosts = async (communityId, cursor = null, limit = 20, sort = 'new') => {
   try {
-    const response = await api.get(`/posts/community/${communityId}?skip=${skip}&limit=${limit}`);
+    const params = cursor ? { cursor, limit, sort } : { limit, sort };
+    const response = await api.get(`/posts/community/${communityId}`, { params });
     return response.data;
   } catch (error) {
     console.error('Get community posts error:', error.response?.data || error.message);
@@ -20,6 +23,18 @@ export const getCommunityPosts = async (communityId, skip = 0, limit = 20) => {
   }
 };
 
+// Newest posts from every community the user belongs to
+export const getHomeTimeline = async (cursor = null, limit = 20) => {
+  try {
+    const params = cursor ? { cursor, limit } : { limit };
+    const response = await api.get('/timeline/home', { params });
+    return response.data;
+  } catch (error) {
+    console.error('Get home timeline error:', error.response?.data || error.message);
+    throw error.response?.data || error;
+  }
+};
+
 export const getPost = async (postId) => {
   try {
     const response = await api.get(`/posts/${postId}`);
@@ -0,0 +1,28 @@
+import api from './axios';
+
+// Full-text search; `q` supports "exact phrases", OR and -excluded words
+export const searchPosts = async (q, { communityId = null, cursor = null, limit = 20 } = {}) => {
+  try {
+    const params = { q, limit };
+    if (communityId) params.community_id = communityId;
+    if (cursor) params.cursor = cursor;
+    const response = await api.get('/search/posts', { params });
+    return response.data;
+  } catch (error) {
+    console.error('Search posts error:', error.response?.data || error.message);
+    throw error.response?.data || error;
+  }
+};
+
+export const searchComments = async (q, { communityId = null, cursor = null, limit = 20 } = {}) => {
+  try {
+    const params = { q, limit };
+    if (communityId) params.community_id = communityId;
+    if (cursor) params.cursor = cursor;
+    const response = await api.get('/search/comments', { params });
+    return response.data;
+  } catch (error) {
+    console.error('Search comments error:', error.response?.data || error.message);
+    throw error.response?.data || error;
+  }
+};
@@ -1,13 +1,15 @@
 import React, { useState, useEffect, useRef, useCallback } from 'react';
-import { getChatMessages } from '../api/chat';
+import { getChatMessages, getNewChatMessages, markChatRead, openChatSocket } from '../api/chat';
 import MessageItem from './MessageItem';
 import MessageForm from './MessageForm';
 
-const ChatRoom = ({ chatRoom }) => {
+const ChatRoom = ({ chatRoom, onRead }) => {
   const [messages, setMessages] = useState([]);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState(null);
   const messagesEndRef = useRef(null);
+  const lastMsgIdRef = useRef(null);
+  const lastMarkedRef = useRef(null);
   const messagesContainerRef = useRef(null);
 
   // Fetch messages when chat room changes
@@ -39,16 +41,93 @@ const ChatRoom = ({ chatRoom }) => {
     }
   }, [chatRoom?.chat_id, fetchMessages]);
 
-  // Auto-refresh messages every 1.5 seconds for faster updates
+  useEffect(() => {
+    lastMsgIdRef.current = messages.length ? messages[messages.length - 1].msg_id : null;
+  }, [messages]);
+
+  useEffect(() => {
+    lastMarkedRef.current = null;
+  }, [chatRoom?.chat_id]);
+
+  // Everything on screen counts as read
+  useEffect(() => {
+    const last = messages[messages.length - 1];
+    // Right after switching rooms the previous room's messages are still shown
+    if (!chatRoom || !last || last.chat_id !== chatRoom.chat_id) return;
+    const lastMsgId = last.msg_id;
+    if (lastMsgId <= (lastMarkedRef.current ?? 0)) return;
+    lastMarkedRef.current = lastMsgId;
+    markChatRead(chatRoom.chat_id, lastMsgId).catch(() => {});
+    onRead?.(chatRoom.chat_id);
+  }, [messages, chatRoom, onRead]);
+
+  const appendMessages = useCallback((incoming) => {
+    setMessages(prev => {
+      const known = new Set(prev.map(message => message.msg_id));
+      const fresh = incoming.filter(message => !known.has(message.msg_id));
+      // A late commit can carry a lower id than what is already shown
+      return fresh.length ? [...prev, ...fresh].sort((a, b) => a.msg_id - b.msg_id) : prev;
+    });
+  }, []);
+
+  // Catch up on whatever was sent while the socket was down
+  const syncMissedMessages = useCallback(async () => {
+    if (lastMsgIdRef.current === null) {
+      fetchMessages(false);
+      return;
+    }
+    try {
+      const result = await getNewChatMessages(chatRoom.chat_id, lastMsgIdRef.current);
+      appendMessages(result.messages);
+    } catch (err) {
+      console.error('Failed to sync messages:', err);
+    }
+  }, [chatRoom, fetchMessages, appendMessages]);
+
+  // New messages are pushed over a WebSocket. After a drop we reconnect with
+  // backoff and fetch only what was sent in between.
   useEffect(() => {
     if (!chatRoom) return;
 
-    const intervalId = setInterval(() => {
-      fetchMessages(false); // Don't show loading during polling
-    }, 1500); // Poll every 1.5 seconds for faster updates
+    let socket = null;
+    let retryTimer = null;
+    let retryDelay = 1000;
+    let closedByUs = false;
 
-    return () => clearInterval(intervalId);
-  }, [chatRoom?.chat_id, fetchMessages]);
+    const connect = () => {
+      socket = openChatSocket(chatRoom.chat_id);
+
+      socket.onopen = () => {
+        // Also covers messages sent between the initial fetch and the subscription
+        if (lastMsgIdRef.current !== null || retryDelay > 1000) {
+          syncMissedMessages();
+        }
+        retryDelay = 1000;
+      };
+
+      socket.onmessage = (event) => {
+        const data = JSON.parse(event.data);
+        if (data.type !== 'message') return;
+        appendMessages([data.message]);
+      };
+
+      socket.onclose = (event) => {
+        if (closedByUs) return;
+        // 1008: not allowed in this room (left the community, token expired)
+        if (event.code === 1008) return;
+        retryTimer = setTimeout(connect, retryDelay);
+        retryDelay = Math.min(retryDelay * 2, 30000);
+      };
+    };
+
+    connect();
+
+    return () => {
+      closedByUs = true;
+      clearTimeout(retryTimer);
+      socket?.close();
+    };
+  }, [chatRoom?.chat_id, syncMissedMessages, appendMessages]);
 
   // Auto-scroll to bottom when new messages arrive
   const scrollToBottom = () => {
@@ -59,14 +138,9 @@ const ChatRoom = ({ chatRoom }) => {
     scrollToBottom();
   }, [messages]);
 
-  // Handle new message sent - refresh immediately to get latest messages
+  // The socket echoes our own message too; the msg_id check above drops the duplicate
   const handleMessageSent = (newMessage) => {
-    // Optimistically add the message
-    setMessages(prev => [...prev, newMessage]);
-    // Immediately fetch latest messages to get any other new messages
-    setTimeout(() => {
-      fetchMessages(false);
-    }, 500); // Small delay to ensure server has processed the message
+    appendMessages([newMessage]);
   };
 
   if (!chatRoom) {
@@ -1,5 +1,5 @@
-import React, { useState, useEffect } from 'react';
-import { getCommunityChatRooms, createChatRoom } from '../api/chat';
+import React, { useState, useEffect, useCallback } from 'react';
+import { getCommunityChatRooms, createChatRoom, getPresence, getUnreadCounts } from '../api/chat';
 import ChatRoom from './ChatRoom';
 import { Button } from './ui/button';
 import { Input } from './ui/input';
@@ -12,6 +12,8 @@ const ChatSection = ({ communityId, isVisible }) => {
   const [showCreateRoom, setShowCreateRoom] = useState(false);
   const [newRoomTitle, setNewRoomTitle] = useState('');
   const [createLoading, setCreateLoading] = useState(false);
+  const [unreadCounts, setUnreadCounts] = useState({});
+  const [onlineCounts, setOnlineCounts] = useState({});
 
   // Fetch chat rooms when section becomes visible
   const fetchChatRooms = async () => {
@@ -42,6 +44,47 @@ const ChatSection = ({ communityId, isVisible }) => {
     }
   }, [isVisible, communityId]);
 
+  // Rooms other than the open one are not watched live; one cheap request
+  // covers all of their badges
+  useEffect(() => {
+    if (!isVisible) return;
+
+    const fetchUnreadCounts = async () => {
+      try {
+        const counts = await getUnreadCounts(communityId);
+        setUnreadCounts(Object.fromEntries(counts.map(room => [room.chat_id, room.unread_count])));
+      } catch (err) {
+        console.error('Failed to fetch unread counts:', err);
+      }
+    };
+
+    fetchUnreadCounts();
+    const interval = setInterval(fetchUnreadCounts, 30000);
+    return () => clearInterval(interval);
+  }, [isVisible, communityId]);
+
+  // Online counts come from server memory, so refreshing them is cheap
+  useEffect(() => {
+    if (!isVisible || chatRooms.length === 0) return;
+
+    const fetchPresence = async () => {
+      try {
+        const result = await getPresence(chatRooms.map(room => room.chat_id));
+        setOnlineCounts(result.chats);
+      } catch (err) {
+        console.error('Failed to fetch presence:', err);
+      }
+    };
+
+    fetchPresence();
+    const interval = setInterval(fetchPresence, 30000);
+    return () => clearInterval(interval);
+  }, [isVisible, chatRooms]);
+
+  const handleRoomRead = useCallback((chatId) => {
+    setUnreadCounts(prev => (prev[chatId] ? { ...prev, [chatId]: 0 } : prev));
+  }, []);
+
   // Handle creating new chat room
   const handleCreateRoom = async (e) => {
     e.preventDefault();
@@ -161,7 +204,19 @@ const ChatSection = ({ communityId, isVisible }) => {
                       : 'hover:bg-neutral-100 text-neutral-700'
                   }`}
                 >
-                  # {room.title}
+                  <span className="flex items-center justify-between">
+                    <span>
+                      # {room.title}
+                      {onlineCounts[room.chat_id] > 0 && (
+                        <span className="ml-1 text-xs text-green-600">● {onlineCounts[room.chat_id]}</span>
+                      )}
+                    </span>
+                    {selectedRoom?.chat_id !== room.chat_id && unreadCounts[room.chat_id] > 0 && (
+                      <span className="ml-2 rounded-full bg-blue-600 px-2 text-xs text-white">
+                        {unreadCounts[room.chat_id] > 99 ? '99+' : unreadCounts[room.chat_id]}
+                      </span>
+                    )}
+                  </span>
                 </button>
               ))}
               
@@ -183,7 +238,7 @@ const ChatSection = ({ communityId, isVisible }) => {
         </div>
 
         {/* Chat room content */}
-        <ChatRoom chatRoom={selectedRoom} />
+        <ChatRoom chatRoom={selectedRoom} onRead={handleRoomRead} />
       </div>
     </div>
   );
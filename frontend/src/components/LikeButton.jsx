@@ -2,17 +2,20 @@ import React, { useState, useEffect } from 'react';
 import { togglePostLike, getPostLikeStatus } from '../api/likes';
 import { Button } from './ui/button';
 
-const LikeButton = ({ postId, initialLikeCount = 0, initialIsLiked = false }) => {
-  const [isLiked, setIsLiked] = useState(initialIsLiked);
+const LikeButton = ({ postId, initialLikeCount = 0, initialIsLiked }) => {
+  const [isLiked, setIsLiked] = useState(initialIsLiked ?? false);
   const [likeCount, setLikeCount] = useState(initialLikeCount);
   const [loading, setLoading] = useState(false);
 
-  // Fetch current like status on mount if not provided
+  // The feed loads like status for the whole page; only fetch when it wasn't given
   useEffect(() => {
-    if (initialLikeCount === 0 && !initialIsLiked) {
+    if (initialIsLiked === undefined) {
       fetchLikeStatus();
+    } else {
+      setIsLiked(initialIsLiked);
+      setLikeCount(initialLikeCount);
     }
-  }, [postId]);
+  }, [postId, initialIsLiked, initialLikeCount]);
 
   const fetchLikeStatus = async () => {
     try {
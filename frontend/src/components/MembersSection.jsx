@@ -7,6 +7,10 @@ const MembersSection = ({ communityId, isVisible, currentUserRole, isOwner }) =>
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState(null);
   const [updatingRoles, setUpdatingRoles] = useState({});
+  const [search, setSearch] = useState('');
+  const [roleFilter, setRoleFilter] = useState('');
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   const fetchMembers = async () => {
     if (!isVisible) return;
@@ -15,8 +19,9 @@ const MembersSection = ({ communityId, isVisible, currentUserRole, isOwner }) =>
     setError(null);
     
     try {
-      const result = await getCommunityMembers(communityId);
+      const result = await getCommunityMembers(communityId, { search: search.trim(), role: roleFilter });
       setMembers(result.members);
+      setNextCursor(result.next_cursor);
     } catch (err) {
       console.error('Failed to fetch members:', err);
       setError(err.detail || 'Failed to load members');
@@ -25,11 +30,27 @@ const MembersSection = ({ communityId, isVisible, currentUserRole, isOwner }) =>
     }
   };
 
-  useEffect(() => {
-    if (isVisible) {
-      fetchMembers();
+  const loadMore = async () => {
+    if (!nextCursor || loadingMore) return;
+    setLoadingMore(true);
+    try {
+      const result = await getCommunityMembers(communityId, { cursor: nextCursor, search: search.trim(), role: roleFilter });
+      setMembers(prev => [...prev, ...result.members]);
+      setNextCursor(result.next_cursor);
+    } catch (err) {
+      console.error('Failed to load more members:', err);
+      setError(err.detail || 'Failed to load members');
+    } finally {
+      setLoadingMore(false);
     }
-  }, [isVisible, communityId]);
+  };
+
+  // Debounce typing so each keystroke does not hit the API
+  useEffect(() => {
+    if (!isVisible) return;
+    const timer = setTimeout(fetchMembers, search ? 300 : 0);
+    return () => clearTimeout(timer);
+  }, [isVisible, communityId, search, roleFilter]);
 
   // Handle role change
   const handleRoleChange = async (targetUserId, newRole) => {
@@ -72,9 +93,31 @@ const MembersSection = ({ communityId, isVisible, currentUserRole, isOwner }) =>
   return (
     <div className="mt-4 pt-4 border-t border-neutral-200">
       <h4 className="font-semibold text-neutral-900 mb-4">
-        Community Members ({members.length})
+        Community Members
       </h4>
 
+      <div className="flex gap-2 mb-4">
+        <input
+          type="text"
+          value={search}
+          onChange={(e) => setSearch(e.target.value)}
+          placeholder="Search by name or username"
+          maxLength={100}
+          className="flex-1 text-sm border border-neutral-300 rounded px-3 py-2 focus:ring-2 focus:ring-blue-500 focus:border-transparent"
+        />
+        <select
+          value={roleFilter}
+          onChange={(e) => setRoleFilter(e.target.value)}
+          className="text-sm border border-neutral-300 rounded px-2 py-2 focus:ring-2 focus:ring-blue-500 focus:border-transparent"
+        >
+          <option value="">All roles</option>
+          <option value="owner">Owner</option>
+          <option value="admin">Admin</option>
+          <option value="moderator">Moderator</option>
+          <option value="member">Member</option>
+        </select>
+      </div>
+
       {loading && (
         <div className="text-center py-8 text-neutral-500">
           Loading members...
@@ -152,6 +195,14 @@ const MembersSection = ({ communityId, isVisible, currentUserRole, isOwner }) =>
               No members found.
             </div>
           )}
+
+          {nextCursor && (
+            <div className="text-center">
+              <Button variant="outline" size="sm" onClick={loadMore} disabled={loadingMore}>
+                {loadingMore ? 'Loading...' : 'Load more'}
+              </Button>
+            </div>
+          )}
         </div>
       )}
     </div>
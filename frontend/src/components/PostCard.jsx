@@ -139,7 +139,11 @@ const PostCard = ({ post, onPostDeleted, onPostEdit }) => {
         {/* Like and Comments actions */}
         <div className="mt-4 pt-3 border-t border-neutral-100">
           <div className="flex items-center gap-3">
-            <LikeButton postId={post.post_id} />
+            <LikeButton
+              postId={post.post_id}
+              initialLikeCount={post.like_count}
+              initialIsLiked={post.is_liked}
+            />
             <Button
               variant="outline"
               size="sm"
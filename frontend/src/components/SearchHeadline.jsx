@@ -0,0 +1,18 @@
+import React from 'react';
+
+// Renders a search headline: <mark>...</mark> pairs become highlights, everything
+// else stays plain text, so user content is never interpreted as HTML
+const SearchHeadline = ({ headline }) => {
+  const parts = headline.split(/<mark>|<\/mark>/);
+  return (
+    <span>
+      {parts.map((part, index) =>
+        index % 2 === 1
+          ? <mark key={index} className="bg-yellow-100 text-neutral-900 rounded px-0.5">{part}</mark>
+          : <React.Fragment key={index}>{part}</React.Fragment>
+      )}
+    </span>
+  );
+};
+
+export default SearchHeadline;
@@ -0,0 +1,167 @@
+import React, { useEffect, useState } from 'react';
+import { Link } from 'react-router-dom';
+import { getHomeTimeline } from '../api/posts';
+import { getPostsLikeStatus } from '../api/likes';
+import { searchPosts } from '../api/search';
+import { Card, CardHeader, CardTitle, CardContent } from '../components/ui/card';
+import { Button } from '../components/ui/button';
+import PostCard from '../components/PostCard';
+import SearchHeadline from '../components/SearchHeadline';
+
+const Feed = () => {
+  const [posts, setPosts] = useState([]);
+  const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [error, setError] = useState(null);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [query, setQuery] = useState('');
+  const [searchResults, setSearchResults] = useState(null);
+  const [searchCursor, setSearchCursor] = useState(null);
+
+  // Like status is fetched per page, as on the community page
+  const withLikeStatus = async (page) => {
+    const likeStatus = await getPostsLikeStatus(page.map(post => post.post_id)).catch(() => ({}));
+    return page.map(post => ({ ...post, ...likeStatus[post.post_id] }));
+  };
+
+  const fetchTimeline = async (cursor = null) => {
+    try {
+      const result = await getHomeTimeline(cursor);
+      const page = await withLikeStatus(result.posts);
+      setPosts(prev => cursor ? [...prev, ...page] : page);
+      setNextCursor(result.next_cursor);
+      setError(null);
+    } catch (err) {
+      console.error('Failed to fetch home timeline:', err);
+      setError(err.detail || 'Failed to load your feed');
+    }
+  };
+
+  useEffect(() => {
+    fetchTimeline().finally(() => setLoading(false));
+  }, []);
+
+  const handleLoadMore = async () => {
+    setLoadingMore(true);
+    await fetchTimeline(nextCursor);
+    setLoadingMore(false);
+  };
+
+  const runSearch = async (cursor = null) => {
+    try {
+      const result = await searchPosts(query.trim(), { cursor });
+      setSearchResults(prev => cursor ? [...prev, ...result.results] : result.results);
+      setSearchCursor(result.next_cursor);
+      setError(null);
+    } catch (err) {
+      console.error('Search failed:', err);
+      setError(err.detail || 'Search failed');
+    }
+  };
+
+  const handleSearch = (e) => {
+    e.preventDefault();
+    if (query.trim()) {
+      runSearch();
+    } else {
+      setSearchResults(null);
+    }
+  };
+
+  const handlePostDeleted = (deletedPostId) => {
+    setPosts(currentPosts => currentPosts.filter(post => post.post_id !== deletedPostId));
+  };
+
+  return (
+    <div className="min-h-screen bg-muted p-8">
+      <div className="mx-auto max-w-4xl space-y-6">
+        <div className="flex items-center justify-between">
+          <h1 className="text-3xl font-bold text-neutral-900">Home Feed</h1>
+          <Link to="/communities">
+            <Button variant="outline">Communities</Button>
+          </Link>
+        </div>
+
+        <form onSubmit={handleSearch} className="flex gap-2">
+          <input
+            type="text"
+            value={query}
+            onChange={(e) => setQuery(e.target.value)}
+            placeholder="Search posts in your communities"
+            maxLength={200}
+            className="flex-1 border border-neutral-300 rounded px-3 py-2 focus:ring-2 focus:ring-blue-500 focus:border-transparent"
+          />
+          <Button type="submit">Search</Button>
+        </form>
+
+        {searchResults && (
+          <Card>
+            <CardHeader>
+              <CardTitle>Search results</CardTitle>
+            </CardHeader>
+            <CardContent>
+              {searchResults.length === 0 ? (
+                <div className="text-center py-8 text-neutral-500">No posts match your search.</div>
+              ) : (
+                <div className="space-y-3">
+                  {searchResults.map((result) => (
+                    <Link
+                      key={result.post_id}
+                      to={`/communities/${result.community_id}`}
+                      className="block p-3 bg-neutral-50 rounded-lg border border-neutral-200 hover:bg-neutral-100"
+                    >
+                      <div className="text-sm text-neutral-500 mb-1">{result.author_display_name}</div>
+                      <SearchHeadline headline={result.headline} />
+                    </Link>
+                  ))}
+                  {searchCursor && (
+                    <div className="text-center pt-2">
+                      <Button variant="outline" onClick={() => runSearch(searchCursor)}>More results</Button>
+                    </div>
+                  )}
+                </div>
+              )}
+            </CardContent>
+          </Card>
+        )}
+
+        <Card>
+          <CardHeader>
+            <CardTitle>Latest from your communities</CardTitle>
+          </CardHeader>
+          <CardContent>
+            {loading ? (
+              <div className="text-center py-8 text-neutral-500">Loading feed...</div>
+            ) : error ? (
+              <div className="text-center py-8 text-red-600">{error}</div>
+            ) : posts.length === 0 ? (
+              <div className="text-center py-8 text-neutral-500">
+                No posts yet. Join a community to fill your feed.
+              </div>
+            ) : (
+              <div className="space-y-0">
+                {posts.map((post) => (
+                  <PostCard
+                    key={post.post_id}
+                    post={post}
+                    onPostDeleted={handlePostDeleted}
+                  />
+                ))}
+
+                {nextCursor && (
+                  <div className="text-center pt-4">
+                    <Button variant="outline" onClick={handleLoadMore} disabled={loadingMore}>
+                      {loadingMore ? 'Loading...' : 'Load More Posts'}
+                    </Button>
+                  </div>
+                )}
+              </div>
+            )}
+          </CardContent>
+        </Card>
+      </div>
+    </div>
+  );
+};
+
+export default Feed;
@@ -147,6 +147,9 @@ const Communities = () => {
         <div className="flex items-center justify-between">
           <h1 className="text-3xl font-bold text-neutral-900">Communities</h1>
           <div className="flex items-center gap-3">
+            <Link to="/feed">
+              <Button variant="outline">Home Feed</Button>
+            </Link>
             <Link to="/profile">
               <Button variant="outline">👤 Profile</Button>
             </Link>
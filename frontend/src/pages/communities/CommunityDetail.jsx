@@ -3,6 +3,7 @@ import { useParams, useNavigate, Link } from 'react-router-dom';
 import { getCommunityDetails } from '../../api/communities';
 import { joinCommunity, leaveCommunity } from '../../api/memberships';
 import { getCommunityPosts } from '../../api/posts';
+import { getPostsLikeStatus } from '../../api/likes';
 import { Card, CardHeader, CardTitle, CardDescription, CardContent } from '../../components/ui/card';
 import { Button } from '../../components/ui/button';
 import CreatePostModal from '../../components/CreatePostModal';
@@ -23,6 +24,7 @@ const CommunityDetail = () => {
   const [postsError, setPostsError] = useState(null);
   const [isCreatePostModalOpen, setIsCreatePostModalOpen] = useState(false);
   const [hasMorePosts, setHasMorePosts] = useState(false);
+  const [postSort, setPostSort] = useState('new');
   const [activeTab, setActiveTab] = useState('posts');
   
   const getCurrentUserRole = () => {
@@ -53,8 +55,10 @@ const CommunityDetail = () => {
     setPostsError(null);
     
     try {
-      const result = await getCommunityPosts(communityId);
-      setPosts(result.posts);
+      const result = await getCommunityPosts(communityId, null, 20, postSort);
+      const likeStatus = await getPostsLikeStatus(result.posts.map(post => post.post_id))
+        .catch(() => ({}));
+      setPosts(result.posts.map(post => ({ ...post, ...likeStatus[post.post_id] })));
       setHasMorePosts(result.has_more);
     } catch (err) {
       console.error('Failed to fetch community posts:', err);
@@ -72,7 +76,7 @@ const CommunityDetail = () => {
     if (community?.is_member) {
       fetchCommunityPosts();
     }
-  }, [community?.is_member]);
+  }, [community?.is_member, postSort]);
 
   const handleJoinCommunity = async () => {
     setMembershipLoading(true);
@@ -255,12 +259,22 @@ const CommunityDetail = () => {
             <CardHeader>
               <div className="flex items-center justify-between">
                 <CardTitle className="text-lg">Posts</CardTitle>
-                <Button
-                  onClick={() => setIsCreatePostModalOpen(true)}
-                  size="sm"
-                >
-                  Create Post
-                </Button>
+                <div className="flex items-center gap-2">
+                  <select
+                    value={postSort}
+                    onChange={(e) => setPostSort(e.target.value)}
+                    className="border border-neutral-300 rounded px-2 py-1 text-sm"
+                  >
+                    <option value="new">Newest</option>
+                    <option value="hot">Hot</option>
+                  </select>
+                  <Button
+                    onClick={() => setIsCreatePostModalOpen(true)}
+                    size="sm"
+                  >
+                    Create Post
+                  </Button>
+                </div>
               </div>
             </CardHeader>
             <CardContent>
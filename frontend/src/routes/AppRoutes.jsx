@@ -7,6 +7,7 @@ import CommunityDetail from '../pages/communities/CommunityDetail';
 import Home from '../pages/Home';
 import ProtectedLayout from '../components/ProtectedLayout';
 import Profile from '../pages/Profile';
+import Feed from '../pages/Feed';
 
 const AppRoutes = () => {
   return (
@@ -21,6 +22,7 @@ const AppRoutes = () => {
           <Route path="/communities" element={<Communities />} />
           <Route path="/communities/:communityId" element={<CommunityDetail />} />
           <Route path="/profile" element={<Profile />} />
+          <Route path="/feed" element={<Feed />} />
         </Route>
 
       {/* Catch-all */}